@@ -0,0 +1,100 @@
+"""
+Measure file encryption and decryption throughput, and the peak resident
+memory of each, with Crypto.encrypt_file and Crypto.decrypt_file.
+
+    python benchmarks/file_encryption.py [--size MB] [--dir PATH] [--chunk-size BYTES ...] [--suite sodium|nist|all]
+
+Each step runs in its own process, so its peak memory is measured on its
+own. Files are written to --dir, which should be on the disk under test and
+have room for three times --size.
+
+The suite of CRYPTO_SUITE is measured by default. Default rows use the
+format each suite writes without a chunk size: a single XChaCha20-Poly1305
+stream for Sodium, and AES-256-GCM chunks of the default size for NIST.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from e3db import Crypto  # noqa: E402
+from e3db.nist_crypto import NistCrypto  # noqa: E402
+from e3db.sodium_crypto import SodiumCrypto  # noqa: E402
+
+SUITES = {"sodium": [SodiumCrypto], "nist": [NistCrypto], "all": [SodiumCrypto, NistCrypto]}
+
+WRITE_SIZE = 1024 * 1024
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def encrypt(crypto, ak, plaintext_filename, chunk_size, results):
+    start = time.perf_counter()
+    encrypted_filename, _, _ = crypto.encrypt_file(plaintext_filename, ak, chunk_size)
+    results.put((time.perf_counter() - start, peak_rss_mb(), encrypted_filename))
+
+
+def decrypt(crypto, ak, encrypted_filename, destination_filename, results):
+    start = time.perf_counter()
+    crypto.decrypt_file(encrypted_filename, destination_filename, ak)
+    results.put((time.perf_counter() - start, peak_rss_mb(), None))
+
+
+def run(step, *args):
+    # spawn, so the step does not inherit the memory of this process
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=step, args=args + (results,))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=2048, help="plaintext size in MB")
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    parser.add_argument("--chunk-size", type=int, action="append",
+                        help="also measure the chunked format with this many plaintext bytes per chunk")
+    parser.add_argument("--suite", choices=sorted(SUITES))
+    args = parser.parse_args()
+
+    plaintext_filename = os.path.join(args.dir, "e3db-benchmark-plain.bin")
+    destination_filename = os.path.join(args.dir, "e3db-benchmark-decrypted.bin")
+    with open(plaintext_filename, "wb") as f:
+        for _ in range(args.size * 1024 * 1024 // WRITE_SIZE):
+            f.write(os.urandom(WRITE_SIZE))
+
+    print("{0} MB file in {1}".format(args.size, args.dir))
+    print("{0:<32} {1:>10} {2:>14}".format("", "MB/sec", "peak RSS MB"))
+    try:
+        for crypto in SUITES[args.suite] if args.suite else [Crypto]:
+            ak = crypto.random_key()
+            for chunk_size in [None] + (args.chunk_size or []):
+                name = "{0} {1}".format(crypto.get_mode(), "default" if chunk_size is None else "chunks of {0}".format(chunk_size))
+                seconds, rss, encrypted_filename = run(encrypt, crypto, ak, plaintext_filename, chunk_size)
+                print("{0:<32} {1:>10,.0f} {2:>14,.0f}".format(name + " encrypt", args.size / seconds, rss))
+                try:
+                    seconds, rss, _ = run(decrypt, crypto, ak, encrypted_filename, destination_filename)
+                    print("{0:<32} {1:>10,.0f} {2:>14,.0f}".format(name + " decrypt", args.size / seconds, rss))
+                    assert os.path.getsize(destination_filename) == os.path.getsize(plaintext_filename)
+                finally:
+                    os.remove(encrypted_filename)
+    finally:
+        for filename in [plaintext_filename, destination_filename]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
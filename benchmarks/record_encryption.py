@@ -0,0 +1,71 @@
+"""
+Compare record field encryption throughput of the batch encryptor,
+e3db.record_crypto.encrypt_records_data, against encrypting each field on
+its own with Crypto.encrypt_secret.
+
+    python benchmarks/record_encryption.py [--records N] [--fields M] [--size BYTES]
+
+Set CRYPTO_SUITE=NIST to measure the NIST cipher suite.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from e3db import Crypto, record_crypto  # noqa: E402
+
+
+def encrypt_per_field(ak, records_data):
+    # Equivalent of the per field path used before batching
+    encrypted_records = []
+    for data in records_data:
+        encrypted = {}
+        for key, value in data.items():
+            dk = Crypto.random_key()
+            efN = Crypto.random_nonce()
+            ef = Crypto.encrypt_secret(dk, Crypto.to_bytes(value), efN)[len(efN):]
+            edkN = Crypto.random_nonce()
+            edk = Crypto.encrypt_secret(ak, dk, edkN)[len(edkN):]
+            encrypted[key] = ".".join([Crypto.base64encode(c).decode("utf-8") for c in [edk, edkN, ef, efN]])
+        encrypted_records.append(encrypted)
+    return encrypted_records
+
+
+def measure(name, encrypt, ak, records_data, rounds):
+    fields = sum(len(d) for d in records_data) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encrypt(ak, records_data)
+    elapsed = time.perf_counter() - start
+    print("{0:<12} {1:>12,.0f} fields/sec".format(name, fields / elapsed))
+    return fields / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--fields", type=int, default=10)
+    parser.add_argument("--size", type=int, default=32, help="bytes per field value")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    ak = Crypto.random_key()
+    value = "x" * args.size
+    records_data = [{"field_{0}".format(f): value for f in range(args.fields)} for _ in range(args.records)]
+
+    # both paths must produce records the other can read
+    check = encrypt_per_field(ak, records_data[:1])[0]
+    assert record_crypto.decrypt_record_data(ak, check) == records_data[0]
+    check = record_crypto.encrypt_records_data(ak, records_data[:1])[0]
+    assert record_crypto.decrypt_record_data(ak, check) == records_data[0]
+
+    print("{0}: {1} records x {2} fields of {3} bytes".format(Crypto.get_mode(), args.records, args.fields, args.size))
+    per_field = measure("per field", encrypt_per_field, ak, records_data, args.rounds)
+    batch = measure("batch", record_crypto.encrypt_records_data, ak, records_data, args.rounds)
+    print("speedup      {0:>12.2f}x".format(batch / per_field))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 import os
 from .config import Config
 from .client import Client
+from .http_pool import HTTPPool
+from .cache import AccessKeyCache, PublicKeyDirectory
+from .crypto_executor import CryptoExecutor
+from .transfer import TransferManager
+from .async_client import AsyncClient
 if 'CRYPTO_SUITE' in os.environ and os.environ['CRYPTO_SUITE'] == 'NIST':
     from .nist_crypto import NistCrypto as Crypto
 else:
@@ -0,0 +1,1296 @@
+from .auth import E3DBAuth
+from .tsv1_auth import E3DBTSV1Auth
+import os
+if 'CRYPTO_SUITE' in os.environ and os.environ['CRYPTO_SUITE'] == 'NIST':
+    from .nist_crypto import NistCrypto as Crypto
+else:
+    from .sodium_crypto import SodiumCrypto as Crypto
+from .client import Client
+from .types import ClientInfo, IncomingSharingPolicy, OutgoingSharingPolicy, Meta, QueryResult, Query, Record, AuthorizerPolicy, File, SearchResult, Note, NoteOptions, SigningKeyPair, EncryptionKeyPair
+from .exceptions import APIError, CryptoError, LookupError, QueryError
+from . import record_crypto
+from . import compression as file_compression
+from .cache import AccessKeyCache, PublicKeyDirectory
+from urllib.parse import urlencode
+import asyncio
+import base64
+import hashlib
+import json
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncClient:
+    """
+    asyncio Client to perform E3DB operations with.
+
+    Mirrors e3db.Client, with every network operation exposed as a coroutine.
+    Requests are multiplexed over a pooled aiohttp connector, so many
+    operations can be in flight on one event loop without a thread per
+    request. Requires the optional aiohttp dependency (pip install e3db[async]).
+    """
+    DEFAULT_QUERY_COUNT = 100
+    DEFAULT_API_URL = "https://api.e3db.com"
+    DEFAULT_CONNECTION_LIMIT = 100
+    DOWNLOAD_CHUNK_SIZE = 65536
+
+    def __init__(self, config, connection_limit=DEFAULT_CONNECTION_LIMIT, storage_connection_limit=None, ak_cache=None, missing_ak_cache=None, key_directory=None):
+        """
+        Initialize the AsyncClient class.
+
+        Parameters
+        ----------
+        config : dict
+            JSON-style dictionary with config elements.
+
+        connection_limit : int
+            Maximum number of simultaneous connections to the E3DB API. Further
+            requests wait for a free connection. 0 means unlimited.
+            Optional.
+
+        storage_connection_limit : int
+            Maximum number of simultaneous connections to file storage.
+            Defaults to connection_limit. Optional.
+
+        ak_cache : e3db.AccessKeyCache
+            Cache for decrypted access keys. A cache with default limits is
+            created for the client if not provided.
+            Optional.
+
+        missing_ak_cache : e3db.AccessKeyCache
+            Cache remembering which access keys were not found, so they are
+            not requested again right away. Defaults to a cache with a ttl of
+            AccessKeyCache.DEFAULT_MISSING_TTL seconds.
+            Optional.
+
+        key_directory : e3db.PublicKeyDirectory
+            Cache of other clients' decoded public keys, used when sharing.
+            A directory with default limits is created for the client if not
+            provided.
+            Optional.
+
+        Returns
+        -------
+        None
+        """
+        if aiohttp is None:
+            raise ImportError("e3db.AsyncClient requires aiohttp. Install it with: pip install e3db[async]")
+
+        self.api_url = config['api_url']
+        self.api_key_id = config['api_key_id']
+        self.api_secret = config['api_secret']
+        self.client_id = config['client_id']
+        self.public_key = config['public_key']
+        self.private_key = config['private_key']
+        # token state and parsing are shared with the synchronous client, the
+        # token itself is fetched over aiohttp
+        self.e3db_auth = E3DBAuth(self.api_key_id, self.api_secret, self.api_url)
+        if config['version'] == "2":
+            self.public_signing_key = config['public_signing_key']
+            self.private_signing_key = config['private_signing_key']
+        else:
+            self.public_signing_key = ""
+            self.private_signing_key = ""
+        self.ak_cache = ak_cache if ak_cache is not None else AccessKeyCache()
+        self.missing_ak_cache = missing_ak_cache if missing_ak_cache is not None else AccessKeyCache(ttl=AccessKeyCache.DEFAULT_MISSING_TTL)
+        self.key_directory = key_directory if key_directory is not None else PublicKeyDirectory()
+        if 'client_email' in config.keys():
+            self.client_email = config['client_email']
+        else:
+            self.client_email = ''
+
+        self.signing_keys = SigningKeyPair(self.public_signing_key, self.private_signing_key)
+        self.encryption_keys = EncryptionKeyPair(self.public_key, self.private_key)
+
+        self.connection_limit = connection_limit
+        self.storage_connection_limit = connection_limit if storage_connection_limit is None else storage_connection_limit
+        self.__api_session = None
+        self.__storage_session = None
+        self.__token_lock = None
+        # in flight access key lookups, so concurrent reads of one type share a request
+        self.__ak_pending = {}
+        # per type locks, so concurrent writers of a new type create a single access key
+        self.__ak_create_locks = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Public Method to close the pooled connections held by this client.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.__api_session is not None:
+            await self.__api_session.close()
+            self.__api_session = None
+        if self.__storage_session is not None:
+            await self.__storage_session.close()
+            self.__storage_session = None
+
+    def __sessions(self):
+        """
+        Private method to lazily create the aiohttp sessions on the running
+        event loop.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple
+            (api_session, storage_session)
+        """
+        if self.__api_session is None:
+            self.__api_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit))
+            self.__storage_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.storage_connection_limit))
+            self.__token_lock = asyncio.Lock()
+        return self.__api_session, self.__storage_session
+
+    async def __bearer(self):
+        """
+        Private method to get a bearer authorization header value, fetching
+        a new token if needed. Concurrent callers share one token request.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            Authorization header value
+        """
+        api_session, _ = self.__sessions()
+        if self.e3db_auth.needs_refresh():
+            async with self.__token_lock:
+                if self.e3db_auth.needs_refresh():
+                    grant = {'grant_type': 'client_credentials'}
+                    basic = aiohttp.BasicAuth(self.api_key_id, self.api_secret)
+                    async with api_session.post(self.e3db_auth.token_url(), auth=basic, data=grant) as response:
+                        refresh_json = await response.json(content_type=None) if response.status == 200 else None
+                        self.e3db_auth.handle_refresh(response.status, refresh_json)
+        return 'Bearer ' + str(self.e3db_auth.token)
+
+    async def __request(self, method, url, json_body=None, headers=None, authorization=None):
+        """
+        Private method to send a request to the E3DB API.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+
+        url : str
+            Full url of the request
+
+        json_body : dict
+            JSON-style body to send. Optional.
+
+        headers : dict
+            Extra request headers. Optional.
+
+        authorization : str
+            Authorization header value. Defaults to the client's bearer token.
+            Optional.
+
+        Returns
+        -------
+        tuple
+            (status_code, json-style body or None)
+        """
+        api_session, _ = self.__sessions()
+        headers = dict(headers) if headers else {}
+        headers['Authorization'] = authorization if authorization is not None else await self.__bearer()
+        async with api_session.request(method, url, json=json_body, headers=headers) as response:
+            body = await response.read()
+            return response.status, json.loads(body) if body else None
+
+    def __get_url(self, *args):
+        """
+        Private method to build an api url path.
+
+        Parameters
+        ----------
+        *args : list
+            list of url path strings
+
+        Returns
+        -------
+        str
+            Full api url with path
+        """
+
+        return self.api_url + '/' + '/'.join(args)
+
+    async def __decrypt_record(self, record):
+        """
+        Private method for record decryption setup.
+
+        Parameters
+        ----------
+        record : e3db.Record
+            Encrypted record
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted record
+        """
+
+        meta = record.to_json()['meta']
+        ak = await self.__get_access_key(meta['writer_id'], meta['user_id'], self.client_id, meta['type'])
+        if ak is None:
+            raise LookupError("No access key for record type {0}".format(meta['type']))
+        return self.__decrypt_record_with_key(record, ak)
+
+    @staticmethod
+    def __decrypt_record_with_key(record, ak):
+        """
+        Private method for decryption of record fields.
+
+        Parameters
+        ----------
+        record : e3db.Record
+            Encrypted record
+
+        ak : bytes
+            Access Key
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted record
+        """
+
+        encrypted_record = record.to_json()
+        data = record_crypto.decrypt_record_data(ak, encrypted_record['data'])
+        return Record(Meta(encrypted_record['meta']), data)
+
+    async def __encrypt_record(self, plaintext_record):
+        """
+        Private method for encryption of record fields.
+
+        Parameters
+        ----------
+        plaintext_record : e3db.Record
+            Plaintext record
+
+        Returns
+        -------
+        e3db.Record
+            Encrypted record
+        """
+
+        record = plaintext_record.to_json()
+        meta = record['meta']
+        writer_id = meta['writer_id']
+        user_id = meta['user_id']
+        record_type = meta['type']
+
+        ak = await self.__ensure_access_key(writer_id, user_id, record_type)
+        return Record(Meta(meta), record_crypto.encrypt_record_data(ak, record['data']))
+
+    async def __ensure_access_key(self, writer_id, user_id, record_type):
+        """
+        Private method to obtain this client's access key for a record type,
+        creating and storing one if it does not exist yet.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        record_type: str
+            type of the record to be stored
+
+        Returns
+        -------
+        bytes
+            ak
+        """
+
+        ak = await self.__get_access_key(writer_id, user_id, self.client_id, record_type)
+        if ak is not None:
+            return ak
+        ak_cache_key = (str(writer_id), str(user_id), record_type)
+        lock = self.__ak_create_locks.setdefault(ak_cache_key, asyncio.Lock())
+        async with lock:
+            # another writer, or another client of this identity, may have
+            # created the key since it was found missing
+            ak = await self.__get_access_key(writer_id, user_id, self.client_id, record_type, for_create=True)
+            if ak is None:
+                ak = Crypto.random_key()
+                await self.__put_access_key(writer_id, user_id, self.client_id, record_type, ak)
+        return ak
+
+    async def __get_access_key(self, writer_id, user_id, reader_id, record_type, for_create=False):
+        """
+        Private method to obtain an access key. A key recently found to be
+        missing is not requested again, unless for_create is set.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        reader_id : str
+            uuid of the reader
+
+        record_type: str
+            type of the record to be stored
+
+        for_create: bool
+            Whether to request a key recently found to be missing, as the
+            caller creates it if it is still missing. Optional.
+
+        Returns
+        -------
+        bytes
+            ak, or None if no access key exists
+        """
+
+        ak_cache_key = (str(writer_id), str(user_id), record_type)
+        ak = self.ak_cache.get(ak_cache_key)
+        if ak is not None:
+            return ak
+        # skip the request if the key was just found to be missing
+        if not for_create and self.missing_ak_cache.get(ak_cache_key) is not None:
+            return None
+
+        pending = self.__ak_pending.get(ak_cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(self.__fetch_access_key(writer_id, user_id, reader_id, record_type))
+            self.__ak_pending[ak_cache_key] = pending
+            pending.add_done_callback(lambda _: self.__ak_pending.pop(ak_cache_key, None))
+        # shield so one cancelled caller does not cancel the lookup for the others
+        return await asyncio.shield(pending)
+
+    async def __fetch_access_key(self, writer_id, user_id, reader_id, record_type):
+        """
+        Private method to fetch and decrypt an access key from the server.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        reader_id : str
+            uuid of the reader
+
+        record_type: str
+            type of the record to be stored
+
+        Returns
+        -------
+        bytes
+            ak, or None if no access key exists
+        """
+
+        url = self.__get_url("v1", "storage", "access_keys", str(writer_id), str(user_id), str(reader_id), record_type)
+        status, body = await self.__request('GET', url)
+        # return None if eak not found, otherwise return eak
+        if status == 404:
+            self.missing_ak_cache[(str(writer_id), str(user_id), record_type)] = True
+            return None
+        Client._status_check(status)
+        ak = record_crypto.decrypt_eak(self.private_key, body)
+        self.ak_cache[(str(writer_id), str(user_id), record_type)] = ak
+        return ak
+
+    async def __put_access_key(self, writer_id, user_id, reader_id, record_type, ak):
+        """
+        Private method to put an access key on the server.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        reader_id : str
+            uuid of the reader
+
+        record_type: str
+            type of the record to be stored
+
+        ak: bytes
+            access key
+
+        Returns
+        -------
+        None
+        """
+
+        self.ak_cache[(str(writer_id), str(user_id), record_type)] = ak
+        self.missing_ak_cache.pop((str(writer_id), str(user_id), record_type), None)
+
+        reader_key = await self.__client_key(reader_id)
+        url = self.__get_url("v1", "storage", "access_keys", str(writer_id), str(user_id), str(reader_id), record_type)
+        status, _ = await self.__request('PUT', url, json_body={'eak': record_crypto.encrypt_ak(self.private_key, reader_key, ak)})
+        Client._status_check(status)
+
+    async def __delete_access_key(self, writer_id, user_id, reader_id, record_type):
+        """
+        Private method to delete an access key on the server.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        reader_id : str
+            uuid of the reader
+
+        record_type: str
+            type of the record to be stored
+
+        Returns
+        -------
+        None
+        """
+
+        url = self.__get_url("v1", "storage", "access_keys", str(writer_id), str(user_id), str(reader_id), record_type)
+        status, _ = await self.__request('DELETE', url)
+        Client._status_check(status)
+        # deleting the key of another reader leaves the key this client reads
+        # valid, only a key deleted for this client itself is stale
+        if str(reader_id) == str(self.client_id):
+            self.__invalidate_access_key(writer_id, user_id, record_type)
+
+    def __invalidate_access_key(self, writer_id, user_id, record_type):
+        """
+        Private method to drop a cached access key that sharing made stale.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        record_type: str
+            type of the record
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(self.ak_cache, AccessKeyCache):
+            self.ak_cache.invalidate(writer_id, user_id, record_type)
+        else:
+            # a plain dict assigned in place of the cache
+            self.ak_cache.pop((str(writer_id), str(user_id), record_type), None)
+
+    async def __put_policy(self, user_id, writer_id, reader_id, record_type, policy):
+        """
+        Private method to put a sharing policy on the server.
+
+        Parameters
+        ----------
+        user_id : str
+            uuid of the user
+
+        writer_id : str
+            uuid of the writer
+
+        reader_id : str
+            uuid of the reader
+
+        record_type: str
+            type of the record to be stored
+
+        policy: dict
+            policy object to be stored
+
+        Returns
+        -------
+        None
+        """
+
+        url = self.__get_url("v1", "storage", "policy", str(user_id), str(writer_id), str(reader_id), record_type)
+        status, _ = await self.__request('PUT', url, json_body=dict(policy))
+        Client._status_check(status)
+
+    async def __get_policies(self, kind, policy_class):
+        """
+        Private method to list sharing policies of one kind.
+
+        Parameters
+        ----------
+        kind : str
+            Policy list to fetch: outgoing, incoming, granted or proxies
+
+        policy_class : type
+            Type to build each policy document with
+
+        Returns
+        -------
+        list
+            List of policy documents
+        """
+
+        url = self.__get_url("v1", "storage", "policy", kind)
+        status, body = await self.__request('GET', url)
+        Client._status_check(status)
+        return [policy_class(policy) for policy in body] if body else []
+
+    async def outgoing_sharing(self):
+        """
+        Public Method to obtain outgoing sharing policies.
+
+        Returns
+        -------
+        list
+            List of e3db.OutgoingSharingPolicy documents
+        """
+
+        return await self.__get_policies("outgoing", OutgoingSharingPolicy)
+
+    async def incoming_sharing(self):
+        """
+        Public Method to obtain incoming sharing policies.
+
+        Returns
+        -------
+        list
+            List of e3db.IncomingSharingPolicy documents
+        """
+
+        return await self.__get_policies("incoming", IncomingSharingPolicy)
+
+    async def get_authorized_by(self):
+        """
+        Public Method to get a list of all clients (and associated record types) that
+        this client may act as an authorizer
+
+        Returns
+        -------
+        list
+            List of e3db.AuthorizerPolicy documents
+        """
+
+        return await self.__get_policies("granted", AuthorizerPolicy)
+
+    async def get_authorizers(self):
+        """
+        Public Method to get a list of all clients (and associated record types) that
+        this client has authorized to share on its behalf.
+
+        Returns
+        -------
+        list
+            List of e3db.AuthorizerPolicy documents
+        """
+
+        return await self.__get_policies("proxies", AuthorizerPolicy)
+
+    async def client_info(self, client_id):
+        """
+        Public Method to retrieve client info from the server based on client id.
+
+        Parameters
+        ----------
+        client_id : str
+            UUID of the client to lookup info for
+
+        Returns
+        -------
+        e3db.ClientInfo
+            Contains client_id and client public key.
+        """
+
+        url = self.__get_url("v1", "storage", "clients", str(client_id))
+        status, body = await self.__request('GET', url)
+        if status == 404:
+            raise LookupError('Client ID not found: {0}'.format(client_id))
+        Client._status_check(status)
+        return ClientInfo(body['client_id'], body['public_key'], body['validated'])
+
+    async def __client_key(self, client_id):
+        """
+        Private method to retrieve decoded public key from the server based
+        on client id.
+
+        Parameters
+        ----------
+        client_id : str
+            UUID of the client to lookup info for
+
+        Returns
+        -------
+        object
+            Decoded public key from client_id specified
+        """
+
+        if client_id == self.client_id:
+            return Crypto.decode_public_key(self.public_key)
+        public_key = self.key_directory.get(str(client_id))
+        if public_key is None:
+            info = await self.client_info(client_id)
+            public_key = self.key_directory.add(client_id, info.public_key)
+        return public_key
+
+    async def __read_raw(self, record_id):
+        """
+        Private method to retrieve encrypted record from the server.
+
+        Parameters
+        ----------
+        record_id : str
+            UUID of the record to retrieve
+
+        Returns
+        -------
+        e3db.Record
+            Encrypted E3DB record
+        """
+
+        url = self.__get_url("v1", "storage", "records", str(record_id))
+        status, body = await self.__request('GET', url)
+        Client._status_check(status)
+        return Record(Meta(body['meta']), body['data'])
+
+    async def read(self, record_id):
+        """
+        Public Method to retrieve encrypted record from the server, and decrypt it
+        locally.
+
+        Parameters
+        ----------
+        record_id : str
+            UUID of the record to retrieve
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted E3DB record
+        """
+
+        return await self.__decrypt_record(await self.__read_raw(record_id))
+
+    async def write(self, record_type, data, plain=None):
+        """
+        Public Method to take a plaintext record, encrypt it locally, and send it
+        to the server.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the record to be stored
+
+        data : dict
+            JSON-style document containing data to encrypt
+
+        plain : dict
+            JSON-style document containing plaintext meta data.
+            Optional.
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted E3DB record
+        """
+
+        url = self.__get_url("v1", "storage", "records")
+        meta = Meta({
+            'writer_id': str(self.client_id),
+            'user_id': str(self.client_id),
+            'type': record_type,
+            'plain': plain
+        })
+        encrypted_record = await self.__encrypt_record(Record(meta, data))
+        status, body = await self.__request('POST', url, json_body=encrypted_record.to_json())
+        Client._status_check(status)
+        return await self.__decrypt_record(Record(Meta(body['meta']), body['data']))
+
+    async def update(self, record):
+        """
+        Public Method to take an updated plaintext record, encrypt it locally, and
+        send it to the server.
+
+        Parameters
+        ----------
+        record: e3db.Record
+            plaintext record to encrypt and send updated version to server
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted E3DB record, with updated record version
+        """
+
+        record_serialized = record.to_json()
+        record_id = record_serialized['meta']['record_id']
+        version = record_serialized['meta']['version']
+        url = self.__get_url("v1", "storage", "records", "safe", str(record_id), version)
+        encrypted_record_json = (await self.__encrypt_record(record)).to_json()
+        # We don't want to post datetime objects to the server
+        del encrypted_record_json['meta']['created']
+        del encrypted_record_json['meta']['last_modified']
+        status, body = await self.__request('PUT', url, json_body=encrypted_record_json)
+        Client._status_check(status)
+        return await self.__decrypt_record(Record(meta=Meta(body['meta']), data=body['data']))
+
+    async def delete(self, record_id, version):
+        """
+        Public Method to delete a record.
+
+        Parameters
+        ----------
+        record_id: str
+            UUID of the record
+
+        version: str
+            UUID version from the record
+
+        Returns
+        -------
+        None
+        """
+
+        url = self.__get_url("v1", "storage", "records", "safe", str(record_id), version)
+        status, _ = await self.__request('DELETE', url)
+        Client._status_check(status)
+
+    async def query(self, data=True, writer=[], record=[], record_type=[], plain=None, page_size=DEFAULT_QUERY_COUNT, last_index=0):
+        """
+        Public method to Query E3DB records according to selection criteria.
+        See e3db.Client.query for the meaning of each parameter.
+
+        Returns
+        -------
+        e3db.QueryResult
+            Iterable object that returns decrypted e3db.Record objects.
+        """
+        all_writers = False
+        if writer == "all":
+            all_writers = True
+            writer = []
+
+        q = Query(after_index=last_index, include_data=data, writer_ids=[str(i) for i in writer],
+                record_ids=[str(i) for i in record], content_types=record_type, plain=plain,
+                user_ids=[], count=page_size,
+                include_all_writers=all_writers)
+
+        url = self.__get_url('v1', 'storage', 'search')
+        status, body = await self.__request('POST', url, json_body=q.to_json())
+        if body and 'error' in body:
+            raise QueryError(body['error'])
+        Client._status_check(status)
+        if body is None:
+            raise QueryError("An unexpected response occurred, and no results were returned")
+
+        records = await self.__parse_results(body['results'], data)
+        qr = QueryResult(q, records)
+        qr.after_index = body['last_index']
+        return qr
+
+    async def search(self, query):
+        """
+        Public Method to perform improved search request for E3db records
+        according to the query provided. See e3db.Client.search.
+
+        Parameters
+        ----------
+        query : Search
+            Object that contains the information to search for.
+
+        Returns
+        -------
+        SearchResult
+            Result of a valid response from E3DB.
+        """
+
+        url = self.__get_url('v2', 'search')
+        status, body = await self.__request('POST', url, json_body=query.to_json())
+        Client._status_check(status)
+        results = body['results']
+        if results is None:
+            return SearchResult(query, [], body['last_index'], body['total_results'], body['search_id'])
+
+        records = await self.__parse_results(results, query.include_data)
+        return SearchResult(query, records, body['last_index'], body['total_results'], body['search_id'])
+
+    async def __parse_results(self, results, include_data):
+        """
+        Private Method to parse the response of a search v1 or v2 request.
+
+        Parameters
+        ----------
+        results: dict[string]object (json)
+            json response from PDS
+
+        include_data: bool
+            Flag to indicate if data is included in the response, taken from the Query.
+
+        Returns
+        ----------
+        [Records]
+            List of Record Objects
+        """
+        records = []
+        for result in results:
+            record = Record(meta=Meta(result['meta']), data=result['record_data'])
+            if include_data:
+                access_key = result['access_key']
+                if access_key:
+                    ak_cache_key = (str(record.meta.writer_id), str(record.meta.user_id), record.meta.record_type)
+                    ak = self.ak_cache.get(ak_cache_key)
+                    if ak is None:
+                        ak = record_crypto.decrypt_eak(self.private_key, access_key)
+                        self.ak_cache[ak_cache_key] = ak
+                    record = self.__decrypt_record_with_key(record, ak)
+                else:
+                    record = await self.__decrypt_record(record)
+            records.append(record)
+        return records
+
+    async def share(self, record_type, reader_id):
+        """
+        Public Method to share a record type with another client.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the record to be stored
+
+        reader_id : str
+            The reader's client id (UUID) to share this record type with.
+
+        Returns
+        -------
+        None
+        """
+        if reader_id == self.client_id:
+            return
+
+        ak = await self.__ensure_access_key(self.client_id, self.client_id, record_type)
+        await self.__put_access_key(self.client_id, self.client_id, reader_id, record_type, ak)
+        await self.__put_policy(str(self.client_id), str(self.client_id), str(reader_id), record_type, {'allow': [{'read': {}}]})
+
+    async def revoke(self, record_type, reader_id):
+        """
+        Public Method to revoke access to a record type that was previously
+        shared with another client.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the record to be stored
+
+        reader_id : str
+            The reader's client id (UUID) to revoke access from.
+
+        Returns
+        -------
+        None
+        """
+        if reader_id == self.client_id:
+            return
+
+        await self.__put_policy(str(self.client_id), str(self.client_id), str(reader_id), record_type, {'deny': [{'read': {}}]})
+        await self.__delete_access_key(self.client_id, self.client_id, reader_id, record_type)
+
+    async def add_authorizer(self, record_type, authorizer_id):
+        """
+        Public Method to share a record type with an authorizer.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the record to be stored
+
+        authorizer_id : str
+            The authorizer's client id (UUID) to share this record type with.
+
+        Returns
+        -------
+        None
+        """
+
+        for policy in await self.get_authorizers():
+            if policy.authorizer_id == authorizer_id and policy.record_type == record_type:
+                # The authorizer has already been authorized
+                return None
+
+        ak = await self.__ensure_access_key(str(self.client_id), str(self.client_id), record_type)
+        await self.__put_access_key(str(self.client_id), str(self.client_id), str(authorizer_id), record_type, ak)
+        await self.__put_policy(str(self.client_id), str(self.client_id), str(authorizer_id), record_type, {'allow': [{'authorizer': {}}]})
+
+    async def remove_authorizer(self, record_type, authorizer_id):
+        """
+        Public Method to revoke access of a record type shared with an authorizer.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the record to be stored
+
+        authorizer_id : str
+            The authorizer's client id (UUID).
+
+        Returns
+        -------
+        None
+        """
+
+        await self.__put_policy(str(self.client_id), str(self.client_id), str(authorizer_id), record_type, {'deny': [{'authorizer': {}}]})
+        await self.__delete_access_key(str(self.client_id), str(self.client_id), str(authorizer_id), record_type)
+
+    async def share_on_behalf_of(self, writer_id, reader_id, record_type):
+        """
+        Public Method for an authorizer to share data it has been authorized to share
+        with another client
+
+        Parameters
+        ----------
+        writer_id: str
+            data producer id
+
+        reader_id : str
+            The reader's client id (UUID) to share this record type with.
+
+        record_type: str
+            type of the record to be stored
+
+        Returns
+        -------
+        None
+        """
+
+        ak = await self.__get_access_key(str(writer_id), str(writer_id), str(self.client_id), record_type)
+        if ak is None:
+            raise APIError('Requested item not found: HTTP 404')
+
+        await self.__put_access_key(str(writer_id), str(writer_id), str(reader_id), record_type, ak)
+        await self.__put_policy(str(writer_id), str(writer_id), str(reader_id), record_type, {'allow': [{'read': {}}]})
+
+    async def revoke_on_behalf_of(self, writer_id, reader_id, record_type):
+        """
+        Public Method for an authorizer to revoke previously shared data between
+        two clients that it has been previously authorized for.
+
+        Parameters
+        ----------
+        writer_id: str
+            data producer id
+
+        reader_id : str
+            The reader's client id (UUID).
+
+        record_type: str
+            type of the record to be stored
+
+        Returns
+        -------
+        None
+        """
+
+        await self.__put_policy(str(writer_id), str(writer_id), str(reader_id), record_type, {'deny': [{'read': {}}]})
+        await self.__delete_access_key(str(writer_id), str(writer_id), str(reader_id), record_type)
+
+    @staticmethod
+    def __file_from_json(response_json):
+        """
+        Private method to build a File from a file record response.
+
+        Parameters
+        ----------
+        response_json : dict
+            json-style file record returned from the API
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+        meta = response_json['meta']
+        return File(
+            meta['file_meta']['checksum'],
+            meta['file_meta']['compression'],
+            meta['file_meta']['size'],
+            meta['writer_id'],
+            meta['user_id'],
+            meta['type'],
+            file_url=meta['file_meta']['file_url'],
+            file_name=meta['file_meta']['file_name'],
+            record_id=meta['record_id'],
+            created=meta['created'],
+            last_modified=meta['last_modified'],
+            version=meta['version'],
+            plain=meta['plain']
+        )
+
+    async def write_file(self, record_type, plaintext_filename, plain={}, compression='raw'):
+        """
+        Encrypt a plaintext file, and write it to the Server. Encryption, and
+        sampling the file for 'auto' compression, run in the event loop's
+        default executor. See e3db.Client.write_file for compression.
+
+        Parameters
+        ----------
+        record_type : str
+            Type of the record
+
+        plaintext_filename: str
+            Filename string, including path, to read, encrypt, and send to server
+
+        plain: dict
+            Plaintext metadata information to attach to the File
+
+        compression: str
+            'raw', 'zlib', 'zstd' or 'auto'. Optional.
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+        file_compression.check(compression)
+        loop = asyncio.get_running_loop()
+        if compression == file_compression.AUTO:
+            compression = await loop.run_in_executor(None, file_compression.choose_file, plaintext_filename)
+        ak = await self.__ensure_access_key(str(self.client_id), str(self.client_id), record_type)
+
+        encrypted_filename, file_checksum, file_size = await loop.run_in_executor(None, Crypto.encrypt_file, plaintext_filename, ak, None, compression)
+        try:
+            upload_file = File(file_checksum.decode("utf-8"), compression, file_size, self.client_id, self.client_id, record_type, plain=plain)
+            status, body = await self.__request('POST', self.__get_url("v1", "storage", "files"), json_body=upload_file.to_json())
+            Client._status_check(status)
+            if status != 202:
+                raise APIError("File return status code: {0}, body: {1}".format(status, body))
+
+            # pending file write created, upload to the signed url
+            upload_file.file_url = body["file_url"]
+            upload_file.record_id = body["id"]
+            headers = {
+                'Content-Type': 'application/octet-stream',
+                'Content-MD5': upload_file.checksum
+            }
+            _, storage_session = self.__sessions()
+            with open(encrypted_filename, 'rb') as data:
+                async with storage_session.put(upload_file.file_url, headers=headers, data=data) as response:
+                    status = response.status
+                    text = await response.text()
+            Client._status_check(status)
+            if status != 200:
+                raise APIError("File upload status code: {0}, body: {1}".format(status, text))
+        finally:
+            os.remove(encrypted_filename)
+
+        # "COMMIT" the uploaded file
+        status, body = await self.__request('PATCH', self.__get_url("v1", "storage", "files", str(upload_file.record_id)))
+        Client._status_check(status)
+        return self.__file_from_json(body)
+
+    async def read_file(self, record_id, destination_filename):
+        """
+        Retrieve an Encrypted file from the server based on record_id.
+        Decrypt the file, and store the plaintext file in destination_filename.
+
+        The file is decrypted as it downloads, with decryption and writes
+        running in the event loop's default executor. The MD5 checksum of the
+        ciphertext is compared to the checksum recorded at upload, and the
+        destination is removed if the download or decryption fails.
+
+        Parameters
+        ----------
+        record_id : str
+            ID of the record to retrieve
+
+        destination_filename: str
+            Filename string, including path, to store the plaintext file at.
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+
+        loop = asyncio.get_running_loop()
+        status, body = await self.__request('GET', self.__get_url("v1", "storage", "files", str(record_id)))
+        Client._status_check(status)
+        if status != 200:
+            raise APIError("File fetch status code: {0}, body: {1}".format(status, body))
+        file_info = self.__file_from_json(body)
+
+        ak = await self.__get_access_key(file_info.writer_id, file_info.user_id, self.client_id, file_info.record_type)
+        if ak is None:
+            raise APIError("Can't read records of type {0}".format(file_info.record_type))
+
+        decryptor = Crypto.file_decryptor(ak, file_info.compression)
+        md5 = hashlib.md5()
+
+        def write_decrypted(destination_file_handle, chunk):
+            md5.update(chunk)
+            for plaintext in file_compression.drain(decryptor, decryptor.update(chunk)):
+                destination_file_handle.write(plaintext)
+
+        def write_final(destination_file_handle):
+            for plaintext in file_compression.drain(decryptor, decryptor.finish()):
+                destination_file_handle.write(plaintext)
+            checksum = base64.b64encode(md5.digest()).decode("utf-8")
+            if checksum != file_info.checksum:
+                raise CryptoError("Encrypted file checksum {0} does not match {1}".format(checksum, file_info.checksum))
+
+        destination_file_handle = await loop.run_in_executor(None, open, destination_filename, 'wb')
+        try:
+            try:
+                _, storage_session = self.__sessions()
+                async with storage_session.get(file_info.file_url) as response:
+                    Client._status_check(response.status)
+                    if response.status != 200:
+                        raise APIError("File download status code: {0}".format(response.status))
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        await loop.run_in_executor(None, write_decrypted, destination_file_handle, chunk)
+                await loop.run_in_executor(None, write_final, destination_file_handle)
+            finally:
+                await loop.run_in_executor(None, destination_file_handle.close)
+        except BaseException:
+            # remove partial plaintext, which failed verification
+            await loop.run_in_executor(None, os.remove, destination_filename)
+            raise
+        return file_info
+
+    async def __note_request(self, method, private_signing_key, client_id, params=None, headers=None, json_body=None):
+        """
+        Private method to send a TSV1 signed request to the notes endpoint.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+
+        private_signing_key : str
+            Private signing key to sign the request with
+
+        client_id : str
+            Client id to include in the signature
+
+        params : dict
+            Query parameters. Optional.
+
+        headers : dict
+            Extra request headers. Optional.
+
+        json_body : dict
+            JSON-style body to send. Optional.
+
+        Returns
+        -------
+        dict
+            json-style body of the response
+        """
+        url = "{0}/v2/storage/notes".format(self.api_url)
+        if params:
+            url = "{0}?{1}".format(url, urlencode(params))
+        auth = E3DBTSV1Auth(private_signing_key, client_id)
+        status, body = await self.__request(method, url, json_body=json_body, headers=headers,
+                                            authorization=auth.authorization_header(method, url))
+        Client._status_check(status)
+        return body
+
+    async def write_note(self, data: dict, recipient_encryption_key: str, recipient_signing_key: str, options: NoteOptions) -> Note:
+        """
+        Public Method to make a note, encrypt it locally, and send it
+        to the server.
+
+        Parameters
+        ----------
+        data : dict
+
+        recipient_encryption_key : str
+
+        recipient_signing_key : str
+
+        options : types.NoteOptions
+
+        Returns
+        -------
+        e3db.Note
+            Decrypted E3DB note
+        """
+        encrypted_note = Client.create_encrypted_note(data, recipient_encryption_key, recipient_signing_key, self.encryption_keys, self.signing_keys, options)
+        body = await self.__note_request('POST', self.signing_keys.private_key, options.note_writer_client_id, json_body=encrypted_note.to_json())
+        response_note = Note.decode(body)
+        # reattach unencrypted data for user convenience
+        response_note.data = data
+        return response_note
+
+    async def read_note(self, note_id, auth_params={}, auth_headers={}) -> Note:
+        """
+        Public method to read a note by note_id.
+
+        Parameters
+        ----------
+        note_id : str
+            UUID assigned by Tozstore, used to identify a note.
+
+        auth_params : dict
+            Extra request parameters for EACP authorizations. Optional.
+
+        auth_headers : dict
+            Extra request headers for EACP authorizations. Optional
+
+        Returns
+        -------
+        e3db.Note
+            Decrypted note
+        """
+        params = dict(auth_params)
+        params['note_id'] = note_id
+        body = await self.__note_request('GET', self.signing_keys.private_key, self.client_id, params=params, headers=auth_headers)
+        return Client.decrypt_note(Note.decode(body), self.encryption_keys.private_key)
+
+    async def read_note_by_name(self, name, auth_params={}, auth_headers={}) -> Note:
+        """
+        Public method to read a note by name, the id_string of its NoteOptions.
+
+        Parameters
+        ----------
+        name : str
+            Globally unique string assigned at time of note creation.
+
+        auth_params : dict
+            Extra request parameters for EACP authorizations. Optional.
+
+        auth_headers : dict
+            Extra request headers for EACP authorizations. Optional
+
+        Returns
+        -------
+        e3db.Note
+            Decrypted note
+        """
+        params = dict(auth_params)
+        params['id_string'] = name
+        body = await self.__note_request('GET', self.signing_keys.private_key, self.client_id, params=params, headers=auth_headers)
+        return Client.decrypt_note(Note.decode(body), self.encryption_keys.private_key)
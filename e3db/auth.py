@@ -2,38 +2,87 @@ import requests
 from requests.auth import AuthBase
 from requests.auth import HTTPBasicAuth
 import datetime
+import threading
 from .exceptions import APIError
 
 
 class E3DBAuth(AuthBase):
     DEFAULT_API_URL = "https://api.e3db.com"
 
-    def __init__(self, api_key_id, api_secret, api_url=DEFAULT_API_URL):
+    def __init__(self, api_key_id, api_secret, api_url=DEFAULT_API_URL, session=None):
         self.api_key_id = api_key_id
         self.api_secret = api_secret
         self.api_url = api_url
+        # pooled session to refresh tokens over, falls back to a one-off connection
+        self.session = session if session is not None else requests
         self.token = None
         # guaranteed to be less than current time (Unix Epoch)
         self.expires_at = datetime.datetime(1970, 1, 1)
+        # serializes token refreshes when the client is used from many threads
+        self.__refresh_lock = threading.Lock()
+
+    def needs_refresh(self):
+        """
+        Whether a new bearer token must be fetched before the next request.
+
+        Returns
+        -------
+        bool
+            True if there is no token, or the token has expired.
+        """
+        return (self.token is None) or (datetime.datetime.utcnow() > self.expires_at)
+
+    def token_url(self):
+        """
+        Get the url bearer tokens are fetched from.
+
+        Returns
+        -------
+        str
+            Token endpoint url
+        """
+        return "{0}/v1/auth/token".format(self.api_url)
+
+    def handle_refresh(self, status_code, refresh_json):
+        """
+        Store the bearer token from a token endpoint response, or raise the
+        matching error.
+
+        Parameters
+        ----------
+        status_code : int
+            HTTP status code of the token response
+
+        refresh_json : dict
+            json-style body of the token response, or None
+
+        Returns
+        -------
+        None
+        """
+        # check if status code was 200 OK
+        if status_code == 200:
+            self.token = refresh_json['access_token']
+            expire_time = refresh_json['expires_at']
+            # now save that as a datetime object so we can do later comparison
+            self.expires_at = datetime.datetime.strptime(expire_time, "%Y-%m-%dT%H:%M:%S.%fZ")
+        # we need to make sure if an error happened we raise the proper exception
+        elif status_code == 401:
+            raise APIError("Unauthorized. Check your API key pair to ensure it is valid.")
+        else:
+            raise APIError("Authentication failure: HTTP Status: {0}".format(status_code))
 
     def __call__(self, r):
         # if we need to renew the token for the request, we do that real quick.
         # otherwise, we add the bearer token header from our existing token
-        if (self.token is None) or (datetime.datetime.utcnow() > self.expires_at):
-            grant = {'grant_type': 'client_credentials'}
-            refresh_request = requests.post(url="{0}/v1/auth/token".format(self.api_url), auth=HTTPBasicAuth(self.api_key_id, self.api_secret), data=grant)
-            # check if status code was 200 OK
-            if refresh_request.status_code == 200:
-                refresh_json = refresh_request.json()
-                self.token = refresh_json['access_token']
-                expire_time = refresh_json['expires_at']
-                # now save that as a datetime object so we can do later comparison
-                self.expires_at = datetime.datetime.strptime(expire_time, "%Y-%m-%dT%H:%M:%S.%fZ")
-            # we need to make sure if an error happened we raise the proper exception
-            elif refresh_request.status_code == 401:
-                raise APIError("Unauthorized. Check your API key pair to ensure it is valid.")
-            else:
-                raise APIError("Authentication failure: HTTP Status: {0}".format(refresh_request.status_code))
+        if self.needs_refresh():
+            with self.__refresh_lock:
+                # another thread may have refreshed while we waited
+                if self.needs_refresh():
+                    grant = {'grant_type': 'client_credentials'}
+                    refresh_request = self.session.post(url=self.token_url(), auth=HTTPBasicAuth(self.api_key_id, self.api_secret), data=grant)
+                    refresh_json = refresh_request.json() if refresh_request.status_code == 200 else None
+                    self.handle_refresh(refresh_request.status_code, refresh_json)
 
         # Add the bearer token to the request we want to send
         r.headers['Authorization'] = 'Bearer ' + str(self.token)
@@ -7,15 +7,110 @@ from uuid import uuid4
 import nacl.hash
 import nacl.encoding
 from typing import Tuple
+from collections import OrderedDict
+import threading
+import weakref
+import os.path
+import tempfile
+from . import streams
+from .compression import drain
 
 BLAKE2B_HASHER = nacl.hash.blake2b
 SIGNATURE_VERSION = 'e7737e7c-1637-511e-8bab-93c4f3e26fd9'
+KEY_CACHE_SIZE = 256
+# Size of the views of the ciphertext passed to the decryptor by decrypt_file
+FILE_READ_SIZE = 1024 * 1024
+
+
+class KeyCache(object):
+    """
+    Bounded, thread-safe memo of key material derived by the crypto layer,
+    such as decoded keys and key agreement results, evicting the least
+    recently used entry once full.
+
+    Entries are stored under a digest of their key, so the encoded keys the
+    memo is looked up by are not held as they are.
+    """
+    __instances = weakref.WeakSet()
+
+    def __init__(self, max_entries=KEY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        KeyCache.__instances.add(self)
+
+    @staticmethod
+    def __digest(key):
+        return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=32).digest()
+
+    def get_or_create(self, key, create):
+        """
+        Get the value cached for a key, calling create to make it on a miss.
+
+        Parameters
+        ----------
+        key : object
+            Cache key, of values whose repr identifies them, such as str,
+            bytes and int, and tuples of them
+
+        create : callable
+            Called without arguments to make the value.
+
+        Returns
+        -------
+        object
+            Cached or newly created value
+        """
+        key = self.__digest(key)
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return self.__entries[key]
+            self.misses += 1
+        # create outside the lock, a duplicate computation is harmless
+        value = create()
+        with self.__lock:
+            self.__entries[key] = value
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__entries)
+
+    @classmethod
+    def clear_all(cls):
+        """
+        Clear every KeyCache, dropping all cached key material.
+        """
+        for cache in list(cls.__instances):
+            cache.clear()
+
 
 class BaseCrypto:
     @classmethod
     def get_mode(self):
         pass
 
+    @classmethod
+    def clear_key_caches(self):
+        """
+        Drops all cached decoded keys and shared keys.
+
+        Returns
+        -------
+        None
+        """
+        KeyCache.clear_all()
+
     @classmethod
     def get_signature_version(self):
         """
@@ -73,6 +168,37 @@ class BaseCrypto:
     def random_verifier(self) -> bytes:
         pass
 
+    @classmethod
+    def random_bytes(self, size):
+        pass
+
+    @classmethod
+    def secret_key_size(self):
+        pass
+
+    @classmethod
+    def secret_nonce_size(self):
+        pass
+
+    @classmethod
+    def secret_sealer(self, key):
+        """
+        Returns a function encrypting with a fixed secret key, for callers
+        encrypting many values with one key.
+
+        Parameters
+        ----------
+        key : bytes
+            Raw secret key
+
+        Returns
+        -------
+        callable
+            Called as seal(plain, nonce) with bytes arguments, returning the
+            ciphertext without the nonce prepended.
+        """
+        pass
+
     @classmethod
     def generate_keypair(self):
         # return public, private
@@ -103,11 +229,105 @@ class BaseCrypto:
         return base64.urlsafe_b64encode(b).strip(b'=')
 
     @classmethod
-    def encrypt_file(self, plaintext_file, key):
+    def aead_encrypt(self, key, nonce, plain, aad):
+        """
+        Encrypt and authenticate a message, with additional data that is
+        authenticated but not encrypted.
+
+        Parameters
+        ----------
+        key : bytes
+            Raw secret key
+
+        nonce : bytes
+            Nonce of aead_nonce_size bytes, never reused with the key
+
+        plain : bytes
+            Plaintext
+
+        aad : bytes
+            Additional authenticated data
+
+        Returns
+        -------
+        bytes
+            Ciphertext followed by the aead_tag_size bytes tag.
+        """
+        pass
+
+    @classmethod
+    def aead_decrypt(self, key, nonce, ciphertext, aad):
+        pass
+
+    @classmethod
+    def aead_nonce_size(self):
+        pass
+
+    @classmethod
+    def aead_tag_size(self):
+        pass
+
+    @classmethod
+    def encrypt_file(self, plaintext_filename, key, chunk_size=None, compression='raw'):
+        '''
+        Encrypts plaintext_filename to a temporary encrypted file, with the
+        filename returned as encrypted_filename. See file_encryptor for
+        chunk_size and compression.
+
+        Assumes files are already on filesystem (retrieved previously from server)
+
+        Returns tuple of (encrypted_filename, checksum, encrypted_length).
+        '''
+
+        produce = self.file_encryptor(plaintext_filename, key, chunk_size, compression)
+        # create temporary file for encrypted data
+        encrypted_file_handle = tempfile.NamedTemporaryFile(prefix="e2e", suffix=".bin", delete=False)
+        encrypted_filename = encrypted_file_handle.name
+        m = hashlib.md5()
+        encrypted_length = 0
+        with encrypted_file_handle:
+            for stream_bytes in produce():
+                encrypted_file_handle.write(stream_bytes)
+                m.update(stream_bytes)
+                encrypted_length += len(stream_bytes)
+
+        # Cannot import EncryptedFileInfo class here, so return an tuple that can
+        # be used in the client.py file to construct the EncryptedFileInfo object
+        # Returns encrypted_filename, md5 checksum, length in bytes of encrypted file
+        return (encrypted_filename, base64.b64encode(m.digest()), encrypted_length)
+
+    @classmethod
+    def decrypt_file(self, encrypted_filename, destination_filename, key, compression='raw', read_size=FILE_READ_SIZE):
+        '''
+        Decrypts encrypted_filename, and outputs plaintext file in destination_filename.
+        Assumes files are already on filesystem (retrieved previously from server).
+        compression is the codec recorded for the file.
+
+        The encrypted file is memory mapped where possible, and passed to the
+        decryptor read_size bytes at a time without copying it.
+        '''
+        # Check if the file exists, and we can read it with proper permissions
+        if not os.path.isfile(encrypted_filename):
+            raise IOError("File not found: {0}".format(encrypted_filename))
+
+        decryptor = self.file_decryptor(key, compression)
+        with open(encrypted_filename, 'rb') as encrypted_file_handle, open(destination_filename, 'wb+') as destination_file_handle:
+            for read_block in streams.file_views(encrypted_file_handle, read_size):
+                for plaintext in drain(decryptor, decryptor.update(read_block)):
+                    destination_file_handle.write(plaintext)
+            for plaintext in drain(decryptor, decryptor.finish()):
+                destination_file_handle.write(plaintext)
+
+    @classmethod
+    def file_encryptor(self, plaintext_file, key, chunk_size=None, compression='raw'):
+        pass
+
+    @classmethod
+    def stream_encryptor(self, open_plaintext, key, chunk_size=None, compression='raw'):
         pass
 
     @classmethod
-    def decrypt_file(self, encrypted_file, destination_file, key):
+    def file_decryptor(self, key, compression='raw'):
         pass
 
     @classmethod
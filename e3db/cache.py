@@ -0,0 +1,291 @@
+from collections import OrderedDict
+import threading
+import os
+import time
+if 'CRYPTO_SUITE' in os.environ and os.environ['CRYPTO_SUITE'] == 'NIST':
+    from .nist_crypto import NistCrypto as Crypto
+else:
+    from .sodium_crypto import SodiumCrypto as Crypto
+
+
+class LRUCache(object):
+    """
+    Bounded, thread-safe cache with expiring entries.
+
+    Entries expire after `ttl` seconds, and once `max_entries` is reached the
+    least recently used entry is evicted. The cache supports the subset of the
+    dict interface the clients use.
+    """
+    DEFAULT_MAX_ENTRIES = 1024
+    DEFAULT_TTL = 3600
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        """
+        Initialize the LRUCache class.
+
+        Parameters
+        ----------
+        max_entries : int
+            Maximum number of entries held. Optional.
+
+        ttl : float
+            Seconds an entry is kept after it is stored, or None to keep it
+            until evicted. Optional.
+
+        clock : callable
+            Returns the current time in seconds. Optional.
+
+        Returns
+        -------
+        None
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1. Given: {0}".format(max_entries))
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        # key -> (expires_at, value), least recently used first
+        self.__entries = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+        self.__invalidations = 0
+
+    def get(self, key, default=None):
+        """
+        Get a cached value, counting a hit or a miss.
+
+        Parameters
+        ----------
+        key : object
+            Cache key
+
+        default : object
+            Returned if the key is not cached. Optional.
+
+        Returns
+        -------
+        object
+            Cached value, or default
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= self.__clock():
+                del self.__entries[key]
+                self.__expirations += 1
+                entry = None
+            if entry is None:
+                self.__misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[1]
+
+    def __setitem__(self, key, value):
+        with self.__lock:
+            expires_at = self.__clock() + self.ttl if self.ttl is not None else None
+            self.__entries[key] = (expires_at, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            return entry is not None and (entry[0] is None or entry[0] > self.__clock())
+
+    def __delitem__(self, key):
+        with self.__lock:
+            del self.__entries[key]
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__entries)
+
+    def pop(self, key, default=None):
+        """
+        Remove an entry, counting it as invalidated if it was cached.
+
+        Parameters
+        ----------
+        key : object
+            Cache key
+
+        default : object
+            Returned if the key is not cached. Optional.
+
+        Returns
+        -------
+        object
+            Removed value, or default
+        """
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is None:
+                return default
+            self.__invalidations += 1
+            return entry[1]
+
+    def _remove_matching(self, predicate):
+        """
+        Remove every entry whose key matches a predicate, counting them as
+        invalidated.
+
+        Parameters
+        ----------
+        predicate : callable
+            Called with each key, returning True to remove it.
+
+        Returns
+        -------
+        int
+            Number of entries removed
+        """
+        with self.__lock:
+            matches = [key for key in self.__entries if predicate(key)]
+            for key in matches:
+                del self.__entries[key]
+            self.__invalidations += len(matches)
+            return len(matches)
+
+    def clear(self):
+        """
+        Remove every entry. Counters are kept.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        with self.__lock:
+            self.__invalidations += len(self.__entries)
+            self.__entries.clear()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            size, max_entries, hits, misses, evictions, expirations and
+            invalidations
+        """
+        with self.__lock:
+            return {
+                'size': len(self.__entries),
+                'max_entries': self.max_entries,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'expirations': self.__expirations,
+                'invalidations': self.__invalidations
+            }
+
+
+class AccessKeyCache(LRUCache):
+    """
+    Bounded, thread-safe cache of decrypted access keys.
+
+    Keys are (writer_id, user_id, record_type) tuples. A plain dict can still
+    be assigned in place of a client's cache.
+    """
+    # Access keys found missing are remembered only briefly, since another
+    # client may share the type at any time
+    DEFAULT_MISSING_TTL = 30
+
+    def invalidate(self, writer_id=None, user_id=None, record_type=None):
+        """
+        Remove every access key matching the given fields. Fields left as
+        None match any value.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer. Optional.
+
+        user_id : str
+            uuid of the user. Optional.
+
+        record_type : str
+            type of the records. Optional.
+
+        Returns
+        -------
+        int
+            Number of access keys removed
+        """
+        pattern = (writer_id, user_id, record_type)
+        return self._remove_matching(lambda key: all(p is None or str(p) == k for p, k in zip(pattern, key)))
+
+
+class PublicKeyDirectory(LRUCache):
+    """
+    Bounded, thread-safe cache of decoded client public keys.
+
+    Keys are client ids. Public keys rarely change, so entries are kept for a
+    day by default.
+    """
+    DEFAULT_TTL = 24 * 3600
+
+    def __init__(self, max_entries=LRUCache.DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        """
+        Initialize the PublicKeyDirectory class.
+
+        Parameters
+        ----------
+        max_entries : int
+            Maximum number of public keys held. Optional.
+
+        ttl : float
+            Seconds a public key is kept after it is stored, or None to keep
+            it until evicted. Optional.
+
+        clock : callable
+            Returns the current time in seconds. Optional.
+
+        Returns
+        -------
+        None
+        """
+        LRUCache.__init__(self, max_entries, ttl, clock)
+
+    def add(self, client_id, public_key):
+        """
+        Decode and store a client's public key, such as one already known from
+        a ClientInfo.
+
+        Parameters
+        ----------
+        client_id : str
+            UUID of the client
+
+        public_key : str
+            Base64URL encoded public key of the client for the current cipher
+            suite, as in ClientInfo.public_key
+
+        Returns
+        -------
+        object
+            Decoded public key
+        """
+        decoded = Crypto.decode_public_key(public_key)
+        self[str(client_id)] = decoded
+        return decoded
@@ -0,0 +1,366 @@
+import struct
+from .exceptions import CryptoError
+
+# Chunked encrypted file format, shared by the crypto suites.
+#
+# Version 4 files start with the header
+#
+#   4.<edk>.<edkN>.<chunk_size>.<nonce_prefix>.
+#
+# where edk is the file key encrypted with the access key, as in version 3,
+# and the rest of the file is a sequence of chunks. Each chunk holds
+# chunk_size bytes of plaintext, except the final one which may hold fewer,
+# and is encrypted with the suite's AEAD cipher on its own:
+#
+#   nonce = nonce_prefix || chunk index, 8 bytes big endian
+#   aad   = header || chunk index, 8 bytes big endian || final flag, 1 byte
+#
+# Chunks all have the same length, so their offsets follow from the chunk
+# index, and any chunk can be fetched and authenticated without the others.
+# The header in the aad ties chunks to their file, the index stops chunks
+# being reordered, and the final flag stops a file being truncated at a chunk
+# boundary.
+
+CHUNKED_FILE_VERSION = 4
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# AEAD ciphers limit the size of a single message, and readers buffer a chunk
+MIN_CHUNK_SIZE = 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Longer than any version 4 header, so one read of this size holds it
+MAX_HEADER_LENGTH = 512
+INDEX_BYTES = 8
+
+
+def file_version(data):
+    """
+    Get the format version of an encrypted file from its first bytes.
+
+    Parameters
+    ----------
+    data : bytes
+        Start of the encrypted file
+
+    Returns
+    -------
+    int
+        Version, or None if data does not hold it yet.
+    """
+    dot = data.find(b'.', 0, 16)
+    if dot < 0:
+        if len(data) >= 16:
+            raise CryptoError("Encrypted file header not found")
+        return None
+    try:
+        return int(data[:dot])
+    except ValueError:
+        raise CryptoError("Encrypted file header not found")
+
+
+class ChunkedHeader(object):
+    """
+    Parsed header of a version 4 file, with the decrypted file key.
+    """
+
+    def __init__(self, raw, dk, chunk_size, nonce_prefix):
+        self.raw = raw
+        self.dk = dk
+        self.chunk_size = chunk_size
+        self.nonce_prefix = nonce_prefix
+
+    @classmethod
+    def create(cls, crypto, key, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Choose a new file key and nonce prefix, and build the header.
+
+        Parameters
+        ----------
+        crypto : class
+            Crypto suite class
+
+        key : bytes
+            Access Key
+
+        chunk_size : int
+            Plaintext bytes per chunk
+
+        Returns
+        -------
+        ChunkedHeader
+            Header of a new file
+        """
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError("chunk_size must be between {0} and {1}. Given: {2}".format(MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, chunk_size))
+        dk = crypto.random_key()
+        edkN = crypto.random_nonce()
+        edk = crypto.encrypt_secret(key, dk, edkN)[len(edkN):]
+        nonce_prefix = crypto.random_bytes(crypto.aead_nonce_size() - INDEX_BYTES)
+        raw = b".".join([
+            str(CHUNKED_FILE_VERSION).encode("ascii"),
+            crypto.base64encode(edk),
+            crypto.base64encode(edkN),
+            str(chunk_size).encode("ascii"),
+            crypto.base64encode(nonce_prefix)
+        ]) + b"."
+        return cls(raw, dk, chunk_size, nonce_prefix)
+
+    @classmethod
+    def parse(cls, crypto, key, data):
+        """
+        Parse the header at the start of a version 4 file, and decrypt the
+        file key.
+
+        Parameters
+        ----------
+        crypto : class
+            Crypto suite class
+
+        key : bytes
+            Access Key
+
+        data : bytes
+            Start of the encrypted file
+
+        Returns
+        -------
+        ChunkedHeader
+            Parsed header, or None if data does not hold all of it yet.
+        """
+        fields = bytes(data[:MAX_HEADER_LENGTH]).split(b'.', 5)
+        if len(fields) < 6:
+            if len(data) >= MAX_HEADER_LENGTH:
+                raise CryptoError("Encrypted file header not found")
+            return None
+        try:
+            version = int(fields[0])
+            chunk_size = int(fields[3])
+            edk, edkN, nonce_prefix = (crypto.base64decode(field) for field in (fields[1], fields[2], fields[4]))
+        except (ValueError, TypeError):
+            raise CryptoError("Encrypted file header not found")
+        if version != CHUNKED_FILE_VERSION:
+            raise CryptoError("File version: {0} is not a chunked file".format(version))
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise CryptoError("Invalid chunk size: {0}".format(chunk_size))
+        if len(nonce_prefix) != crypto.aead_nonce_size() - INDEX_BYTES:
+            raise CryptoError("Invalid nonce prefix length: {0}".format(len(nonce_prefix)))
+        raw = b".".join(fields[:5]) + b"."
+        try:
+            dk = crypto.decrypt_secret(key, edk, edkN)
+        except Exception:
+            raise CryptoError("File key failed verification")
+        return cls(raw, dk, chunk_size, nonce_prefix)
+
+    def encrypted_chunk_size(self, crypto):
+        return self.chunk_size + crypto.aead_tag_size()
+
+    def chunk_count(self, crypto, encrypted_size):
+        """
+        Get the number of chunks of a file.
+
+        Parameters
+        ----------
+        crypto : class
+            Crypto suite class
+
+        encrypted_size : int
+            Size of the whole encrypted file, in bytes
+
+        Returns
+        -------
+        int
+            Number of chunks, at least 1
+        """
+        body = encrypted_size - len(self.raw)
+        if body < crypto.aead_tag_size():
+            raise CryptoError("Encrypted file is truncated")
+        return max(1, -(-body // self.encrypted_chunk_size(crypto)))
+
+    def plaintext_size(self, crypto, encrypted_size):
+        """
+        Get the size of the plaintext of a file.
+
+        Parameters
+        ----------
+        crypto : class
+            Crypto suite class
+
+        encrypted_size : int
+            Size of the whole encrypted file, in bytes
+
+        Returns
+        -------
+        int
+            Plaintext size in bytes
+        """
+        return encrypted_size - len(self.raw) - self.chunk_count(crypto, encrypted_size) * crypto.aead_tag_size()
+
+    def chunk_offset(self, crypto, index):
+        """
+        Get the offset of a chunk in the encrypted file.
+
+        Parameters
+        ----------
+        crypto : class
+            Crypto suite class
+
+        index : int
+            Chunk index
+
+        Returns
+        -------
+        int
+            Offset in bytes
+        """
+        return len(self.raw) + index * self.encrypted_chunk_size(crypto)
+
+    def __nonce_aad(self, index, final):
+        index_bytes = struct.pack(">Q", index)
+        return self.nonce_prefix + index_bytes, self.raw + index_bytes + (b"\x01" if final else b"\x00")
+
+    def encrypt_chunk(self, crypto, index, plain, final):
+        nonce, aad = self.__nonce_aad(index, final)
+        return crypto.aead_encrypt(self.dk, nonce, plain, aad)
+
+    def decrypt_chunk(self, crypto, index, ciphertext, final):
+        """
+        Decrypt and authenticate one chunk.
+
+        Parameters
+        ----------
+        crypto : class
+            Crypto suite class
+
+        index : int
+            Chunk index
+
+        ciphertext : bytes
+            Encrypted chunk
+
+        final : bool
+            Whether this is the last chunk of the file
+
+        Returns
+        -------
+        bytes
+            Plaintext of the chunk
+        """
+        nonce, aad = self.__nonce_aad(index, final)
+        try:
+            return crypto.aead_decrypt(self.dk, nonce, bytes(ciphertext), aad)
+        except Exception:
+            raise CryptoError("Chunk {0} of the encrypted file failed verification".format(index))
+
+
+def encryptor(crypto, open_plaintext, key, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Prepare encryption of a plaintext stream in the chunked format.
+
+    Parameters
+    ----------
+    crypto : class
+        Crypto suite class
+
+    open_plaintext : callable
+        Called for each pass, returning a context manager giving a binary
+        readable positioned at the start of the plaintext.
+
+    key : bytes
+        Access Key
+
+    chunk_size : int
+        Plaintext bytes per chunk
+
+    Returns
+    -------
+    callable
+        Returns an iterator over the same encrypted bytes each time it is
+        called.
+    """
+    header = ChunkedHeader.create(crypto, key, chunk_size)
+
+    def produce():
+        yield header.raw
+        with open_plaintext() as plaintext_file_handle:
+            index = 0
+            head_chunk = read_full(plaintext_file_handle, chunk_size)
+            while True:
+                next_chunk = read_full(plaintext_file_handle, chunk_size)
+                final = next_chunk == b''
+                yield header.encrypt_chunk(crypto, index, head_chunk, final)
+                if final:
+                    return
+                head_chunk = next_chunk
+                index += 1
+
+    return produce
+
+
+def read_full(handle, size):
+    """
+    Read size bytes, or fewer only at the end of the stream, since pipes and
+    sockets may return less per read.
+    """
+    data = handle.read(size)
+    while data and len(data) < size:
+        more = handle.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+class ChunkedDecryptor(object):
+    """
+    Incremental decryption of the chunked file format, fed the file in
+    chunks of any size. See the decryptor of the crypto suite.
+    """
+
+    def __init__(self, crypto, key):
+        self.__crypto = crypto
+        self.__key = key
+        self.__buffer = bytearray()
+        self.__header = None
+        self.__index = 0
+        self.__done = False
+
+    @property
+    def done(self):
+        return self.__done
+
+    def update(self, data):
+        if self.__header is None:
+            self.__buffer += data
+            self.__header = ChunkedHeader.parse(self.__crypto, self.__key, self.__buffer)
+            if self.__header is None:
+                return b''
+            data, self.__buffer = bytes(self.__buffer[len(self.__header.raw):]), bytearray()
+        size = self.__header.encrypted_chunk_size(self.__crypto)
+        data = memoryview(data)
+        plaintext = []
+        # keep a whole chunk buffered, it may be the final one
+        if self.__buffer and len(self.__buffer) + len(data) > size:
+            fill = size - len(self.__buffer)
+            self.__buffer += data[:fill]
+            data = data[fill:]
+            plaintext.append(self.__decrypt(self.__buffer, False))
+            self.__buffer = bytearray()
+        # whole chunks are decrypted from data where they are
+        while len(data) > size:
+            plaintext.append(self.__decrypt(data[:size], False))
+            data = data[size:]
+        self.__buffer += data
+        return b''.join(plaintext)
+
+    def finish(self):
+        if self.__header is None:
+            raise CryptoError("Encrypted file ended within its header")
+        if self.__done or len(self.__buffer) < self.__crypto.aead_tag_size():
+            raise CryptoError("Encrypted file ended before its final chunk")
+        plaintext = self.__decrypt(self.__buffer, True)
+        self.__buffer = bytearray()
+        return plaintext
+
+    def __decrypt(self, chunk, final):
+        plaintext = self.__header.decrypt_chunk(self.__crypto, self.__index, chunk, final)
+        self.__index += 1
+        self.__done = final
+        return plaintext
@@ -7,13 +7,29 @@ if 'CRYPTO_SUITE' in os.environ and os.environ['CRYPTO_SUITE'] == 'NIST':
 else:
     from .sodium_crypto import SodiumCrypto as Crypto
 from .config import Config
-from .types import ClientDetails, ClientInfo, IncomingSharingPolicy, OutgoingSharingPolicy, Meta, QueryResult, Query, Record, AuthorizerPolicy, File, Search, SearchResult, Params, Range, Note, NoteKeys, NoteOptions, SigningKeyPair, EncryptionKeyPair
+from .types import ClientDetails, ClientInfo, IncomingSharingPolicy, OutgoingSharingPolicy, Meta, QueryResult, Query, Record, LazyRecord, BatchResult, AuthorizerPolicy, File, Search, SearchResult, Params, Range, Note, NoteKeys, NoteOptions, SigningKeyPair, EncryptionKeyPair
 from .exceptions import APIError, LookupError, CryptoError, QueryError, ConflictError, NoteValidationError
+from .http_pool import HTTPPool
+from .cache import AccessKeyCache, PublicKeyDirectory
+from . import record_crypto
+from . import streams
+from . import chunked_file
+from . import compression as file_compression
+from .iterators import PrefetchIterator, SearchIterator, QueryIterator
 import requests
+import base64
+import contextlib
+import io
+import itertools
+import json
 import shutil
 import hashlib
-import tempfile
 import copy
+import threading
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
 
 class Client:
     """
@@ -23,9 +39,22 @@ class Client:
     interact with data being stored and retrieved from E3DB.
     """
     DEFAULT_QUERY_COUNT = 100
+    DEFAULT_BATCH_CONCURRENCY = 8
+    # The search endpoint does not return results past this many for one query
+    MAX_SEARCH_RESULTS = 10000
+    # Largest file encrypted into memory by write_file with low_io
+    DEFAULT_FILE_SPOOL_SIZE = 16 * 1024 * 1024
+    # Size of the reads from a file download
+    FILE_CHUNK_SIZE = 1024 * 1024
+    # Times a broken file download is resumed with a fresh file_url
+    DOWNLOAD_RETRIES = 3
+    # Ciphertext received by a resumable download between checkpoints
+    CHECKPOINT_INTERVAL = 64 * 1024 * 1024
+    # Smallest range of a file downloaded over its own connection
+    MIN_DOWNLOAD_SEGMENT = 8 * 1024 * 1024
     DEFAULT_API_URL = "https://api.e3db.com"
 
-    def __init__(self, config):
+    def __init__(self, config, http_pool=None, ak_cache=None, missing_ak_cache=None, key_directory=None, crypto_executor=None):
         """
         Initialize the Client class.
 
@@ -34,17 +63,46 @@ class Client:
         config : dict
             JSON-style dictionary with config elements.
 
+        http_pool : e3db.HTTPPool
+            Connection pool to send requests over. A pool with default
+            settings is created for the client if not provided.
+            Optional.
+
+        ak_cache : e3db.AccessKeyCache
+            Cache for decrypted access keys. A cache with default limits is
+            created for the client if not provided.
+            Optional.
+
+        missing_ak_cache : e3db.AccessKeyCache
+            Cache remembering which access keys were not found, so they are
+            not requested again right away. Defaults to a cache with a ttl of
+            AccessKeyCache.DEFAULT_MISSING_TTL seconds.
+            Optional.
+
+        key_directory : e3db.PublicKeyDirectory
+            Cache of other clients' decoded public keys, used when sharing.
+            A directory with default limits is created for the client if not
+            provided.
+            Optional.
+
+        crypto_executor : e3db.CryptoExecutor
+            Worker pool to encrypt and decrypt record fields in parallel.
+            Records are encrypted and decrypted on the calling thread if not
+            provided.
+            Optional.
+
         Returns
         -------
         None
         """
+        self.http_pool = http_pool if http_pool is not None else HTTPPool()
         self.api_url = config['api_url']
         self.api_key_id = config['api_key_id']
         self.api_secret = config['api_secret']
         self.client_id = config['client_id']
         self.public_key = config['public_key']
         self.private_key = config['private_key']
-        self.e3db_auth = E3DBAuth(self.api_key_id, self.api_secret, self.api_url)
+        self.e3db_auth = E3DBAuth(self.api_key_id, self.api_secret, self.api_url, session=self.http_pool.api)
         if config['version'] == "2":
             self.public_signing_key = config['public_signing_key']
             self.private_signing_key = config['private_signing_key']
@@ -52,7 +110,11 @@ class Client:
         else:
             self.public_signing_key = ""
             self.private_signing_key = ""
-        self.ak_cache = {}
+        self.ak_cache = ak_cache if ak_cache is not None else AccessKeyCache()
+        self.missing_ak_cache = missing_ak_cache if missing_ak_cache is not None else AccessKeyCache(ttl=AccessKeyCache.DEFAULT_MISSING_TTL)
+        self.key_directory = key_directory if key_directory is not None else PublicKeyDirectory()
+        self.crypto_executor = crypto_executor
+        self.__ak_create_lock = threading.Lock()
         if 'client_email' in config.keys():
             self.client_email = config['client_email']
         else:
@@ -61,6 +123,56 @@ class Client:
         self.signing_keys = SigningKeyPair(self.public_signing_key, self.private_signing_key)
         self.encryption_keys = EncryptionKeyPair(self.public_key, self.private_key)
 
+    def pool_stats(self):
+        """
+        Public Method to get connection pool statistics for this client.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            Statistics for the 'api' and 'storage' connection pools. See
+            e3db.HTTPPool.stats.
+        """
+        return self.http_pool.stats()
+
+    def ak_cache_stats(self):
+        """
+        Public Method to get access key cache statistics for this client.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            Cache counters, see e3db.AccessKeyCache.stats, if the cache keeps
+            statistics. Counters of the cache of missing access keys are under
+            'missing', where hits are requests that were not made.
+        """
+        stats = getattr(self.ak_cache, 'stats', None)
+        result = stats() if stats is not None else {}
+        result['missing'] = self.missing_ak_cache.stats()
+        return result
+
+    def close(self):
+        """
+        Public Method to close all pooled connections held by this client.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.http_pool.close()
+
     @staticmethod
     def __response_check(response):
         """
@@ -76,6 +188,23 @@ class Client:
         None
         """
 
+        Client._status_check(response.status_code)
+
+    @staticmethod
+    def _status_check(status_code):
+        """
+        Raises errors based on an HTTP status code.
+
+        Parameters
+        ----------
+        status_code : int
+            HTTP status code of a response.
+
+        Returns
+        -------
+        None
+        """
+
         # Map of HTTP error codes to exception messages
         errors = {
             400: APIError('Invalid request: HTTP 400'),
@@ -87,15 +216,15 @@ class Client:
         }
 
         # Lookup type of error we should throw, and do so if needed.
-        if response.status_code in errors:
-            raise errors[response.status_code]
+        if status_code in errors:
+            raise errors[status_code]
 
         # If we do not have a pre-formulated error to return, but get another HTTP
         # Error, we check if response is in the 4XX-5XX Range, and return a generic HTTP error
-        if response.status_code >= 400 and response.status_code <= 600:
-            raise APIError("HTTP Error: {0}".format(response.status_code))
+        if status_code >= 400 and status_code <= 600:
+            raise APIError("HTTP Error: {0}".format(status_code))
 
-    def __decrypt_record(self, record):
+    def __decrypt_record(self, record, fields=None):
         """
         Private method for record decryption setup.
 
@@ -107,6 +236,9 @@ class Client:
         record : e3db.Record
             Encrypted record
 
+        fields : list<str>
+            Data fields to decrypt, or None for all of them
+
         Returns
         -------
         e3db.Record
@@ -118,9 +250,11 @@ class Client:
         user_id = meta['user_id']
         record_type = meta['type']
         ak = self.__get_access_key(writer_id, user_id, self.client_id, record_type)
-        return self.__decrypt_record_with_key(record, ak)
+        if ak is None:
+            raise LookupError("No access key for record type {0}".format(record_type))
+        return self.__decrypt_record_with_key(record, ak, fields)
 
-    def __decrypt_record_with_key(self, record, ak):
+    def __decrypt_record_with_key(self, record, ak, fields=None):
         """
         Private method for decryption of record fields.
 
@@ -132,6 +266,10 @@ class Client:
         ak : str
             Access Key
 
+        fields : list<str>
+            Data fields to decrypt, or None for all of them. Other fields are
+            left out of the decrypted record.
+
         Returns
         -------
         e3db.Record
@@ -139,24 +277,37 @@ class Client:
         """
 
         encrypted_record = record.to_json()
+        encrypted_data = self.__project(encrypted_record['data'], fields)
+        if self.crypto_executor is not None:
+            data = self.crypto_executor.decrypt([(ak, encrypted_data)])[0]
+        else:
+            data = record_crypto.decrypt_record_data(ak, encrypted_data)
+        # return new Record object data with plaintext data
+        return Record(Meta(encrypted_record['meta']), data)
 
-        for key, value in encrypted_record['data'].items():
-            fields = value.split(".")
+    @staticmethod
+    def __project(data, fields):
+        """
+        Private method to keep only the requested fields of record data.
 
-            if len(fields) != 4:
-                raise CryptoError("Invalid Encrypted record fields: {0}".format(value))
+        Parameters
+        ----------
+        data : dict
+            Record data fields
 
-            edk = Crypto.base64decode(fields[0])
-            edkN = Crypto.base64decode(fields[1])
-            ef = Crypto.base64decode(fields[2])
-            efN = Crypto.base64decode(fields[3])
+        fields : list<str>
+            Fields to keep, or None to keep all of them
 
-            dk = Crypto.decrypt_secret(ak, edk, edkN)
-            pv = Crypto.decrypt_secret(dk, ef, efN)
+        Returns
+        -------
+        dict
+            Data with only the requested fields, in their original order
+        """
 
-            encrypted_record['data'][key] = pv.decode("utf-8")
-        # return new Record object data with plaintext data
-        return Record(Meta(encrypted_record['meta']), encrypted_record['data'])
+        if fields is None or data is None:
+            return data
+        fields = set(fields)
+        return {key: value for key, value in data.items() if key in fields}
 
     def __encrypt_record(self, plaintext_record):
         """
@@ -185,29 +336,17 @@ class Client:
         new_meta = Meta(meta)
         record = Record(meta=new_meta, data=data).to_json()
 
-        ak = self.__get_access_key(writer_id, user_id, self.client_id, record_type)
+        # if the ak is missing, one is created and pushed to the server
+        ak = self.__own_access_key(writer_id, user_id, record_type)
 
-        # if the ak is missing, we need to create and push one to the server.
-        if ak is None:
-            ak = Crypto.random_key()
-            self.__put_access_key(writer_id, user_id, self.client_id, record_type, ak)
-
-        # Loop through the plaintext fields and encrypt them
-        for key, value in record['data'].items():
-            dk = Crypto.random_key()
-            efN = Crypto.random_nonce()
-            ef = Crypto.encrypt_secret(dk, value, efN)
-            # remove nonce from ciphertext
-            ef = ef[len(efN):]
-            edkN = Crypto.random_nonce()
-            edk = Crypto.encrypt_secret(ak, dk, edkN)
-            # remove nonce from ciphertext
-            edk = edk[len(edkN):]
-
-            record['data'][key] = ".".join([Crypto.base64encode(c).decode("utf-8") for c in [edk, edkN, ef, efN]])
+        # Encrypt each of the plaintext fields
+        if self.crypto_executor is not None:
+            encrypted_data = self.crypto_executor.encrypt(ak, [record['data']])[0]
+        else:
+            encrypted_data = record_crypto.encrypt_record_data(ak, record['data'])
 
         # return new Record object data with encrypted data
-        return Record(Meta(meta), record['data'])
+        return Record(Meta(meta), encrypted_data)
 
     def __decrypt_eak(self, eak_json):
         """
@@ -224,22 +363,17 @@ class Client:
             ak
         """
 
-        if Crypto.get_mode() == 'nist':
-            k = eak_json['authorizer_public_key']['p384']
-        else:
-            k = eak_json['authorizer_public_key']['curve25519']
-        authorizer_pubkey = Crypto.decode_public_key(k)
-        fields = eak_json['eak'].split('.')
-        if len(fields) != 2:
-            raise CryptoError("Invalid access key format: {0}".format(eak_json['eak']))
-        ciphertext = Crypto.base64decode(fields[0])
-        nonce = Crypto.base64decode(fields[1])
-        return Crypto.decrypt_eak(Crypto.decode_private_key(self.private_key), authorizer_pubkey, ciphertext, nonce)
+        return record_crypto.decrypt_eak(self.private_key, eak_json)
 
-    def __get_access_key(self, writer_id, user_id, reader_id, record_type):
+    def __get_access_key(self, writer_id, user_id, reader_id, record_type, for_create=False):
         """
         Private method to obtain an access key.
 
+        A key recently found to be missing is not requested again, unless
+        for_create is set. Callers that create the key when it is missing
+        set it, as another client of the same identity may have created the
+        key since, and a second key would make records unreadable.
+
         Parameters
         ----------
         writer_id : str
@@ -254,6 +388,10 @@ class Client:
         record_type: str
             type of the record to be stored
 
+        for_create: bool
+            Whether to request a key recently found to be missing, as the
+            caller creates it if it is still missing. Optional.
+
         Returns
         -------
         str
@@ -261,13 +399,18 @@ class Client:
         """
 
         ak_cache_key = (str(writer_id), str(user_id), record_type)
-        if ak_cache_key in self.ak_cache:
-            return self.ak_cache[ak_cache_key]
+        ak = self.ak_cache.get(ak_cache_key)
+        if ak is not None:
+            return ak
+        # skip the request if the key was just found to be missing
+        if not for_create and self.missing_ak_cache.get(ak_cache_key) is not None:
+            return None
 
         url = self.__get_url("v1", "storage", "access_keys", str(writer_id), str(user_id), str(reader_id), record_type)
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         # return None if eak not found, otherwise return eak
         if response.status_code == 404:
+            self.missing_ak_cache[ak_cache_key] = True
             return None
         else:
             self.__response_check(response)
@@ -304,18 +447,15 @@ class Client:
 
         ak_cache_key = (str(writer_id), str(user_id), record_type)
         self.ak_cache[ak_cache_key] = ak
+        self.missing_ak_cache.pop(ak_cache_key, None)
 
         reader_key = self.__client_key(reader_id)
-        nonce = Crypto.random_nonce()
-        eak = Crypto.encrypt_ak(Crypto.decode_private_key(self.private_key), reader_key, ak, nonce)
-        # Need to strip the nonce off the front of the eak
-        eak = eak[len(nonce):]
-        encoded_eak = "{0}.{1}".format(Crypto.base64encode(eak).decode("utf-8"), Crypto.base64encode(nonce).decode("utf-8"))
+        encoded_eak = record_crypto.encrypt_ak(self.private_key, reader_key, ak)
         url = self.__get_url("v1", "storage", "access_keys", str(writer_id), str(user_id), str(reader_id), record_type)
         json = {
             'eak': encoded_eak
         }
-        response = requests.put(url=url, json=json, auth=self.e3db_auth)
+        response = self.http_pool.api.put(url=url, json=json, auth=self.e3db_auth)
         self.__response_check(response)
 
     def __delete_access_key(self, writer_id, user_id, reader_id, record_type):
@@ -342,8 +482,37 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "access_keys", str(writer_id), str(user_id), str(reader_id), record_type)
-        response = requests.delete(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.delete(url=url, auth=self.e3db_auth)
         self.__response_check(response)
+        # deleting the key of another reader leaves the key this client reads
+        # valid, only a key deleted for this client itself is stale
+        if str(reader_id) == str(self.client_id):
+            self.__invalidate_access_key(writer_id, user_id, record_type)
+
+    def __invalidate_access_key(self, writer_id, user_id, record_type):
+        """
+        Private method to drop a cached access key that sharing made stale.
+
+        Parameters
+        ----------
+        writer_id : str
+            uuid of the writer
+
+        user_id : str
+            uuid of the user
+
+        record_type: str
+            type of the record
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(self.ak_cache, AccessKeyCache):
+            self.ak_cache.invalidate(writer_id, user_id, record_type)
+        else:
+            # a plain dict assigned in place of the cache
+            self.ak_cache.pop((str(writer_id), str(user_id), record_type), None)
 
     def __get_url(self, *args):
         """
@@ -392,7 +561,7 @@ class Client:
         policy = dict(policy)
         url = self.__get_url("v1", "storage", "policy", str(user_id), str(writer_id), str(reader_id), record_type)
 
-        response = requests.put(url=url, json=policy, auth=self.e3db_auth)
+        response = self.http_pool.api.put(url=url, json=policy, auth=self.e3db_auth)
         self.__response_check(response)
 
     def outgoing_sharing(self):
@@ -412,7 +581,7 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "policy", "outgoing")
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         self.__response_check(response)
         # create list of policy objects, and return them
         policies = []
@@ -439,7 +608,7 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "policy", "incoming")
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         self.__response_check(response)
         # create list of policy objects, and return them
         policies = []
@@ -450,7 +619,7 @@ class Client:
         return policies
 
     @classmethod
-    def register(self, registration_token, client_name, public_key, private_key=None, backup=False, api_url=DEFAULT_API_URL, public_signing_key=None, private_signing_key=None):
+    def register(self, registration_token, client_name, public_key, private_key=None, backup=False, api_url=DEFAULT_API_URL, public_signing_key=None, private_signing_key=None, http_pool=None):
         """
         Public Method to register a client with the server.
 
@@ -491,6 +660,10 @@ class Client:
             base64urlencoded private_signing_key object obtained from
             e3db.Client.generate_signing_keypair(). Optional. 
 
+        http_pool : e3db.HTTPPool
+            Connection pool to send requests over. Defaults to the shared
+            pool. Optional.
+
         Returns
         -------
         e3db.ClientDetails
@@ -521,7 +694,9 @@ class Client:
         if public_signing_key is not None:
             payload['client']['signing_key'] = {'ed25519': public_signing_key}
 
-        response = requests.post(url=url, json=payload)
+        if http_pool is None:
+            http_pool = HTTPPool.default()
+        response = http_pool.api.post(url=url, json=payload)
         self.__response_check(response)
         client_info = response.json()
         backup_client_id = response.headers['x-backup-client']
@@ -553,7 +728,7 @@ class Client:
                     private_signing_key=private_signing_key
                 )
 
-            client = Client(config())
+            client = Client(config(), http_pool=http_pool)
             client.backup(backup_client_id, registration_token)
 
         # make ClientDetails object
@@ -622,7 +797,7 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "clients", str(client_id))
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         if response.status_code == 404:
             raise LookupError('Client ID not found: {0}'.format(client_id))
 
@@ -652,14 +827,46 @@ class Client:
 
         if client_id == self.client_id:
             return Crypto.decode_public_key(self.public_key)
-        else:
-            client_info = self.client_info(client_id).to_json()
-            if Crypto.get_mode() == 'nist':
-                return Crypto.decode_public_key(client_info['public_key']['p384'])
-            else:
-                return Crypto.decode_public_key(client_info['public_key']['curve25519'])
+        public_key = self.key_directory.get(str(client_id))
+        if public_key is None:
+            public_key = self.key_directory.add(client_id, self.client_info(client_id).public_key)
+        return public_key
+
+    def preload_public_keys(self, client_ids, concurrency=DEFAULT_BATCH_CONCURRENCY):
+        """
+        Public Method to fetch and cache the public keys of many clients ahead
+        of sharing with them.
+
+        Keys already in the key directory are not fetched again.
+
+        Parameters
+        ----------
+        client_ids : list<str>
+            UUIDs of the clients
+
+        concurrency : int
+            Number of requests made at the same time. Optional.
+
+        Returns
+        -------
+        dict
+            Error for each client id whose key could not be loaded. Empty if
+            every key was loaded.
+        """
 
-    def __read_raw(self, record_id):
+        missing = [str(client_id) for client_id in dict.fromkeys(client_ids)
+                   if str(client_id) != str(self.client_id) and str(client_id) not in self.key_directory]
+        errors = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            infos = [(client_id, executor.submit(self.client_info, client_id)) for client_id in missing]
+            for client_id, future in infos:
+                try:
+                    self.key_directory.add(client_id, future.result().public_key)
+                except Exception as e:
+                    errors[client_id] = e
+        return errors
+
+    def __read_raw(self, record_id, fields=None):
         """
         Private method to retrieve encrypted record from the server.
 
@@ -668,6 +875,9 @@ class Client:
         record_id : str
             UUID of the record to retrieve
 
+        fields : list<str>
+            Data fields to keep, or None for all of them
+
         Returns
         -------
         e3db.Record
@@ -675,7 +885,7 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "records", str(record_id))
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         self.__response_check(response)
         json = response.json()
         # craft meta object
@@ -683,10 +893,10 @@ class Client:
         meta_json = json['meta']
         data_json = json['data']
         meta = Meta(meta_json)
-        record = Record(meta, data_json)
+        record = Record(meta, self.__project(data_json, fields))
         return record
 
-    def read(self, record_id):
+    def read(self, record_id, fields=None):
         """
         Public Method to retrieve encrypted record from the server, and decrypt it
         locally.
@@ -696,13 +906,87 @@ class Client:
         record_id : str
             UUID of the record to retrieve
 
+        fields : list<str>
+            Data fields to decrypt and return. Other fields are dropped
+            without being decrypted. All fields are returned if not provided.
+            Optional.
+
         Returns
         -------
         e3db.Record
             Decrypted E3DB record
         """
 
-        return self.__decrypt_record(self.__read_raw(record_id))
+        return self.__decrypt_record(self.__read_raw(record_id, fields))
+
+    def read_many(self, record_ids, concurrency=DEFAULT_BATCH_CONCURRENCY):
+        """
+        Public Method to retrieve and decrypt many records by id.
+
+        Records are fetched concurrently. The access key for each distinct
+        writer, user and record type is then resolved once, and records are
+        decrypted on the same pool of worker threads.
+
+        Parameters
+        ----------
+        record_ids : list<str>
+            UUIDs of the records to retrieve
+
+        concurrency : int
+            Number of requests made at the same time. Optional.
+
+        Returns
+        -------
+        list<e3db.BatchResult>
+            One result per record id, in input order. Records that are
+            missing, or could not be decrypted, have the error set instead of
+            raising it.
+        """
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1. Given: {0}".format(concurrency))
+        record_ids = [str(record_id) for record_id in record_ids]
+        unique_ids = list(dict.fromkeys(record_ids))
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            fetched = dict(zip(unique_ids, [executor.submit(self.__read_raw, record_id) for record_id in unique_ids]))
+            raw = {}
+            errors = {}
+            for record_id, future in fetched.items():
+                try:
+                    raw[record_id] = future.result()
+                except Exception as e:
+                    errors[record_id] = e
+
+            # resolve each access key exactly once
+            triples = {}
+            for record_id, record in raw.items():
+                meta = record.meta
+                triples.setdefault((str(meta.writer_id), str(meta.user_id), meta.record_type), []).append(record_id)
+            aks = {}
+            for triple, future in [(t, executor.submit(self.__get_access_key, t[0], t[1], self.client_id, t[2])) for t in triples]:
+                try:
+                    ak = future.result()
+                    if ak is None:
+                        raise LookupError("No access key for record type {0}".format(triple[2]))
+                    aks[triple] = ak
+                except Exception as e:
+                    for record_id in triples[triple]:
+                        errors[record_id] = e
+
+            decrypted = {}
+            for triple, ids in triples.items():
+                if triple in aks:
+                    for record_id in ids:
+                        decrypted[record_id] = executor.submit(self.__decrypt_record_with_key, raw[record_id], aks[triple])
+
+        results = []
+        for index, record_id in enumerate(record_ids):
+            if record_id in errors:
+                results.append(BatchResult(index, error=errors[record_id]))
+            else:
+                results.append(self.__batch_result(index, decrypted[record_id]))
+        return results
 
     def write(self, record_type, data, plain=None):
         """
@@ -737,13 +1021,170 @@ class Client:
         meta = Meta(meta_data)
         record = Record(meta, data)
         encrypted_record = self.__encrypt_record(record)
-        response = requests.post(url=url, json=encrypted_record.to_json(), auth=self.e3db_auth)
+        response = self.http_pool.api.post(url=url, json=encrypted_record.to_json(), auth=self.e3db_auth)
         self.__response_check(response)
         response_json = response.json()
         response_meta = Meta(response_json['meta'])
         decrypted = self.__decrypt_record(Record(response_meta, response_json['data']))
         return decrypted
 
+    def write_many(self, record_type, items, concurrency=DEFAULT_BATCH_CONCURRENCY, max_pending=None):
+        """
+        Public Method to encrypt and write many records of one type.
+
+        Records are encrypted and sent by a pool of worker threads, with up to
+        `concurrency` requests in flight. Input is consumed lazily and at most
+        `max_pending` items are held at once, so unbounded iterables can be
+        written with bounded memory. Writing only progresses while the
+        returned generator is iterated.
+
+        The access key for the record type is looked up, or created, once
+        before any record is written.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the records to be stored
+
+        items : iterable
+            (data, plain) tuples, where data is a JSON-style document
+            containing data to encrypt and plain is a JSON-style document
+            containing plaintext meta data, or None. A bare data dict is
+            also accepted.
+
+        concurrency : int
+            Number of records written at the same time. Values above the
+            http_pool maxsize open connections that are not reused.
+            Optional.
+
+        max_pending : int
+            Number of items read from the input ahead of the results
+            yielded. Defaults to twice the concurrency. Optional.
+
+        Returns
+        -------
+        generator<e3db.BatchResult>
+            One result per item, in input order, holding either the
+            decrypted record or the error raised while writing it.
+        """
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1. Given: {0}".format(concurrency))
+        if max_pending is None:
+            max_pending = concurrency * 2
+
+        ak = self.__own_access_key(str(self.client_id), str(self.client_id), record_type)
+
+        return self.__write_many(record_type, ak, iter(items), concurrency, max(max_pending, concurrency))
+
+    def __write_many(self, record_type, ak, items, concurrency, max_pending):
+        """
+        Private generator driving the worker threads of write_many.
+
+        Parameters
+        ----------
+        record_type: str
+            type of the records to be stored
+
+        ak : bytes
+            Access Key for the record type
+
+        items : iterator
+            Items to write, see write_many
+
+        concurrency : int
+            Number of worker threads
+
+        max_pending : int
+            Maximum number of submitted items not yet yielded
+
+        Returns
+        -------
+        generator<e3db.BatchResult>
+            One result per item, in input order
+        """
+
+        url = self.__get_url("v1", "storage", "records")
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = deque()
+        try:
+            for index, item in enumerate(items):
+                if len(pending) >= max_pending:
+                    yield self.__batch_result(*pending.popleft())
+                pending.append((index, executor.submit(self.__write_one, url, record_type, ak, item)))
+            while pending:
+                yield self.__batch_result(*pending.popleft())
+        finally:
+            # stop queued writes if the caller stopped iterating early
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def __batch_result(index, future):
+        """
+        Private method to wait for one item of a bulk operation.
+
+        Parameters
+        ----------
+        index : int
+            Input position of the item
+
+        future : concurrent.futures.Future
+            Future resolving to the decrypted record
+
+        Returns
+        -------
+        e3db.BatchResult
+            Record or error for the item
+        """
+
+        try:
+            return BatchResult(index, record=future.result())
+        except Exception as e:
+            return BatchResult(index, error=e)
+
+    def __write_one(self, url, record_type, ak, item):
+        """
+        Private method to encrypt and write one record for write_many.
+
+        Parameters
+        ----------
+        url : str
+            Records endpoint url
+
+        record_type: str
+            type of the record to be stored
+
+        ak : bytes
+            Access Key for the record type
+
+        item : tuple or dict
+            (data, plain) tuple, or a bare data dict
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted E3DB record
+        """
+
+        if isinstance(item, dict):
+            data, plain = item, None
+        else:
+            data, plain = item
+        meta = Meta({
+            'writer_id': str(self.client_id),
+            'user_id': str(self.client_id),
+            'type': record_type,
+            'plain': plain
+        })
+        encrypted_data = record_crypto.encrypt_record_data(ak, data)
+        response = self.http_pool.api.post(url=url, json=Record(meta, encrypted_data).to_json(), auth=self.e3db_auth)
+        self.__response_check(response)
+        # the server echoes back the fields we encrypted, so there is no need
+        # to decrypt them again
+        return Record(Meta(response.json()['meta']), dict(data))
+
     def update(self, record):
         """
         Public Method to take an updated plaintext record, encrypt it locally, and
@@ -772,7 +1213,7 @@ class Client:
         encrypted_record_json = encrypted_record.to_json()
         del encrypted_record_json['meta']['created']
         del encrypted_record_json['meta']['last_modified']
-        response = requests.put(url=url, json=encrypted_record_json, auth=self.e3db_auth)
+        response = self.http_pool.api.put(url=url, json=encrypted_record_json, auth=self.e3db_auth)
         self.__response_check(response)
         json = response.json()
         new_meta = Meta(json['meta'])
@@ -800,7 +1241,7 @@ class Client:
         None
         """
         url = self.__get_url("v1", "storage", "records", "safe", str(record_id), version)
-        response = requests.delete(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.delete(url=url, auth=self.e3db_auth)
         self.__response_check(response)
 
     def backup(self, client_id, registration_token):
@@ -840,10 +1281,10 @@ class Client:
         self.share('tozny.key_backup', client_id)
 
         url = self.__get_url('v1', 'account', 'backup', registration_token, str(self.client_id))
-        response = requests.post(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.post(url=url, auth=self.e3db_auth)
         self.__response_check(response)
 
-    def query(self, data=True, writer=[], record=[], record_type=[], plain=None, page_size=DEFAULT_QUERY_COUNT, last_index=0):
+    def query(self, data=True, writer=[], record=[], record_type=[], plain=None, page_size=DEFAULT_QUERY_COUNT, last_index=0, lazy=False, fields=None):
         """
         Public method to Query E3DB records according to selection criteria.
 
@@ -887,75 +1328,163 @@ class Client:
             Useful for retrieving records in 'batches'. Exposed to user through
             the QueryResult.after_index method.
 
+        lazy : bool
+            Whether to return e3db.types.LazyRecord objects, whose data fields
+            are decrypted when first read rather than up front. Optional.
+
+        fields : list<str>
+            Data fields to decrypt and return. Other fields are dropped
+            without being decrypted. All fields are returned if not provided.
+            Optional.
+
         Returns
         -------
         e3db.QueryResult
             Iterable object that returns decrypted e3db.Record objects.
         """
-        all_writers = False
-        if writer == "all":
-            all_writers = True
-            writer = []
-
-        # convert all possible UUID types back to strings
-        writer = [str(i) for i in writer]
-        record = [str(i) for i in record]
-
-        q = Query(after_index=last_index, include_data=data, writer_ids=writer,
-                record_ids=record, content_types=record_type, plain=plain,
-                user_ids=[], count=page_size,
-                include_all_writers=all_writers)
+        q = self.__build_query(data, writer, record, record_type, plain, page_size, last_index)
 
         response = self.__query(q)
 
         # take this apart
         last_index = response['last_index']
         results = response['results']
-        records = self.__parse_results(results, data)
+        records = self.__parse_results(results, data, lazy, fields)
         qr = QueryResult(q, records)
         qr.after_index = last_index
         return qr
 
-    def __query(self, query):
+    def query_iter(self, data=True, writer=[], record=[], record_type=[], plain=None, page_size=DEFAULT_QUERY_COUNT, last_index=0, prefetch=PrefetchIterator.DEFAULT_PREFETCH, lazy=False, fields=None):
         """
-        Private Method to send query to server and return response.
+        Public method to iterate over every E3DB record matching the selection
+        criteria, following after_index across pages.
+
+        Accepts the same criteria as query. The next page is fetched on a
+        background thread while records of the current page are decrypted one
+        at a time as they are consumed, and at most `prefetch` pages wait in
+        memory at once.
 
         Parameters
         ----------
-        query: e3db.Query
-            Query to run against the server.
+        data: bool
+            Whether to include the record's data when returned in the query.
+            Optional.
 
-        Returns
-        -------
-        dict
-            server response as dict (JSON)
-        """
-        url = self.__get_url('v1', 'storage', 'search')
-        response = requests.post(url=url, json=query.to_json(), auth=self.e3db_auth)
-        try:
-            json = response.json()
-            if 'error' in json:
-                # we had an error, return this to user
-                raise QueryError(json['error'])
-            self.__response_check(response)
-            return json
-        except ValueError:
-            # This Value error only occurs if there is no json body, we want it suppressed
-            pass
-        # In the case of a value error see if the response is non 200 and map to the correct exception
-        self.__response_check(response)
-        # It is unlikely that this return will get called, it would require the service to return a 200 level response
-        # code with no body, which the query endpoint should not do, however mapping that to a query exception make
-        # sense if that situation does arise
-        return QueryError("An unexpected response occurred, and no results were returned")
+        writer: list
+            List of writer ids to filter on, or "all".
+            Optional.
 
-    def search(self, query):
-        """
-        Public Method to perform improved search request for E3db records according to the query provided.
+        record: list
+            List of record ids to filter on.
+            Optional.
 
-        Requires a Search object to perform the Query. Construction and Execution is as follows:
+        record_type: list
+            List of record types to filter on.
+            Optional.
 
-        search_this = Search().Match(records=[some_params,...]).Exclude(writers=[omit_this,...])
+        plain: dict
+            JSON-style Plaintext meta data query object to use for matching
+            against record plaintext meta data fields.
+            Optional.
+
+        page_size : int
+            How many records to request per page.
+            Optional.
+
+        last_index : int
+            Retrieve records from this index onwards. Starts at 0 to return all.
+            Optional.
+
+        prefetch : int
+            Number of pages fetched ahead of the consumer. Optional.
+
+        lazy : bool
+            Whether to return e3db.types.LazyRecord objects, whose data fields
+            are decrypted when first read rather than up front. Optional.
+
+        fields : list<str>
+            Data fields to decrypt and return. Other fields are dropped
+            without being decrypted. All fields are returned if not provided.
+            Optional.
+
+        Returns
+        -------
+        e3db.iterators.QueryIterator
+            Iterator over decrypted e3db.Record objects, exposing
+            pages_fetched, records_returned and the last_index of the page
+            being consumed.
+        """
+        q = self.__build_query(data, writer, record, record_type, plain, page_size, last_index)
+        return QueryIterator(self.__query, lambda result: self.__parse_result(result, data, lazy, fields), q, prefetch)
+
+    @staticmethod
+    def __build_query(data, writer, record, record_type, plain, page_size, last_index):
+        """
+        Private Method to build a v1 Query from selection criteria.
+
+        Parameters
+        ----------
+        See query.
+
+        Returns
+        -------
+        e3db.Query
+            Query to run against the server.
+        """
+        all_writers = False
+        if writer == "all":
+            all_writers = True
+            writer = []
+
+        # convert all possible UUID types back to strings
+        writer = [str(i) for i in writer]
+        record = [str(i) for i in record]
+
+        return Query(after_index=last_index, include_data=data, writer_ids=writer,
+                record_ids=record, content_types=record_type, plain=plain,
+                user_ids=[], count=page_size,
+                include_all_writers=all_writers)
+
+    def __query(self, query):
+        """
+        Private Method to send query to server and return response.
+
+        Parameters
+        ----------
+        query: e3db.Query
+            Query to run against the server.
+
+        Returns
+        -------
+        dict
+            server response as dict (JSON)
+        """
+        url = self.__get_url('v1', 'storage', 'search')
+        response = self.http_pool.api.post(url=url, json=query.to_json(), auth=self.e3db_auth)
+        try:
+            json = response.json()
+            if 'error' in json:
+                # we had an error, return this to user
+                raise QueryError(json['error'])
+            self.__response_check(response)
+            return json
+        except ValueError:
+            # This Value error only occurs if there is no json body, we want it suppressed
+            pass
+        # In the case of a value error see if the response is non 200 and map to the correct exception
+        self.__response_check(response)
+        # It is unlikely that this return will get called, it would require the service to return a 200 level response
+        # code with no body, which the query endpoint should not do, however mapping that to a query exception make
+        # sense if that situation does arise
+        return QueryError("An unexpected response occurred, and no results were returned")
+
+    def search(self, query, lazy=False, fields=None):
+        """
+        Public Method to perform improved search request for E3db records according to the query provided.
+
+        Requires a Search object to perform the Query. Construction and Execution is as follows:
+
+        search_this = Search().Match(records=[some_params,...]).Exclude(writers=[omit_this,...])
         search_result = client.search(search_this) 
 
         For more information see the documentation of the Search Object or Tests.
@@ -964,7 +1493,16 @@ class Client:
         ----------
         query : Search
             Object that contains the information to search for.
-        
+
+        lazy : bool
+            Whether to return e3db.types.LazyRecord objects, whose data fields
+            are decrypted when first read rather than up front. Optional.
+
+        fields : list<str>
+            Data fields to decrypt and return. Other fields are dropped
+            without being decrypted. All fields are returned if not provided.
+            Optional.
+
         Returns
         -------
         SearchResult
@@ -979,10 +1517,192 @@ class Client:
         if results is None:
             return SearchResult(query, [], next_token, total_results, search_id)
 
-        records = self.__parse_results(results, query.include_data)
+        records = self.__parse_results(results, query.include_data, lazy, fields)
         qr = SearchResult(query, records, next_token, total_results, search_id)
         return qr
 
+    def search_iter(self, query, prefetch=PrefetchIterator.DEFAULT_PREFETCH, lazy=False, fields=None):
+        """
+        Public Method to iterate over every record matching a search, across
+        all pages of results.
+
+        The next page is fetched on a background thread while the current
+        page is decrypted and consumed, and at most `prefetch` pages wait in
+        memory at once. The query passed in is not modified.
+
+        search_iter = client.search_iter(Search(count=1000).match(...))
+        for record in search_iter:
+            print(search_iter.total_results, search_iter.pages_fetched)
+
+        Parameters
+        ----------
+        query : Search
+            Object that contains the information to search for. Paging starts
+            at its next_token.
+
+        prefetch : int
+            Number of pages fetched ahead of the consumer. Optional.
+
+        lazy : bool
+            Whether to return e3db.types.LazyRecord objects, whose data fields
+            are decrypted when first read rather than up front. Optional.
+
+        fields : list<str>
+            Data fields to decrypt and return. Other fields are dropped
+            without being decrypted. All fields are returned if not provided.
+            Optional.
+
+        Returns
+        -------
+        e3db.iterators.SearchIterator
+            Iterator over e3db.Record objects, exposing pages_fetched,
+            records_returned, total_results and the current next_token.
+        """
+        include_data = query.include_data
+        return SearchIterator(self.__search, lambda result: self.__parse_result(result, include_data, lazy, fields),
+                              copy.deepcopy(query), prefetch)
+
+    def search_all(self, query, start, end, key="CREATED", max_workers=4, ordered=False, min_slice=timedelta(seconds=1)):
+        """
+        Public Method to retrieve every record matching a search within a time
+        range, beyond the limit on results for a single search.
+
+        The range is split in half, recursively, until each slice matches
+        fewer than MAX_SEARCH_RESULTS records. Slices are paged and decrypted
+        concurrently, and their records merged into one stream with duplicates
+        removed.
+
+        Parameters
+        ----------
+        query : Search
+            Object that contains the information to search for. Any range on it
+            is replaced by the slices of start to end, and the object itself is
+            not modified.
+
+        start : datetime, int
+            Start of the time range, as for Search.range.
+
+        end : datetime, int
+            End of the time range, as for Search.range.
+
+        key : str
+            "CREATED|MODIFIED", which record time the range applies to.
+            Optional.
+
+        max_workers : int
+            Number of slices searched at the same time. Optional.
+
+        ordered : bool
+            Whether to yield records in order of the range key. Slices that
+            finish early are then held until every earlier slice is done.
+            Optional.
+
+        min_slice : datetime.timedelta
+            Shortest slice to split. Optional.
+
+        Returns
+        -------
+        generator<e3db.Record>
+            Every record matching the search within the range, once each.
+        """
+
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1. Given: {0}".format(max_workers))
+        # normalize ints and naive datetimes the same way the search Range does
+        bounds = Range(key=key, start=start, end=end)
+        return self.__search_all(query, bounds.start, bounds.end, key, max_workers, ordered, min_slice)
+
+    def __search_all(self, query, start, end, key, max_workers, ordered, min_slice):
+        """
+        Private generator scheduling the slices of search_all.
+
+        Parameters
+        ----------
+        See search_all. start and end are timezone aware datetimes.
+
+        Returns
+        -------
+        generator<e3db.Record>
+            Every record matching the search within the range, once each.
+        """
+
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        # slices in time order, so the head is always the earliest one left
+        slices = [executor.submit(self.__search_slice, query, start, end, key, min_slice)]
+        try:
+            while slices:
+                if ordered:
+                    done = slices[0]
+                    done.result()
+                else:
+                    done = next(iter(wait(slices, return_when=FIRST_COMPLETED).done))
+                position = slices.index(done)
+                split, records = done.result()
+                if split is not None:
+                    slices[position:position + 1] = [executor.submit(self.__search_slice, query, s, e, key, min_slice) for s, e in split]
+                    continue
+                del slices[position]
+                if ordered:
+                    records.sort(key=lambda r: r.meta.created if key == "CREATED" else r.meta.last_modified)
+                for record in records:
+                    # records created on the boundary of two slices match both
+                    record_id = str(record.meta.record_id)
+                    if record_id not in seen:
+                        seen.add(record_id)
+                        yield record
+        finally:
+            for future in slices:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def __search_slice(self, query, start, end, key, min_slice):
+        """
+        Private Method to search one time slice for search_all.
+
+        Parameters
+        ----------
+        query : Search
+            Search to run, copied before its range is set.
+
+        start : datetime
+            Start of the slice
+
+        end : datetime
+            End of the slice
+
+        key : str
+            "CREATED|MODIFIED"
+
+        min_slice : datetime.timedelta
+            Shortest slice to split
+
+        Returns
+        -------
+        tuple
+            ([(start, mid), (mid, end)], None) if the slice matches too many
+            records and must be split, otherwise (None, records) with every
+            decrypted record in the slice.
+        """
+
+        q = copy.deepcopy(query).range(key=key, start=start, end=end)
+        q.next_token = 0
+        response = self.__search(q)
+        if response['total_results'] >= self.MAX_SEARCH_RESULTS:
+            if end - start <= min_slice:
+                raise QueryError("{0} or more results between {1} and {2}, narrow the search or lower min_slice".format(
+                    self.MAX_SEARCH_RESULTS, start.isoformat("T"), end.isoformat("T")))
+            mid = start + (end - start) / 2
+            return [(start, mid), (mid, end)], None
+
+        records = []
+        while True:
+            records.extend(self.__parse_results(response['results'] or [], q.include_data))
+            if response['last_index'] == 0 or not response['results']:
+                return None, records
+            q.next_token = response['last_index']
+            response = self.__search(q)
+
     def __search(self, query):
         """
         Private Method to send search request to E3DB and return a json response.
@@ -998,12 +1718,12 @@ class Client:
             response from the server as json (dict).
         """
         url = self.__get_url('v2', 'search')
-        response = requests.post(url=url, json=query.to_json(), auth=self.e3db_auth)
+        response = self.http_pool.api.post(url=url, json=query.to_json(), auth=self.e3db_auth)
         self.__response_check(response)
         json = response.json() # server does not return error message, just status codes
         return json
 
-    def __parse_results(self, results, include_data):
+    def __parse_results(self, results, include_data, lazy=False, fields=None):
         """
         Private Method to parse the response of a search v1 or v2 request.
 
@@ -1018,28 +1738,92 @@ class Client:
 
         include_data: bool
             Flag to indicate if data is included in the response, taken from the Query.
-        
+
+        lazy: bool
+            Flag to defer decryption of each field until it is read.
+
+        fields: list<str>
+            Data fields to keep, or None for all of them.
+
         Returns
         ----------
         [Records]
             List of Record Objects
         """
-        records = []
-        for result in results:
-            result_meta = result['meta']
-            meta = Meta(result_meta)
-            result_data = result['record_data']
-            record = Record(meta=meta, data=result_data)
-            if include_data:
-                # need to decrypt all the results before returning.
-                access_key = result['access_key']
-                if access_key:
-                    ak = self.__decrypt_eak(access_key)
-                    record = self.__decrypt_record_with_key(record, ak)
-                else:
-                    record = self.__decrypt_record(record)
-            records.append(record)
-        return records
+        if not include_data or lazy or self.crypto_executor is None:
+            return [self.__parse_result(result, include_data, lazy, fields) for result in results]
+
+        # find every access key first, so the whole page is decrypted at once
+        metas = [Meta(result['meta']) for result in results]
+        aks = [self.__result_access_key(result, meta) for result, meta in zip(results, metas)]
+        datas = self.crypto_executor.decrypt([(ak, self.__project(result['record_data'], fields)) for ak, result in zip(aks, results)])
+        return [Record(meta=meta, data=data) for meta, data in zip(metas, datas)]
+
+    def __result_access_key(self, result, meta):
+        """
+        Private Method to get the access key for a search v1 or v2 result.
+
+        Parameters
+        ----------
+        result: dict[string]object (json)
+            one entry of the results in a json response from PDS
+
+        meta: e3db.Meta
+            meta of the result
+
+        Returns
+        ----------
+        bytes
+            ak, from the eak included with the result if present
+        """
+        access_key = result['access_key']
+        if not access_key:
+            return self.__get_access_key(meta.writer_id, meta.user_id, self.client_id, meta.record_type)
+        # results of one writer and type share one decryption, and the key
+        # is dropped with the rest of the cache when sharing changes
+        ak_cache_key = (str(meta.writer_id), str(meta.user_id), meta.record_type)
+        ak = self.ak_cache.get(ak_cache_key)
+        if ak is None:
+            ak = self.__decrypt_eak(access_key)
+            self.ak_cache[ak_cache_key] = ak
+        return ak
+
+    def __parse_result(self, result, include_data, lazy=False, fields=None):
+        """
+        Private Method to parse a single result of a search v1 or v2 request.
+
+        Parameters
+        ----------
+        result: dict[string]object (json)
+            one entry of the results in a json response from PDS
+
+        include_data: bool
+            Flag to indicate if data is included in the response, taken from the Query.
+
+        lazy: bool
+            Flag to defer decryption of each field until it is read.
+
+        fields: list<str>
+            Data fields to keep, or None for all of them.
+
+        Returns
+        ----------
+        Record
+            Record Object, decrypted if data was included
+        """
+        result_meta = result['meta']
+        meta = Meta(result_meta)
+        # drop unwanted ciphertexts before they are copied into the record
+        result_data = self.__project(result['record_data'], fields)
+        if include_data and lazy:
+            # capture the access key now, decrypt each field when it is read
+            ak = self.__result_access_key(result, meta)
+            return LazyRecord(meta, result_data, functools.partial(record_crypto.decrypt_field, ak))
+        record = Record(meta=meta, data=result_data)
+        if include_data:
+            # need to decrypt the result before returning.
+            record = self.__decrypt_record_with_key(record, self.__result_access_key(result, meta))
+        return record
 
     def share(self, record_type, reader_id):
         """
@@ -1064,10 +1848,8 @@ class Client:
         if reader_id == self.client_id:
             return
 
-        ak = self.__get_access_key(self.client_id, self.client_id, self.client_id, record_type)
-        if ak is None:
-            ak = Crypto.random_key()
-            self.__put_access_key(self.client_id, self.client_id, self.client_id, record_type, ak) # Give yourself the ak 
+        # Give yourself the ak if there is none yet
+        ak = self.__own_access_key(str(self.client_id), str(self.client_id), record_type)
         self.__put_access_key(self.client_id, self.client_id, reader_id, record_type, ak)
 
         allow_read = {
@@ -1136,10 +1918,7 @@ class Client:
                 # The authorizer has already been authorized, we can safely return now
                 return None
 
-        ak = self.__get_access_key(str(self.client_id), str(self.client_id), str(self.client_id), record_type)
-        if ak is None:
-            ak = Crypto.random_key()
-            self.__put_access_key(str(self.client_id), str(self.client_id), str(self.client_id), record_type, ak)
+        ak = self.__own_access_key(str(self.client_id), str(self.client_id), record_type)
 
         # write the EAK for the new authorizer client
         self.__put_access_key(str(self.client_id), str(self.client_id), str(authorizer_id), record_type, ak)
@@ -1263,7 +2042,7 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "policy", "granted")
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         self.__response_check(response)
         # create list of policy objects, and return them
         policies = []
@@ -1289,7 +2068,7 @@ class Client:
         """
 
         url = self.__get_url("v1", "storage", "policy", "proxies")
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         self.__response_check(response)
         # create list of policy objects, and return them
         policies = []
@@ -1299,13 +2078,33 @@ class Client:
                 policies.append(AuthorizerPolicy(policy))
         return policies
 
-    def write_file(self, record_type, plaintext_filename, plain={}):
+    def write_file(self, record_type, plaintext_filename, plain={}, low_io=False, spool_size=DEFAULT_FILE_SPOOL_SIZE, chunk_size=None, compression='raw'):
         """
         Encrypt a plaintext file, and write it to the Server.
 
         Does not Encrypt or Delete the plaintext file after operation is
         complete. The SDK user must manage their plaintext files.
 
+        By default the ciphertext is written to a temporary file, which is
+        uploaded and then deleted. With low_io, files up to spool_size are
+        encrypted into memory instead, and larger files are encrypted twice
+        while streaming: once to compute the checksum the upload requires,
+        and again as the body of the upload. The ciphertext is then never
+        stored, at the cost of a second encryption pass. The plaintext file
+        must not change during the upload: a change is detected, the upload
+        is abandoned and e3db.CryptoError raised.
+
+        With chunk_size, the file is encrypted in independent chunks of that
+        many plaintext bytes, so ranges of it can be read without decrypting
+        the rest, see read_file_range. Files are otherwise encrypted as one
+        stream.
+
+        With compression, the plaintext is compressed before it is encrypted,
+        and the codec is recorded as the compression of the File, so readers
+        decompress it. 'auto' compresses the start of the file to choose
+        between 'zstd' (or 'zlib' without the zstandard package) and 'raw'.
+        Ranges of compressed files can only be read from the start.
+
         Parameters
         ----------
         record_type : str
@@ -1317,24 +2116,252 @@ class Client:
         plain: dict
             Plaintext metadata information to attach to the File
 
+        low_io: bool
+            Whether to avoid writing the ciphertext to disk. Optional.
+
+        spool_size: int
+            With low_io, largest file in bytes that is encrypted into memory.
+            Optional.
+
+        chunk_size: int
+            Plaintext bytes per chunk, such as
+            e3db.chunked_file.DEFAULT_CHUNK_SIZE. Optional.
+
+        compression: str
+            'raw', 'zlib', 'zstd' or 'auto'. Optional.
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+        file_compression.check(compression)
+        if compression == file_compression.AUTO:
+            compression = file_compression.choose_file(plaintext_filename)
+        ak = self.__own_access_key(str(self.client_id), str(self.client_id), record_type)
+
+        if not low_io:
+            encrypted_filename, file_checksum, file_size = Crypto.encrypt_file(plaintext_filename, ak, chunk_size, compression)
+            try:
+                # Read our encrypted file, upload it to E3DB Large Files data storage
+                with open(encrypted_filename, 'rb') as data:
+                    return self.__upload_file(record_type, data, file_checksum.decode("utf-8"), file_size, plain, compression)
+            finally:
+                # Delete temporary encrypted file, now it is on the server
+                os.remove(encrypted_filename)
+
+        produce = Crypto.file_encryptor(plaintext_filename, ak, chunk_size, compression)
+        return self.__write_encrypted(record_type, produce, os.path.getsize(plaintext_filename), spool_size, plain, compression)
+
+    def write_file_obj(self, record_type, readable, plain={}, spool_size=DEFAULT_FILE_SPOOL_SIZE, chunk_size=None, compression='raw'):
+        """
+        Encrypt the content of a binary file-like object, and write it to the
+        Server as a file.
+
+        The ciphertext is never written to disk for seekable objects. Content
+        up to spool_size bytes is encrypted into memory, and larger seekable
+        content is encrypted twice while streaming, as write_file does with
+        low_io, so it must not change during the upload. Objects that cannot
+        seek, such as pipes, are read once, and their ciphertext is spooled to
+        a temporary file past spool_size.
+
+        Parameters
+        ----------
+        record_type : str
+            Type of the record
+
+        readable : file-like
+            Binary object to read the plaintext from, from its current
+            position to the end. It is not closed.
+
+        plain: dict
+            Plaintext metadata information to attach to the File
+
+        spool_size: int
+            Largest content in bytes encrypted into memory. Optional.
+
+        chunk_size: int
+            Plaintext bytes per chunk, as for write_file. Optional.
+
+        compression: str
+            'raw', 'zlib', 'zstd' or 'auto', as for write_file. Optional.
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+        file_compression.check(compression)
+        ak = self.__own_access_key(str(self.client_id), str(self.client_id), record_type)
+
+        if readable.seekable():
+            start = readable.tell()
+            plaintext_size = readable.seek(0, io.SEEK_END) - start
+            readable.seek(start)
+            if compression == file_compression.AUTO:
+                compression, _ = file_compression.choose(readable)
+                readable.seek(start)
+
+            @contextlib.contextmanager
+            def open_plaintext():
+                # every pass starts where the content started
+                readable.seek(start)
+                yield readable
+        else:
+            plaintext_size = None
+            if compression == file_compression.AUTO:
+                # the sample cannot be read again, so it is read first
+                compression, sample = file_compression.choose(readable)
+                readable = file_compression.Prefixed(sample, readable)
+
+            def open_plaintext():
+                return contextlib.nullcontext(readable)
+
+        produce = Crypto.stream_encryptor(open_plaintext, ak, chunk_size, compression)
+        return self.__write_encrypted(record_type, produce, plaintext_size, spool_size, plain, compression)
+
+    def write_bytes(self, record_type, data, plain={}, spool_size=DEFAULT_FILE_SPOOL_SIZE, chunk_size=None, compression='raw'):
+        """
+        Encrypt bytes, and write them to the Server as a file.
+
+        Parameters
+        ----------
+        record_type : str
+            Type of the record
+
+        data : bytes
+            Plaintext content of the file
+
+        plain: dict
+            Plaintext metadata information to attach to the File
+
+        spool_size: int
+            Largest content in bytes encrypted into memory, larger content is
+            encrypted twice while streaming instead. Optional.
+
+        chunk_size: int
+            Plaintext bytes per chunk, as for write_file. Optional.
+
+        compression: str
+            'raw', 'zlib', 'zstd' or 'auto', as for write_file. Optional.
+
         Returns
         -------
         e3db.File
             File metadata information
         """
+        return self.write_file_obj(record_type, io.BytesIO(data), plain, spool_size, chunk_size, compression)
+
+    def __own_access_key(self, writer_id, user_id, record_type):
+        """
+        Private method to get the access key this client encrypts records
+        and files with, creating it if needed. Every path that creates a
+        missing key goes through here.
+
+        Parameters
+        ----------
+        writer_id : str
+            Writer client ID
+
+        user_id : str
+            User client ID
+
+        record_type : str
+            Type of the record
+
+        Returns
+        -------
+        bytes
+            Access Key
+        """
         # Get EAK for this record_type, for my client id
-        ak = self.__get_access_key(str(self.client_id), str(self.client_id), str(self.client_id), record_type)
-        if ak is None:
-            ak = Crypto.random_key()
-            self.__put_access_key(str(self.client_id), str(self.client_id), str(self.client_id), record_type, ak)
+        ak = self.__get_access_key(writer_id, user_id, str(self.client_id), record_type)
+        if ak is not None:
+            return ak
+        # records and files may be written concurrently, make sure only one
+        # new key is stored for a type, or data encrypted with the others is lost
+        with self.__ak_create_lock:
+            ak = self.__get_access_key(writer_id, user_id, str(self.client_id), record_type, for_create=True)
+            if ak is None:
+                ak = Crypto.random_key()
+                self.__put_access_key(writer_id, user_id, str(self.client_id), record_type, ak)
+        return ak
 
-        encrypted_filename, file_checksum, file_size = Crypto.encrypt_file(plaintext_filename, ak)
-        file_compression = 'raw'
+    def __write_encrypted(self, record_type, produce, plaintext_size, spool_size, plain, compression):
+        """
+        Private method to upload a file encrypted by a crypto suite encryptor,
+        without writing the ciphertext to disk unless it must be spooled.
 
-        upload_file = File(file_checksum.decode("utf-8"), file_compression, file_size, self.client_id, self.client_id, record_type, plain=plain)
+        Parameters
+        ----------
+        record_type : str
+            Type of the record
+
+        produce : callable
+            Encryptor from the crypto suite, returning an iterator over the
+            ciphertext for each pass
+
+        plaintext_size : int
+            Size of the plaintext in bytes, or None if produce can only be
+            called once
+
+        spool_size : int
+            Largest plaintext in bytes encrypted into memory
+
+        plain: dict
+            Plaintext metadata information to attach to the File
+
+        compression : str
+            Codec the plaintext was compressed with
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+        if plaintext_size is None or plaintext_size <= spool_size:
+            data, file_checksum, file_size = streams.spool(produce(), spool_size)
+            with data:
+                return self.__upload_file(record_type, data, file_checksum, file_size, plain, compression)
+
+        data = streams.ReplayStream(produce)
+        file_checksum, file_size = data.measure()
+        return self.__upload_file(record_type, data, file_checksum, file_size, plain, compression)
+
+    def __upload_file(self, record_type, data, file_checksum, file_size, plain, compression):
+        """
+        Private method to create a pending file, upload its ciphertext to the
+        signed url, and commit it.
+
+        Parameters
+        ----------
+        record_type : str
+            Type of the record
+
+        data : file or iterable
+            Encrypted file content, sent as the upload body
+
+        file_checksum : str
+            Base64 encoded MD5 checksum of the encrypted file
+
+        file_size : int
+            Size of the encrypted file, in bytes
+
+        plain: dict
+            Plaintext metadata information to attach to the File
+
+        compression : str
+            Codec the plaintext was compressed with
+
+        Returns
+        -------
+        e3db.File
+            File metadata information
+        """
+        upload_file = File(file_checksum, compression, file_size, self.client_id, self.client_id, record_type, plain=plain)
 
         url = self.__get_url("v1", "storage", "files")
-        response = requests.post(url=url, json=upload_file.to_json(), auth=self.e3db_auth)
+        response = self.http_pool.api.post(url=url, json=upload_file.to_json(), auth=self.e3db_auth)
         self.__response_check(response)
         if response.status_code != 202:
             raise APIError("File return status code: {0}, body: {1}".format(response.status_code, response.body))
@@ -1345,25 +2372,29 @@ class Client:
         upload_file.record_id = response_json["id"]
         headers = {
             'Content-Type': 'application/octet-stream',
-            'Content-MD5': upload_file.checksum
+            'Content-MD5': upload_file.checksum,
+            # set explicitly, so streamed bodies are not sent chunked
+            'Content-Length': str(file_size)
         }
 
-        # Read our encrypted file, upload it to E3DB Large Files data storage
-        with open(encrypted_filename, 'rb') as data:
+        try:
             # Don't need e3db_auth, since the file url is a signed url just for this session
-            response = requests.put(url=upload_file.file_url, headers=headers, data=data)
+            response = self.http_pool.storage.put(url=upload_file.file_url, headers=headers, data=data)
 
-        self.__response_check(response)
-        if response.status_code != 200:
-            raise APIError("File upload status code: {0}, body: {1}".format(response.status_code, response.body))
+            self.__response_check(response)
+            if response.status_code != 200:
+                raise APIError("File upload status code: {0}, body: {1}".format(response.status_code, response.body))
+        except BaseException:
+            # such as content that changed while it was streamed, the pending
+            # file can never be committed
+            self.__delete_pending_file(upload_file.record_id)
+            raise
 
         # File is uploaded now to storage endpoint, need to confirm with E3DB server
         # to "COMMIT" the file
         url = self.__get_url("v1", "storage", "files", str(upload_file.record_id))
-        response = requests.patch(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.patch(url=url, auth=self.e3db_auth)
         response_json = response.json()
-        # Delete temporary encrypted file, now it is on the server
-        os.remove(encrypted_filename)
 
         # Construct File Object to be returned to the user
         return File(
@@ -1382,11 +2413,51 @@ class Client:
             plain=response_json['meta']['plain']
         )
 
-    def read_file(self, record_id, destination_filename):
+    def __delete_pending_file(self, record_id):
+        """
+        Private method to delete a pending file whose upload failed, so it is
+        not left behind. Failures are ignored, as the caller raises the error
+        of the upload.
+
+        Parameters
+        ----------
+        record_id : str
+            ID of the pending file record
+
+        Returns
+        -------
+        None
+        """
+        url = self.__get_url("v1", "storage", "records", str(record_id))
+        try:
+            self.http_pool.api.delete(url=url, auth=self.e3db_auth)
+        except requests.exceptions.RequestException:
+            pass
+
+    def read_file(self, record_id, destination_filename, resume=False, max_retries=DOWNLOAD_RETRIES, max_connections=1):
         """
         Retrieve an Encrypted file from the server based on record_id.
         Decrypt the file, and store the plaintext file in destination_filename.
 
+        If the connection breaks, the download continues from where it broke
+        with an HTTP Range request, against a freshly fetched file_url, up to
+        max_retries times.
+
+        With resume, the ciphertext is downloaded to
+        destination_filename + ".part" first, and the bytes received are
+        checkpointed to destination_filename + ".part.json" as it arrives.
+        If the download fails, or the process stops, calling read_file again
+        with resume continues from the last checkpoint instead of the start.
+        Both files are removed once the file is decrypted, or if it fails
+        verification.
+
+        With max_connections above 1, the ciphertext is downloaded to
+        destination_filename + ".part" as that many concurrent HTTP Range
+        requests, each writing its own segment of the file, and decrypted once
+        complete. A single connection is often limited well below the
+        bandwidth of the link for large files. The file storage must support
+        Range requests.
+
         Parameters
         ----------
         record_id : str
@@ -1395,18 +2466,176 @@ class Client:
         destination_filename: str
             Filename string, including path, to store the plaintext file at.
 
+        resume: bool
+            Whether to keep a checkpoint the download can resume from in a
+            later call. Optional.
+
+        max_retries: int
+            Times a broken download is resumed within this call. Optional.
+
+        max_connections: int
+            Concurrent connections downloading the file. Optional.
+
         Returns
         -------
         e3db.File
             File metadata information
         """
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1. Given: {0}".format(max_connections))
 
         # Check if destination file can be written to
         destination_file_handle = open(destination_filename, 'w+')
         destination_file_handle.close()
 
+        get_file_info, ak = self.__get_file(record_id)
+
+        if resume or max_connections > 1:
+            try:
+                self.__download_part(get_file_info, destination_filename + ".part", max_retries, max_connections, resume)
+            except BaseException:
+                # remove the empty destination created above
+                os.remove(destination_filename)
+                raise
+            self.__decrypt_part(get_file_info, ak, destination_filename + ".part", destination_filename, resume)
+            return get_file_info
+
+        # Stream the download through decryption, so plaintext is written as
+        # blocks arrive and the ciphertext is never stored
+        try:
+            with self.__open_download(get_file_info, ak, max_retries) as reader, open(destination_filename, 'wb') as destination_file_handle:
+                shutil.copyfileobj(reader, destination_file_handle, self.FILE_CHUNK_SIZE)
+        except BaseException:
+            # remove partial plaintext, which failed verification
+            if os.path.exists(destination_filename):
+                os.remove(destination_filename)
+            raise
+        return get_file_info
+
+    def open_file(self, record_id, max_retries=DOWNLOAD_RETRIES):
+        """
+        Retrieve an Encrypted file from the server based on record_id, as a
+        readable stream of its plaintext.
+
+        The file is downloaded and decrypted as the stream is read, so memory
+        use is bounded by FILE_CHUNK_SIZE, and nothing is written to disk.
+        Plaintext is authenticated block by block as it is read. The checksum
+        of the whole file is verified when the end is reached, and the read
+        reaching it raises e3db.CryptoError on a mismatch. The stream should
+        be closed, or used as a context manager, to release the connection.
+
+        with client.open_file(record_id) as f:
+            for line in f:
+                ...
+
+        Parameters
+        ----------
+        record_id : str
+            ID of the record to retrieve
+
+        max_retries: int
+            Times a broken download is resumed, as for read_file. Optional.
+
+        Returns
+        -------
+        e3db.streams.DecryptingReader
+            Binary readable stream, with the e3db.File metadata as file_info
+        """
+        file_info, ak = self.__get_file(record_id)
+        return self.__open_download(file_info, ak, max_retries)
+
+    def read_file_range(self, record_id, offset, length, max_workers=None):
+        """
+        Retrieve part of the plaintext of an Encrypted file from the server
+        based on record_id.
+
+        For files written with a chunk_size, only the chunks holding the range
+        are downloaded, with an HTTP Range request, and they are decrypted in
+        parallel. Each chunk is authenticated on its own, including its
+        position and whether it is the last one, but the checksum of the
+        whole file is not checked. Other files, and compressed files, must be
+        downloaded and decrypted from the start up to the end of the range.
+
+        Parameters
+        ----------
+        record_id : str
+            ID of the record to retrieve
+
+        offset : int
+            Position in the plaintext of the first byte to read
+
+        length : int
+            Number of bytes to read. Fewer are returned if the file ends
+            first.
+
+        max_workers : int
+            Number of threads decrypting chunks. Defaults to the number of
+            processors. Optional.
+
+        Returns
+        -------
+        bytes
+            Plaintext of the range
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must not be negative. Given: {0}, {1}".format(offset, length))
+        file_info, ak = self.__get_file(record_id)
+        head = b''
+        if file_info.compression == file_compression.RAW:
+            head = self.__download_range(file_info, 0, min(chunked_file.MAX_HEADER_LENGTH, file_info.size))
+        if file_info.compression != file_compression.RAW or chunked_file.file_version(head) != chunked_file.CHUNKED_FILE_VERSION:
+            # a single stream can only be decrypted from its start
+            with self.__open_download(file_info, ak) as reader:
+                while offset > 0:
+                    skipped = len(reader.read(min(offset, self.FILE_CHUNK_SIZE)))
+                    if skipped == 0:
+                        return b''
+                    offset -= skipped
+                return reader.read(length)
+
+        header = chunked_file.ChunkedHeader.parse(Crypto, ak, head)
+        end = min(offset + length, header.plaintext_size(Crypto, file_info.size))
+        if end <= offset:
+            return b''
+        first = offset // header.chunk_size
+        last = (end - 1) // header.chunk_size
+        final = header.chunk_count(Crypto, file_info.size) - 1
+        start_byte = header.chunk_offset(Crypto, first)
+        ciphertext = memoryview(self.__download_range(file_info, start_byte, min(header.chunk_offset(Crypto, last + 1), file_info.size)))
+        encrypted_chunk_size = header.encrypted_chunk_size(Crypto)
+
+        def decrypt(index):
+            start = (index - first) * encrypted_chunk_size
+            return header.decrypt_chunk(Crypto, index, ciphertext[start:start + encrypted_chunk_size], index == final)
+
+        indexes = range(first, last + 1)
+        if len(indexes) == 1 or max_workers == 1:
+            plaintext = b''.join(map(decrypt, indexes))
+        else:
+            # the AEAD ciphers release the GIL, so chunks decrypt on all cores
+            with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+                plaintext = b''.join(executor.map(decrypt, indexes))
+        skip = offset - first * header.chunk_size
+        return plaintext[skip:skip + end - offset]
+
+    def __get_file(self, record_id):
+        """
+        Private method to retrieve the metadata of a file, and the access key
+        to decrypt it.
+
+        Parameters
+        ----------
+        record_id : str
+            ID of the record to retrieve
+
+        Returns
+        -------
+        tuple(e3db.File, bytes)
+            File metadata information, and Access Key
+        """
+
         url = self.__get_url("v1", "storage", "files", str(record_id))
-        response = requests.get(url=url, auth=self.e3db_auth)
+        response = self.http_pool.api.get(url=url, auth=self.e3db_auth)
         self.__response_check(response)
         if response.status_code != 200:
             raise APIError("File fetch status code: {0}, body: {1}".format(response.status_code, response.body))
@@ -1435,36 +2664,343 @@ class Client:
 
         if ak is None:
             raise APIError("Can't read records of type {0}".format(get_file_info.record_type))
+        return get_file_info, ak
 
-        # Download the file from the storage server, store encrypted on filesystem
-        # until we decrypt it in the next steps
-        # Uses efficient copy from storage server to filesystem courtesy of:
-        # https://stackoverflow.com/a/39217788
-        encrypted_filename = tempfile.NamedTemporaryFile(prefix="enc",suffix=".bin", delete=False).name
-        with requests.get(url=get_file_info.file_url, stream=True) as r:
-            with open(encrypted_filename, 'wb+') as f:
-                shutil.copyfileobj(r.raw, f)
-
-        # Now we have the file locally, but it is still encrypted. We will now
-        # decrypt the file with our AK retrieved earlier
-        Crypto.decrypt_file(encrypted_filename, destination_filename, ak)
-        # Delete temporary encrypted file
-        os.remove(encrypted_filename)
-        return File(
-            response_json['meta']['file_meta']['checksum'],
-            response_json['meta']['file_meta']['compression'],
-            response_json['meta']['file_meta']['size'],
-            response_json['meta']['writer_id'],
-            response_json['meta']['user_id'],
-            response_json['meta']['type'],
-            file_url=response_json['meta']['file_meta']['file_url'],
-            file_name=response_json['meta']['file_meta']['file_name'],
-            record_id=response_json['meta']['record_id'],
-            created=response_json['meta']['created'],
-            last_modified=response_json['meta']['last_modified'],
-            version=response_json['meta']['version'],
-            plain=response_json['meta']['plain']
-        )
+    def __download_range(self, file_info, start, end):
+        """
+        Private method to download part of an encrypted file.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata, with the file_url to download from
+
+        start : int
+            Offset of the first byte
+
+        end : int
+            Offset past the last byte
+
+        Returns
+        -------
+        bytes
+            Ciphertext from start to end, shorter only if the file is
+        """
+        if end <= start:
+            return b''
+        headers = {'Range': 'bytes={0}-{1}'.format(start, end - 1)}
+        r = self.http_pool.storage.get(url=file_info.file_url, headers=headers)
+        if r.status_code == 206:
+            return r.content
+        if r.status_code == 200:
+            # the server ignored the range and sent the whole file
+            return r.content[start:end]
+        raise APIError("File download status code: {0}".format(r.status_code))
+
+    def __open_download(self, file_info, ak, max_retries=0):
+        """
+        Private method to start downloading an encrypted file, as a stream
+        decrypting it as it arrives.
+
+        The MD5 checksum of the ciphertext is computed while downloading and
+        compared to the checksum recorded at upload.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata, with the file_url to download from
+
+        ak : bytes
+            Access Key for the record type of the file
+
+        max_retries : int
+            Times a broken download is resumed
+
+        Returns
+        -------
+        e3db.streams.DecryptingReader
+            Plaintext of the file
+        """
+        chunks = self.__download_chunks(file_info, 0, max_retries)
+        # fail before reading anything if the download cannot start
+        first = next(chunks, b'')
+        return streams.DecryptingReader(itertools.chain([first], chunks), Crypto.file_decryptor(ak, file_info.compression),
+                                        checksum=file_info.checksum, on_close=chunks.close, file_info=file_info)
+
+    def __request_download(self, file_info, offset, end):
+        """
+        Private method to request a range of the ciphertext of a file.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata, with the file_url to download from
+
+        offset : int
+            Offset of the first byte to download
+
+        end : int
+            Offset after the last byte to download
+
+        Returns
+        -------
+        requests.Response
+            Streamed response
+        """
+        ranged = offset > 0 or end < file_info.size
+        headers = {'Range': 'bytes={0}-{1}'.format(offset, end - 1)} if ranged else None
+        r = self.http_pool.storage.get(url=file_info.file_url, headers=headers, stream=True)
+        try:
+            if r.status_code != (206 if ranged else 200):
+                raise APIError("File download status code: {0}".format(r.status_code))
+            # fail before downloading anything if the length is already wrong
+            content_length = r.headers.get('Content-Length')
+            if content_length is not None and int(content_length) != end - offset:
+                raise CryptoError("Encrypted file range is {0} bytes, expected {1}".format(content_length, end - offset))
+        except BaseException:
+            r.close()
+            raise
+        return r
+
+    def __download_chunks(self, file_info, offset, max_retries, end=None):
+        """
+        Private generator of a range of the ciphertext of a file, resuming
+        the download where it broke with a Range request against a freshly
+        fetched file_url, as the signed url may have expired.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata, with the file_url to download from
+
+        offset : int
+            Offset of the first byte to download
+
+        max_retries : int
+            Times a broken download is resumed
+
+        end : int
+            Offset after the last byte to download, the end of the file by
+            default
+
+        Returns
+        -------
+        iterator<bytes>
+            Ciphertext from offset to end
+        """
+        if end is None:
+            end = file_info.size
+        retries = 0
+        while True:
+            try:
+                with contextlib.closing(self.__request_download(file_info, offset, end)) as r:
+                    for chunk in r.iter_content(chunk_size=self.FILE_CHUNK_SIZE):
+                        offset += len(chunk)
+                        yield chunk
+                if offset != end:
+                    raise requests.exceptions.ChunkedEncodingError("Download ended at {0} of {1} bytes".format(offset, end))
+                return
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout):
+                if retries >= max_retries:
+                    raise
+                retries += 1
+                fresh_file_info, _ = self.__get_file(file_info.record_id)
+                if fresh_file_info.checksum != file_info.checksum or fresh_file_info.size != file_info.size:
+                    raise CryptoError("File {0} changed while it was downloaded".format(file_info.record_id))
+                file_info.file_url = fresh_file_info.file_url
+
+    def __download_part(self, file_info, part_filename, max_retries, max_connections, resume):
+        """
+        Private method to download the ciphertext of a file to part_filename,
+        as up to max_connections concurrent segments.
+
+        The file is preallocated, sparse where the filesystem allows, so each
+        segment is written in place. With resume, the checkpoint
+        part_filename + ".json" records the range of each segment still to
+        download, and a download with a checkpoint for the file continues
+        from it. Ranges are only recorded as received after they are synced
+        to disk, so a checkpoint never counts bytes that were lost.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata, with the file_url to download from
+
+        part_filename : str
+            Filename to download the ciphertext to
+
+        max_retries : int
+            Times a broken download of a segment is resumed within this call
+
+        max_connections : int
+            Concurrent connections downloading the file
+
+        resume : bool
+            Whether to continue from, and keep, a checkpoint
+
+        Returns
+        -------
+        None
+        """
+        checkpoint_filename = part_filename + ".json"
+        segments = self.__load_checkpoint(file_info, part_filename, checkpoint_filename) if resume else None
+        if segments is None:
+            with open(part_filename, 'wb') as part_file_handle:
+                part_file_handle.truncate(file_info.size)
+            segment_size = max(-(-file_info.size // max_connections), self.MIN_DOWNLOAD_SEGMENT)
+            segments = [[start, min(start + segment_size, file_info.size)] for start in range(0, file_info.size, segment_size)]
+        lock = threading.Lock()
+
+        def sync(part_file_handle, index, offset):
+            if not resume:
+                return
+            part_file_handle.flush()
+            os.fsync(part_file_handle.fileno())
+            with lock:
+                segments[index][0] = offset
+                self.__save_checkpoint(file_info, segments, checkpoint_filename)
+
+        def download_segment(index):
+            offset, end = segments[index]
+            with open(part_filename, 'r+b') as part_file_handle:
+                part_file_handle.seek(offset)
+                synced = offset
+                try:
+                    for chunk in self.__download_chunks(file_info, offset, max_retries, end):
+                        part_file_handle.write(chunk)
+                        offset += len(chunk)
+                        if offset - synced >= self.CHECKPOINT_INTERVAL:
+                            sync(part_file_handle, index, offset)
+                            synced = offset
+                finally:
+                    sync(part_file_handle, index, offset)
+
+        pending = [index for index, (offset, end) in enumerate(segments) if offset < end]
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_connections, len(pending)))) as executor:
+                for _ in executor.map(download_segment, pending):
+                    pass
+        except BaseException:
+            if not resume:
+                os.remove(part_filename)
+            raise
+
+    @staticmethod
+    def __load_checkpoint(file_info, part_filename, checkpoint_filename):
+        """
+        Private method to get the ranges of a file still to download after
+        an earlier resumable download.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata
+
+        part_filename : str
+            Filename the ciphertext is downloaded to
+
+        checkpoint_filename : str
+            Filename of the checkpoint
+
+        Returns
+        -------
+        list<list<int>>
+            Start and end offsets of each segment still to download, or None
+            if there is no checkpoint for this file
+        """
+        try:
+            with open(checkpoint_filename) as checkpoint_file_handle:
+                checkpoint = json.load(checkpoint_file_handle)
+            # the checkpoint must be for this version of this file
+            if [checkpoint['record_id'], checkpoint['checksum'], checkpoint['size']] != [str(file_info.record_id), file_info.checksum, file_info.size]:
+                return None
+            if os.path.getsize(part_filename) != file_info.size:
+                return None
+            segments = [[int(offset), int(end)] for offset, end in checkpoint['segments']]
+            if not all(0 <= offset <= end <= file_info.size for offset, end in segments):
+                return None
+            return segments
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def __save_checkpoint(file_info, segments, checkpoint_filename):
+        """
+        Private method to record the ranges of a file still to download.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata
+
+        segments : list<list<int>>
+            Start and end offsets of each segment still to download
+
+        checkpoint_filename : str
+            Filename of the checkpoint
+
+        Returns
+        -------
+        None
+        """
+        checkpoint = {
+            'record_id': str(file_info.record_id),
+            'checksum': file_info.checksum,
+            'size': file_info.size,
+            'segments': segments
+        }
+        # replace the checkpoint whole, so a crash never leaves half of one
+        with open(checkpoint_filename + ".tmp", 'w') as checkpoint_file_handle:
+            json.dump(checkpoint, checkpoint_file_handle)
+        os.replace(checkpoint_filename + ".tmp", checkpoint_filename)
+
+    def __decrypt_part(self, file_info, ak, part_filename, destination_filename, resume):
+        """
+        Private method to decrypt a downloaded file, verifying its checksum,
+        and remove the ciphertext and any checkpoint.
+
+        Parameters
+        ----------
+        file_info : e3db.File
+            File metadata
+
+        ak : bytes
+            Access Key for the record type of the file
+
+        part_filename : str
+            Filename of the downloaded ciphertext
+
+        destination_filename : str
+            Filename to store the plaintext at
+
+        resume : bool
+            Whether to keep the ciphertext if decryption is interrupted
+
+        Returns
+        -------
+        None
+        """
+        try:
+            with open(part_filename, 'rb') as part_file_handle:
+                reader = streams.DecryptingReader(streams.file_views(part_file_handle, self.FILE_CHUNK_SIZE),
+                                                  Crypto.file_decryptor(ak, file_info.compression), checksum=file_info.checksum)
+                with reader, open(destination_filename, 'wb') as destination_file_handle:
+                    shutil.copyfileobj(reader, destination_file_handle, self.FILE_CHUNK_SIZE)
+        except BaseException as e:
+            if os.path.exists(destination_filename):
+                os.remove(destination_filename)
+            # a file failing verification cannot be resumed, start over
+            if resume and not isinstance(e, CryptoError):
+                raise
+            self.__remove_part(part_filename)
+            raise
+        self.__remove_part(part_filename)
+
+    @staticmethod
+    def __remove_part(part_filename):
+        for filename in [part_filename, part_filename + ".json"]:
+            if os.path.exists(filename):
+                os.remove(filename)
 
     def write_note(self, data: dict, recipient_encryption_key: str, recipient_signing_key: str, options: NoteOptions):
         """
@@ -1490,8 +3026,7 @@ class Client:
             Decrypted E3DB note
         """
  
-        url = self.__get_url("v2", "storage", "notes")
-        return Client.write_anonymous_note(data, recipient_encryption_key, recipient_signing_key, self.encryption_keys, self.signing_keys, options, self.api_url) 
+        return Client.write_anonymous_note(data, recipient_encryption_key, recipient_signing_key, self.encryption_keys, self.signing_keys, options, self.api_url, self.http_pool)
 
     @staticmethod
     def write_anonymous_note(data: dict,
@@ -1500,7 +3035,8 @@ class Client:
                             encryption_key_pair: EncryptionKeyPair,
                             signing_key_pair: SigningKeyPair,
                             options: NoteOptions,
-                            api_url: str = DEFAULT_API_URL):
+                            api_url: str = DEFAULT_API_URL,
+                            http_pool: HTTPPool = None):
         """ 
         A static method to create a note without an instatiated client
         The Client class methods to write notes are a convenient wrapper on this method to pass
@@ -1518,16 +3054,25 @@ class Client:
 
 
         options : types.NoteOptions
-      
+
+        api_url: str
+            Defaults to "https://api.e3db.com"
+
+        http_pool : e3db.HTTPPool
+            Connection pool to send requests over. Defaults to the shared
+            pool. Optional.
+
         Returns
         -------
         e3db.Note
             Decrypted E3DB note
         """
+        if http_pool is None:
+            http_pool = HTTPPool.default()
         url = f"{api_url}/v2/storage/notes"
         encrypted_note = Client.create_encrypted_note(data, recipient_encryption_key, recipient_signing_key, encryption_key_pair, signing_key_pair, options)
         auth = E3DBTSV1Auth(signing_key_pair.private_key, options.note_writer_client_id)
-        response = requests.post(url, json=encrypted_note.to_json(), auth=auth)
+        response = http_pool.api.post(url, json=encrypted_note.to_json(), auth=auth)
         Client.__response_check(response)
         response_note = Note.decode(response.json())
         # reattach unencrypted data for user convenience
@@ -1563,7 +3108,8 @@ class Client:
                                                 auth_params,
                                                 auth_headers,
                                                 self.api_url,
-                                                self.client_id)
+                                                self.client_id,
+                                                self.http_pool)
 
 
     @staticmethod
@@ -1573,7 +3119,8 @@ class Client:
                                     auth_params: dict={},
                                     auth_headers: dict={},
                                     api_url: str=DEFAULT_API_URL,
-                                    client_id: str="") -> Note:
+                                    client_id: str="",
+                                    http_pool: HTTPPool=None) -> Note:
         """
         Anonymously read a note by Id
         
@@ -1598,6 +3145,10 @@ class Client:
         client_id: str
             Defaults to the empty string.
 
+        http_pool : e3db.HTTPPool
+            Connection pool to send requests over. Defaults to the shared
+            pool. Optional.
+
         Returns
         -------
         e3db.Note
@@ -1607,8 +3158,10 @@ class Client:
         auth_params['note_id'] = note_id
         url = f"{api_url}/v2/storage/notes"
 
+        if http_pool is None:
+            http_pool = HTTPPool.default()
         auth = E3DBTSV1Auth(private_signing_key, client_id)
-        response = requests.get(url=url, auth=auth, params=auth_params, headers=auth_headers)
+        response = http_pool.api.get(url=url, auth=auth, params=auth_params, headers=auth_headers)
         Client.__response_check(response)
         note = Note.decode(response.json())
         decrypted_note = Client.decrypt_note(note, private_encryption_key)
@@ -1642,7 +3195,8 @@ class Client:
                                                 auth_params,
                                                 auth_headers,
                                                 self.api_url,
-                                                self.client_id) 
+                                                self.client_id,
+                                                self.http_pool) 
 
     @staticmethod
     def read_anonymous_note_by_name(name: str,
@@ -1651,7 +3205,8 @@ class Client:
                                     auth_params: dict={},
                                     auth_headers: dict={},
                                     api_url: str=DEFAULT_API_URL,
-                                    client_id: str="") -> Note:
+                                    client_id: str="",
+                                    http_pool: HTTPPool=None) -> Note:
         """
         Anonymously read a note by name. In the NoteOptions class the note name is
         somewhat confusingly labled id_string, which can easily be confused with note_id.
@@ -1680,6 +3235,10 @@ class Client:
         client_id: str
             Defaults to the empty string.
 
+        http_pool : e3db.HTTPPool
+            Connection pool to send requests over. Defaults to the shared
+            pool. Optional.
+
         Returns
         -------
         e3db.Note
@@ -1689,8 +3248,10 @@ class Client:
         auth_params['id_string'] = name
         url = f"{api_url}/v2/storage/notes"
 
+        if http_pool is None:
+            http_pool = HTTPPool.default()
         auth = E3DBTSV1Auth(private_signing_key, client_id)
-        response = requests.get(url=url, auth=auth, params=auth_params, headers=auth_headers)
+        response = http_pool.api.get(url=url, auth=auth, params=auth_params, headers=auth_headers)
         Client.__response_check(response)
         note = Note.decode(response.json())
         decrypted_note = Client.decrypt_note(note, private_encryption_key)
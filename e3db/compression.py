@@ -0,0 +1,321 @@
+import contextlib
+import zlib
+from .exceptions import CryptoError
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codecs recorded in the compression of a file. Files are compressed before
+# they are encrypted, as ciphertext does not compress.
+RAW = 'raw'
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+# Not a codec, asks for one to be chosen from the start of the plaintext
+AUTO = 'auto'
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+# Plaintext compressed to decide whether AUTO compresses a file
+AUTO_SAMPLE_SIZE = 256 * 1024
+# AUTO compresses when the sample shrinks to at most this fraction
+AUTO_MAX_RATIO = 0.9
+# Size of the reads from the plaintext while compressing
+READ_SIZE = 64 * 1024
+# Most plaintext a decompressing decryptor returns at once, however far the
+# content expands. The rest is held back until asked for with more.
+MAX_OUTPUT_SIZE = 1024 * 1024
+# Compressed bytes given to zstd at once. A zstd block of a few bytes expands
+# to at most 128KiB, so one feed produces at most a few MiB.
+ZSTD_FEED_SIZE = 128
+
+
+def check(codec):
+    """
+    Check a compression can be used to write files.
+
+    Parameters
+    ----------
+    codec : str
+        One of RAW, ZLIB, ZSTD or AUTO
+
+    Returns
+    -------
+    None
+    """
+    if codec not in (RAW, ZLIB, ZSTD, AUTO):
+        raise ValueError("Unsupported file compression: {0}".format(codec))
+    if codec == ZSTD and zstandard is None:
+        raise ImportError("zstd file compression requires zstandard. Install it with: pip install e3db[zstd]")
+
+
+def choose(readable):
+    """
+    Choose a codec for a file by compressing the start of its plaintext.
+
+    ZSTD is chosen when it is installed, and ZLIB otherwise, unless the
+    sample hardly compresses, such as for media or archives, when RAW is.
+
+    Parameters
+    ----------
+    readable : file-like
+        Binary object positioned at the start of the plaintext. The sample
+        is read from it.
+
+    Returns
+    -------
+    tuple(str, bytes)
+        Codec, and the sample read
+    """
+    sample = b''
+    while len(sample) < AUTO_SAMPLE_SIZE:
+        more = readable.read(AUTO_SAMPLE_SIZE - len(sample))
+        if not more:
+            break
+        sample += more
+    if not sample or len(zlib.compress(sample, 1)) > len(sample) * AUTO_MAX_RATIO:
+        return RAW, sample
+    return (ZSTD if zstandard is not None else ZLIB), sample
+
+
+def choose_file(filename):
+    """
+    Choose a codec for a file by compressing the start of it. See choose.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the plaintext
+
+    Returns
+    -------
+    str
+        Codec
+    """
+    with open(filename, 'rb') as readable:
+        codec, _ = choose(readable)
+    return codec
+
+
+class Prefixed(object):
+    """
+    Readable of bytes already read from a stream, followed by the rest of
+    the stream, for streams that cannot seek back.
+    """
+
+    def __init__(self, prefix, readable):
+        self.__prefix = prefix
+        self.__readable = readable
+
+    def read(self, size=-1):
+        if not self.__prefix:
+            return self.__readable.read(size)
+        if size is None or size < 0:
+            data, self.__prefix = self.__prefix + self.__readable.read(), b''
+            return data
+        data, self.__prefix = self.__prefix[:size], self.__prefix[size:]
+        return data
+
+
+def _compressor(codec):
+    if codec == ZLIB:
+        return zlib.compressobj(ZLIB_LEVEL)
+    check(codec)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+
+def _decompressor(codec):
+    if codec == ZLIB:
+        return zlib.decompressobj()
+    if codec != ZSTD:
+        raise CryptoError("Unsupported file compression: {0}".format(codec))
+    check(codec)
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+class CompressingReader(object):
+    """
+    Readable of the compressed content of a plaintext readable.
+    """
+
+    def __init__(self, readable, codec):
+        self.__readable = readable
+        self.__compressor = _compressor(codec)
+        self.__pending = bytearray()
+        self.__eof = False
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        while not self.__eof and (size < 0 or len(self.__pending) < size):
+            data = self.__readable.read(READ_SIZE)
+            if data:
+                self.__pending += self.__compressor.compress(data)
+            else:
+                self.__pending += self.__compressor.flush()
+                self.__eof = True
+        if size < 0:
+            size = len(self.__pending)
+        data = bytes(self.__pending[:size])
+        del self.__pending[:size]
+        return data
+
+
+def compressing(open_plaintext, codec):
+    """
+    Wrap a plaintext opener of a crypto suite encryptor to compress the
+    plaintext. Compression is deterministic, so every pass of the encryptor
+    still produces the same bytes.
+
+    Parameters
+    ----------
+    open_plaintext : callable
+        Returns a context manager giving a binary readable of the plaintext
+
+    codec : str
+        One of RAW, ZLIB or ZSTD
+
+    Returns
+    -------
+    callable
+        Returns a context manager giving a binary readable of the compressed
+        plaintext
+    """
+    if codec == RAW:
+        return open_plaintext
+    check(codec)
+
+    @contextlib.contextmanager
+    def open_compressed():
+        with open_plaintext() as readable:
+            yield CompressingReader(readable, codec)
+
+    return open_compressed
+
+
+class DecompressingDecryptor(object):
+    """
+    File decryptor of a crypto suite, with its plaintext decompressed.
+
+    Content can expand without limit, so update and finish return at most
+    max_output bytes of plaintext, and hold back the compressed rest. It is
+    returned by further calls of more, until more returns no plaintext.
+    """
+
+    def __init__(self, decryptor, codec, max_output=MAX_OUTPUT_SIZE):
+        self.__decryptor = decryptor
+        self.__codec = codec
+        self.__decompressor = _decompressor(codec)
+        self.__max_output = max_output
+        # compressed plaintext not yet given to the decompressor
+        self.__input = b''
+        # zlib may hold output back when it fills max_output
+        self.__held = False
+        # zstd output beyond max_output, from the last feed
+        self.__output = bytearray()
+        self.__finished = False
+
+    @property
+    def done(self):
+        return self.__decryptor.done
+
+    def update(self, data):
+        self.__input += self.__decryptor.update(data)
+        return self.more()
+
+    def finish(self):
+        self.__input += self.__decryptor.finish()
+        self.__finished = True
+        return self.more()
+
+    def more(self):
+        """
+        Return plaintext held back by previous calls, at most max_output
+        bytes. No plaintext is returned once all of it was, and after finish
+        the content is then checked to be complete.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bytes
+            Plaintext
+        """
+        try:
+            if self.__codec == ZLIB:
+                self.__inflate()
+            else:
+                self.__feed()
+        except Exception as e:
+            raise CryptoError("Compressed file content is invalid: {0}".format(e))
+        plaintext = bytes(self.__output[:self.__max_output])
+        del self.__output[:self.__max_output]
+        if not plaintext and self.__finished and not getattr(self.__decompressor, 'eof', True):
+            raise CryptoError("Compressed file content ended early")
+        return plaintext
+
+    def __inflate(self):
+        while len(self.__output) < self.__max_output and (self.__input or self.__held) and not self.__decompressor.eof:
+            wanted = self.__max_output - len(self.__output)
+            plaintext = self.__decompressor.decompress(self.__input, wanted)
+            self.__input = self.__decompressor.unconsumed_tail
+            self.__held = len(plaintext) == wanted
+            self.__output += plaintext
+
+    def __feed(self):
+        view = memoryview(self.__input)
+        fed = 0
+        while len(self.__output) < self.__max_output and fed < len(view):
+            self.__output += self.__decompressor.decompress(view[fed:fed + ZSTD_FEED_SIZE])
+            fed += ZSTD_FEED_SIZE
+        self.__input = self.__input[fed:]
+
+
+def drain(decryptor, plaintext):
+    """
+    Iterate over plaintext returned by update or finish of a file decryptor,
+    followed by any the decryptor held back.
+
+    Parameters
+    ----------
+    decryptor : object
+        File decryptor, with update and finish
+
+    plaintext : bytes
+        Returned by update or finish
+
+    Returns
+    -------
+    iterator<bytes>
+        Plaintext, in pieces of at most MAX_OUTPUT_SIZE bytes for
+        decompressing decryptors
+    """
+    more = getattr(decryptor, 'more', None)
+    while plaintext:
+        yield plaintext
+        plaintext = more() if more is not None else b''
+
+
+def decompressing(decryptor, codec):
+    """
+    Wrap a file decryptor of a crypto suite to decompress its plaintext.
+
+    Parameters
+    ----------
+    decryptor : object
+        File decryptor, with update and finish
+
+    codec : str
+        Compression recorded for the file
+
+    Returns
+    -------
+    object
+        File decryptor, with update and finish, and more when it holds
+        plaintext back. See drain.
+    """
+    if codec == RAW:
+        return decryptor
+    return DecompressingDecryptor(decryptor, codec)
@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+from . import record_crypto
+
+
+class CryptoExecutor(object):
+    """
+    Worker pool that encrypts and decrypts record fields in parallel.
+
+    Work is split into chunks of fields, so both many small records and one
+    record with many fields are spread across workers. Calls with fewer than
+    `threshold` fields run inline on the calling thread, since dispatching
+    them would cost more than it saves.
+
+    Worker threads help when field values are large, as the underlying
+    crypto libraries release the GIL while encrypting. Worker processes also
+    parallelize the per-field Python overhead of small values.
+    """
+    DEFAULT_THRESHOLD = 256
+
+    def __init__(self, max_workers=None, use_processes=False, threshold=DEFAULT_THRESHOLD):
+        """
+        Initialize the CryptoExecutor class.
+
+        Parameters
+        ----------
+        max_workers : int
+            Number of workers. Defaults to the number of CPUs. Optional.
+
+        use_processes : bool
+            Whether to use worker processes instead of threads. Optional.
+
+        threshold : int
+            Smallest number of fields sent to the workers. Optional.
+
+        Returns
+        -------
+        None
+        """
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.threshold = threshold
+        if use_processes:
+            self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def __chunks(self, records, field_count):
+        """
+        Private method to split records into chunks of about equal numbers of
+        fields, splitting single records when needed.
+
+        Parameters
+        ----------
+        records : list<tuple(object, dict)>
+            Context, such as an access key, and data fields of each record
+
+        field_count : int
+            Total number of fields
+
+        Returns
+        -------
+        list<list<tuple(int, object, dict)>>
+            Chunks of (record index, context, partial data fields)
+        """
+        chunk_size = max(1, -(-field_count // self.max_workers))
+        chunks = [[]]
+        room = chunk_size
+        for index, (context, data) in enumerate(records):
+            items = list(data.items())
+            while items:
+                if room == 0:
+                    chunks.append([])
+                    room = chunk_size
+                piece, items = items[:room], items[room:]
+                chunks[-1].append((index, context, dict(piece)))
+                room -= len(piece)
+        return chunks
+
+    def __run(self, records, work):
+        """
+        Private method to run work over chunks of records and merge results
+        back per record, in order.
+
+        Parameters
+        ----------
+        records : list<tuple(object, dict)>
+            Context and data fields of each record
+
+        work : callable
+            Called with a list of (context, data), returning a list of dicts.
+            Run on the workers, or inline below the threshold.
+
+        Returns
+        -------
+        list<dict>
+            Result data fields of each record
+        """
+        field_count = sum(len(data) for _, data in records)
+        if field_count < self.threshold:
+            return work(records)
+        futures = []
+        for chunk in self.__chunks(records, field_count):
+            futures.append((chunk, self.__executor.submit(work, [(context, data) for _, context, data in chunk])))
+        results = [{} for _ in records]
+        for chunk, future in futures:
+            for (index, _, _), data in zip(chunk, future.result()):
+                results[index].update(data)
+        return results
+
+    def encrypt(self, ak, records_data):
+        """
+        Encrypt the fields of many records with one access key.
+
+        Parameters
+        ----------
+        ak : bytes
+            Access Key
+
+        records_data : list<dict>
+            Plaintext data fields of each record
+
+        Returns
+        -------
+        list<dict>
+            Data fields in the dotted quad encrypted format, one dict per
+            record
+        """
+        return self.__run([(ak, data) for data in records_data], _encrypt_chunk)
+
+    def decrypt(self, records):
+        """
+        Decrypt the fields of many records.
+
+        Parameters
+        ----------
+        records : list<tuple(bytes, dict)>
+            Access Key and encrypted data fields of each record
+
+        Returns
+        -------
+        list<dict>
+            Plaintext data fields, one dict per record
+        """
+        return self.__run(records, record_crypto.decrypt_records_data)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers.
+
+        Parameters
+        ----------
+        wait : bool
+            Whether to wait for running work to finish. Optional.
+
+        Returns
+        -------
+        None
+        """
+        self.__executor.shutdown(wait=wait)
+
+
+def _encrypt_chunk(records):
+    """
+    Encrypt a chunk of (ak, data) pairs sharing one access key.
+
+    Module level so it can be sent to worker processes.
+    """
+    if not records:
+        return []
+    return record_crypto.encrypt_records_data(records[0][0], [data for _, data in records])
@@ -0,0 +1,235 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HTTPPool:
+    """
+    Pooled, keep-alive HTTP sessions used for every E3DB request.
+
+    Two independent connection pools are maintained: one for the E3DB API
+    host, and one for the signed ``file_url`` storage host used by large file
+    transfers. Reusing connections avoids a new TCP and TLS handshake on every
+    call.
+    """
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 10
+
+    __default = None
+    __default_lock = threading.Lock()
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 storage_pool_connections=None, storage_pool_maxsize=None, keep_alive=True,
+                 pool_block=False, max_retries=0):
+        """
+        Initialize the HTTPPool class.
+
+        Parameters
+        ----------
+        pool_connections : int
+            Number of distinct hosts to keep connection pools for on the API
+            session. Optional.
+
+        pool_maxsize : int
+            Maximum number of connections kept open per API host. Optional.
+
+        storage_pool_connections : int
+            Number of distinct hosts to keep connection pools for on the
+            storage session. Defaults to pool_connections. Optional.
+
+        storage_pool_maxsize : int
+            Maximum number of connections kept open per storage host. Defaults
+            to pool_maxsize. Optional.
+
+        keep_alive : bool
+            Whether connections are kept open between requests. Optional.
+
+        pool_block : bool
+            Whether to block when no free connection is available, instead of
+            opening a connection that is discarded after use. Optional.
+
+        max_retries : int
+            Number of retries on connection failures. Optional.
+
+        Returns
+        -------
+        None
+        """
+        if storage_pool_connections is None:
+            storage_pool_connections = pool_connections
+        if storage_pool_maxsize is None:
+            storage_pool_maxsize = pool_maxsize
+
+        self.keep_alive = keep_alive
+        self.__lock = threading.Lock()
+        self.__request_counts = {'api': 0, 'storage': 0}
+        self.__api_session = self.__build_session('api', pool_connections, pool_maxsize, pool_block, max_retries)
+        self.__storage_session = self.__build_session('storage', storage_pool_connections, storage_pool_maxsize, pool_block, max_retries)
+
+    @classmethod
+    def default(cls):
+        """
+        Get the process wide HTTPPool shared by calls made without a Client,
+        such as anonymous note operations and identity helpers.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        e3db.HTTPPool
+            Shared pool, created on first use.
+        """
+        with cls.__default_lock:
+            if cls.__default is None:
+                cls.__default = cls()
+            return cls.__default
+
+    def __build_session(self, name, pool_connections, pool_maxsize, pool_block, max_retries):
+        """
+        Private method to create a session with a mounted, sized adapter.
+
+        Parameters
+        ----------
+        name : str
+            Name of the pool, used for request counting.
+
+        pool_connections : int
+            Number of host pools to cache.
+
+        pool_maxsize : int
+            Maximum connections per host pool.
+
+        pool_block : bool
+            Whether to block waiting for a free connection.
+
+        max_retries : int
+            Number of retries on connection failures.
+
+        Returns
+        -------
+        requests.Session
+            Configured session
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block, max_retries=max_retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+
+        def count_request(response, *args, **kwargs):
+            with self.__lock:
+                self.__request_counts[name] += 1
+            return response
+
+        session.hooks['response'].append(count_request)
+        return session
+
+    @property
+    def api(self):
+        """
+        Get the session used for requests to the E3DB API.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        requests.Session
+            API session
+        """
+        return self.__api_session
+
+    @property
+    def storage(self):
+        """
+        Get the session used for requests to signed file storage urls.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        requests.Session
+            Storage session
+        """
+        return self.__storage_session
+
+    @staticmethod
+    def __session_stats(session, request_count):
+        """
+        Private method to collect connection statistics for one session.
+
+        Parameters
+        ----------
+        session : requests.Session
+            Session to inspect
+
+        request_count : int
+            Number of responses received on the session
+
+        Returns
+        -------
+        dict
+            Statistics for the session, and for each host pool it holds
+        """
+        hosts = {}
+        adapter = session.get_adapter('https://')
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts["{0}://{1}:{2}".format(key.key_scheme, key.key_host, key.key_port)] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle_connections': pool.pool.qsize() if pool.pool is not None else 0
+            }
+        return {
+            'requests': request_count,
+            'connections_opened': sum(h['connections_opened'] for h in hosts.values()),
+            'hosts': hosts
+        }
+
+    def stats(self):
+        """
+        Get connection pool statistics.
+
+        ``connections_opened`` lower than ``requests`` shows connections being
+        reused.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            Statistics keyed by pool name, 'api' and 'storage'.
+        """
+        with self.__lock:
+            counts = dict(self.__request_counts)
+        return {
+            'api': self.__session_stats(self.__api_session, counts['api']),
+            'storage': self.__session_stats(self.__storage_session, counts['storage'])
+        }
+
+    def close(self):
+        """
+        Close all pooled connections.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.__api_session.close()
+        self.__storage_session.close()
@@ -8,6 +8,7 @@ else:
     from .sodium_crypto import SodiumCrypto as Crypto
 from typing import Tuple
 from e3db.tsv1_auth import E3DBTSV1Auth
+from e3db.http_pool import HTTPPool
 import requests
 import json
 from .exceptions import APIError, UnsupportedAPIResponse
@@ -26,7 +27,7 @@ class Identity:
     
     """
 
-    def __init__(self, config, client_config, agent):
+    def __init__(self, config, client_config, agent, http_pool=None):
         """
         Initialize the Identity class. This constructor should not be called directly.
         Please use the identity_login method instead
@@ -43,13 +44,16 @@ class Identity:
         agent : dict
             A dict that holds OAuth values neccessary for a logged in Identity: access_token, token_type,
             refresh_token, expiry, and refresh_expiry
+
+        http_pool : e3db.HTTPPool
+            Connection pool the storage client sends requests over. Optional.
         """
         self.realm_name = config['realm_name']
         self.realm_domain = config['realm_domain']
         self.app_name = config['app_name']
         self.api_url = config['api_url']
         self.user_id = config['user_id']
-        self.storage_client = Client(client_config)
+        self.storage_client = Client(client_config, http_pool=http_pool)
         self.access_token = agent['access_token']
         self.token_type = agent['token_type']
         self.refresh_token = agent['refresh_token']
@@ -57,7 +61,7 @@ class Identity:
         self.refresh_expiry = agent['refresh_expiry']
 
     @staticmethod
-    def identity_login(user_name: str, password: str, realm_name: str, app_name: str, api_url: str=DEFAULT_API_URL) -> 'Identity':
+    def identity_login(user_name: str, password: str, realm_name: str, app_name: str, api_url: str=DEFAULT_API_URL, http_pool: HTTPPool=None) -> 'Identity':
         """
         A factory method to login an existing user, get the stored identity credentials for a user,
         create a client for them, and return an Identity object.
@@ -83,12 +87,18 @@ class Identity:
         api_url: str
             Defaults to https://api.e3db.com
 
+        http_pool : e3db.HTTPPool
+            Connection pool to send requests over. Defaults to the shared
+            pool. Optional.
+
         Returns
         -------
         Identity
             an instance of the Identity Class
         """
-        realm_info = get_public_realm_info(realm_name, api_url)
+        if http_pool is None:
+            http_pool = HTTPPool.default()
+        realm_info = get_public_realm_info(realm_name, api_url, http_pool)
         realm_name = realm_info['name']
         realm_domain = realm_info['domain']
         note_name, key_pair, signing_key_pair = Identity.derive_note_creds(user_name, password, realm_name)
@@ -96,13 +106,13 @@ class Identity:
         auth = E3DBTSV1Auth(signing_key_pair.private_key)
 
         # PKCE step #1: submit a challenge for this user & Realm
-        redirect = pkce_submit_challenge(user_name, realm_domain, app_name, pkce_challenge, auth, api_url)
+        redirect = pkce_submit_challenge(user_name, realm_domain, app_name, pkce_challenge, auth, api_url, http_pool)
         
         #PKCE step #2, submit public keys to redirect with session params
-        context = pkce_submit_keys(key_pair, signing_key_pair, redirect, auth)    
+        context = pkce_submit_keys(key_pair, signing_key_pair, redirect, auth, http_pool)
 
         # PKCE step #3 make final request for creds using context and verifier
-        credentials = pkce_get_credentials(realm_domain, context, pkce_verifier, auth, api_url)
+        credentials = pkce_get_credentials(realm_domain, context, pkce_verifier, auth, api_url, http_pool)
         access_token = credentials["access_token"]
 
         # Read Id note using our access token 
@@ -110,11 +120,13 @@ class Identity:
                                                     key_pair.private_key,
                                                     signing_key_pair.private_key,
                                                     auth_headers={ TOZID_LOGIN_HEADER : access_token },
-                                                    api_url=api_url)
+                                                    api_url=api_url,
+                                                    http_pool=http_pool)
 
         return Identity(json.loads(stored_creds.data['config']),
                         json.loads(stored_creds.data['storage']),
-                        credentials)
+                        credentials,
+                        http_pool)
 
     @staticmethod
     def derive_note_creds(user_name: str, password: str, realm_name: str) -> Tuple[str, EncryptionKeyPair, SigningKeyPair]:
@@ -186,8 +198,10 @@ def __response_check(response):
     if response.status_code >= 400 and response.status_code <= 600:
         raise APIError("HTTP Error: {0}".format(response.status_code))
 
-def pkce_submit_challenge(user_name, realm_domain, app_name, pkce_challenge, auth, api_url):
+def pkce_submit_challenge(user_name, realm_domain, app_name, pkce_challenge, auth, api_url, http_pool=None):
     """ Uses realm_domain value for realm_name key to avoid case sensitivity discrepencies """
+    if http_pool is None:
+        http_pool = HTTPPool.default()
     url = f"{api_url}/v1/identity/login"
     body = {
         "username" : user_name,
@@ -196,27 +210,31 @@ def pkce_submit_challenge(user_name, realm_domain, app_name, pkce_challenge, aut
         "code_challenge" : pkce_challenge.decode('utf-8'),
         "login_style" : "api"
     }
-    redirect = requests.post(url=url, auth=auth, json=body)
+    redirect = http_pool.api.post(url=url, auth=auth, json=body)
     __response_check(redirect)
     redirect = redirect.json()
     if redirect["type"] != "continue":
         raise UnsupportedAPIResponse(f"Identity Login failure, expected type 'continue' but found {redirect['type']}")
     return redirect
 
-def pkce_submit_keys(key_pair, signing_key_pair, redirect, auth):
+def pkce_submit_keys(key_pair, signing_key_pair, redirect, auth, http_pool=None):
+    if http_pool is None:
+        http_pool = HTTPPool.default()
     data = {
         "public_key": key_pair.public_key,
         "public_signing_key": signing_key_pair.public_key
     }
-    action_request = requests.post(url=redirect["action_url"], auth=auth, data=data)
+    action_request = http_pool.api.post(url=redirect["action_url"], auth=auth, data=data)
     __response_check(action_request)
     action_request = action_request.json()
     if action_request["type"] != "fetch":
         raise UnsupportedAPIResponse(f"Identity Login failure, expected type 'fetch' but found {redirect['type']}")
     return action_request["context"]
 
-def pkce_get_credentials(realm_domain, context, pkce_verifier, auth, api_url):
+def pkce_get_credentials(realm_domain, context, pkce_verifier, auth, api_url, http_pool=None):
     """Using realm_domain for value of realm_name to avoid case sesitive discrepencies"""
+    if http_pool is None:
+        http_pool = HTTPPool.default()
     body = {
         "realm_name": realm_domain,
         "session_code": context["session_code"],
@@ -226,11 +244,11 @@ def pkce_get_credentials(realm_domain, context, pkce_verifier, auth, api_url):
         "auth_session_id": context["auth_session_id"],
         "code_verifier": pkce_verifier.decode('utf-8'),
     }
-    final_response = requests.post(url=f"{api_url}/v1/identity/tozid/redirect", auth=auth, json=body)
+    final_response = http_pool.api.post(url=f"{api_url}/v1/identity/tozid/redirect", auth=auth, json=body)
     __response_check(final_response)
     return final_response.json()
 
-def get_public_realm_info(realm_name: str, api_url=DEFAULT_API_URL) -> dict:
+def get_public_realm_info(realm_name: str, api_url=DEFAULT_API_URL, http_pool: HTTPPool=None) -> dict:
     """
     A public function to return the realm info object for a given realm name.
 
@@ -242,6 +260,9 @@ def get_public_realm_info(realm_name: str, api_url=DEFAULT_API_URL) -> dict:
     api_url : str
         The base url of the Tozny API. Defaults to "https://api.e3db.com"
 
+    http_pool : e3db.HTTPPool
+        Connection pool to send requests over. Defaults to the shared pool.
+
     Returns
     -------
     dict
@@ -249,6 +270,8 @@ def get_public_realm_info(realm_name: str, api_url=DEFAULT_API_URL) -> dict:
         The name is case sensitive. 
 
     """
-    resp = requests.get(url=f'{api_url}/v1/identity/info/realm/{realm_name}')
+    if http_pool is None:
+        http_pool = HTTPPool.default()
+    resp = http_pool.api.get(url=f'{api_url}/v1/identity/info/realm/{realm_name}')
     __response_check(resp)
     return resp.json()
@@ -0,0 +1,330 @@
+import queue
+import threading
+import traceback
+import weakref
+
+
+class _Failure(object):
+    """
+    Error raised on the fetch thread, handed to the consumer to re-raise.
+    """
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+
+def _put(pages, stop, item, poll_interval):
+    """
+    Hand an item to the consumer, waiting for space.
+
+    Parameters
+    ----------
+    pages : queue.Queue
+        Pages waiting for the consumer
+
+    stop : threading.Event
+        Set when the iterator is closed or collected
+
+    item : object
+        Page, end marker, or failure
+
+    poll_interval : float
+        How often to check stop while waiting, in seconds
+
+    Returns
+    -------
+    bool
+        False if the iterator was closed while waiting.
+    """
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=poll_interval)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _run(iterator_ref, pages, stop, poll_interval):
+    """
+    Fetch pages on the fetch thread.
+
+    The thread only holds a weak reference to the iterator between fetches,
+    so an iterator abandoned without close is still collected, which stops
+    the thread.
+
+    Parameters
+    ----------
+    iterator_ref : weakref.ref
+        Reference to the PrefetchIterator
+
+    pages : queue.Queue
+        Pages waiting for the consumer
+
+    stop : threading.Event
+        Set when the iterator is closed or collected
+
+    poll_interval : float
+        How often to check stop while waiting, in seconds
+
+    Returns
+    -------
+    None
+    """
+    iterator = None
+    try:
+        more = True
+        while more and not stop.is_set():
+            iterator = iterator_ref()
+            if iterator is None:
+                return
+            page = iterator._fetch_page()
+            iterator = None
+            more = page[1]
+            if not _put(pages, stop, page, poll_interval):
+                return
+        _put(pages, stop, _DONE, poll_interval)
+    except Exception as e:
+        iterator = None
+        # the traceback must not keep the iterator alive through its frames
+        traceback.clear_frames(e.__traceback__)
+        _put(pages, stop, _Failure(e), poll_interval)
+
+
+class PrefetchIterator(object):
+    """
+    Iterator over the records of a paged E3DB API.
+
+    Pages are fetched on a background thread, up to `prefetch` pages ahead of
+    the consumer, while records of the current page are parsed and decrypted
+    one at a time as they are iterated. At most `prefetch` fetched pages wait
+    in memory at once, so network time overlaps with decryption time without
+    loading a whole result set.
+
+    Progress attributes describe the page being consumed, so `next_token`
+    style attributes can be used to resume iteration later.
+
+    Iterators abandoned without `close` stop their fetch thread once they
+    are garbage collected.
+
+    Subclasses implement `_fetch_page`.
+    """
+    DEFAULT_PREFETCH = 1
+    THREAD_NAME = "e3db-prefetch"
+    # How often a blocked fetch thread checks whether it was closed, in seconds
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, parse_result, prefetch=DEFAULT_PREFETCH):
+        """
+        Initialize the PrefetchIterator class.
+
+        Parameters
+        ----------
+        parse_result : callable
+            Called on the consuming thread with each raw result, returning the
+            e3db.Record to yield.
+
+        prefetch : int
+            Number of fetched pages that may wait ahead of the consumer.
+            Optional.
+
+        Returns
+        -------
+        None
+        """
+        if prefetch < 1:
+            raise ValueError("prefetch must be at least 1. Given: {0}".format(prefetch))
+        self.__parse_result = parse_result
+        self.__pages = queue.Queue(maxsize=prefetch)
+        self.__stop = threading.Event()
+        # stops the fetch thread if the iterator is dropped without close
+        self.__finalizer = weakref.finalize(self, self.__stop.set)
+        self.__thread = None
+        self.__page = []
+        self.__position = 0
+        self.__finished = False
+        self.pages_fetched = 0
+        self.records_returned = 0
+
+    def _fetch_page(self):
+        """
+        Fetch the next page of raw results.
+
+        Called on the fetch thread.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple(list, bool, dict)
+            Raw results of the page, whether more pages may follow, and
+            progress attributes to set once the page is consumed.
+        """
+        raise NotImplementedError()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self.__position >= len(self.__page):
+            if self.__finished:
+                raise StopIteration
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=_run, args=(weakref.ref(self), self.__pages, self.__stop, self.POLL_INTERVAL),
+                                                name=self.THREAD_NAME, daemon=True)
+                self.__thread.start()
+            item = self.__pages.get()
+            if item is _DONE:
+                self.__finished = True
+                self.__page = []
+                raise StopIteration
+            if isinstance(item, _Failure):
+                self.__finished = True
+                self.__page = []
+                raise item.error
+            results, _, progress = item
+            for name, value in progress.items():
+                setattr(self, name, value)
+            self.pages_fetched += 1
+            self.__page = results
+            self.__position = 0
+
+        result = self.__page[self.__position]
+        # drop the raw result as soon as it is consumed
+        self.__page[self.__position] = None
+        self.__position += 1
+        self.records_returned += 1
+        return self.__parse_result(result)
+
+    def close(self):
+        """
+        Stop fetching pages and release buffered results.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.__finished = True
+        self.__finalizer()
+        self.__page = []
+        while True:
+            try:
+                self.__pages.get_nowait()
+            except queue.Empty:
+                break
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SearchIterator(PrefetchIterator):
+    """
+    Iterator over every record matching a v2 search, following next_token.
+
+    Progress is available while iterating through `pages_fetched`,
+    `records_returned`, `total_results` and `next_token`.
+    """
+
+    def __init__(self, search_page, parse_result, query, prefetch=PrefetchIterator.DEFAULT_PREFETCH):
+        """
+        Initialize the SearchIterator class.
+
+        Parameters
+        ----------
+        search_page : callable
+            Called with an e3db.types.Search, returning the json response of
+            the search endpoint.
+
+        parse_result : callable
+            Called with each raw result, returning the e3db.Record to yield.
+
+        query : e3db.types.Search
+            Search to run. Paging starts at its next_token, and the object is
+            advanced as pages are fetched.
+
+        prefetch : int
+            Number of fetched pages that may wait ahead of the consumer.
+            Optional.
+
+        Returns
+        -------
+        None
+        """
+        PrefetchIterator.__init__(self, parse_result, prefetch)
+        self.__search_page = search_page
+        self.query = query
+        self.total_results = None
+        self.next_token = query.next_token
+        self.search_id = None
+
+    def _fetch_page(self):
+        response = self.__search_page(self.query)
+        results = response['results'] or []
+        next_token = response['last_index']
+        self.query.next_token = next_token
+        progress = {
+            'total_results': response['total_results'],
+            'search_id': response['search_id'],
+            'next_token': next_token
+        }
+        return results, (next_token != 0 and len(results) > 0), progress
+
+
+class QueryIterator(PrefetchIterator):
+    """
+    Iterator over every record matching a v1 query, following last_index.
+
+    Progress is available while iterating through `pages_fetched`,
+    `records_returned` and `last_index`.
+    """
+
+    def __init__(self, query_page, parse_result, query, prefetch=PrefetchIterator.DEFAULT_PREFETCH):
+        """
+        Initialize the QueryIterator class.
+
+        Parameters
+        ----------
+        query_page : callable
+            Called with an e3db.types.Query, returning the json response of
+            the query endpoint.
+
+        parse_result : callable
+            Called with each raw result, returning the e3db.Record to yield.
+
+        query : e3db.types.Query
+            Query to run. Paging starts at its after_index, and the object is
+            advanced as pages are fetched.
+
+        prefetch : int
+            Number of fetched pages that may wait ahead of the consumer.
+            Optional.
+
+        Returns
+        -------
+        None
+        """
+        PrefetchIterator.__init__(self, parse_result, prefetch)
+        self.__query_page = query_page
+        self.query = query
+        self.last_index = query.after_index
+
+    def _fetch_page(self):
+        response = self.__query_page(self.query)
+        results = response['results'] or []
+        previous_index = self.query.after_index
+        last_index = response['last_index']
+        self.query.after_index = last_index
+        return results, (len(results) > 0 and last_index != previous_index), {'last_index': last_index}
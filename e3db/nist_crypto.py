@@ -1,4 +1,6 @@
-from .base_crypto import BaseCrypto
+from .base_crypto import BaseCrypto, KeyCache
+from . import chunked_file
+from .compression import compressing, decompressing
 import os
 
 from cryptography.hazmat.backends import default_backend
@@ -8,6 +10,11 @@ from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
+# decoded keys by encoded value, and derived shared keys by (private key,
+# public key)
+_DECODED_KEYS = KeyCache()
+_SHARED_KEYS = KeyCache()
+
 class NistCrypto(BaseCrypto):
 
     @classmethod
@@ -34,6 +41,16 @@ class NistCrypto(BaseCrypto):
 
     @classmethod
     def _exchange(self, private_key, public_key):
+        # key objects are not hashable, so identify the pair by value
+        cache_key = (
+            private_key.private_numbers().private_value,
+            public_key.public_bytes(encoding=serialization.Encoding.DER,
+                                    format=serialization.PublicFormat.SubjectPublicKeyInfo)
+        )
+        return _SHARED_KEYS.get_or_create(cache_key, lambda: self._derive(private_key, public_key))
+
+    @classmethod
+    def _derive(self, private_key, public_key):
         shared = private_key.exchange(ec.ECDH(), public_key)
         derived = HKDF(
             algorithm=hashes.SHA384(),
@@ -46,11 +63,10 @@ class NistCrypto(BaseCrypto):
 
     @classmethod
     def decode_public_key(self, key):
-        serialized = BaseCrypto.base64decode(key)
-        return serialization.load_pem_public_key(
-            data=serialized,
+        return _DECODED_KEYS.get_or_create(('public', key), lambda: serialization.load_pem_public_key(
+            data=BaseCrypto.base64decode(key),
             backend=default_backend()
-        )
+        ))
 
     @classmethod
     def encode_public_key(self, key):
@@ -62,12 +78,11 @@ class NistCrypto(BaseCrypto):
 
     @classmethod
     def decode_private_key(self, key):
-        serialized = BaseCrypto.base64decode(key)
-        return serialization.load_pem_private_key(
-            data=serialized,
+        return _DECODED_KEYS.get_or_create(('private', key), lambda: serialization.load_pem_private_key(
+            data=BaseCrypto.base64decode(key),
             password=None,
             backend=default_backend()
-        )
+        ))
 
     @classmethod
     def encode_private_key(self, key):
@@ -86,6 +101,84 @@ class NistCrypto(BaseCrypto):
     def random_nonce(self):
         return os.urandom(12)
 
+    @classmethod
+    def random_bytes(self, size):
+        return os.urandom(size)
+
+    @classmethod
+    def secret_key_size(self):
+        return 32
+
+    @classmethod
+    def secret_nonce_size(self):
+        return 12
+
+    @classmethod
+    def secret_sealer(self, key):
+        cipher = AESGCM(key)
+
+        def seal(plain, nonce):
+            return cipher.encrypt(nonce, plain, None)
+        return seal
+
+    @classmethod
+    def aead_encrypt(self, key, nonce, plain, aad):
+        return AESGCM(key).encrypt(nonce, plain, aad)
+
+    @classmethod
+    def aead_decrypt(self, key, nonce, ciphertext, aad):
+        return AESGCM(key).decrypt(nonce, ciphertext, aad)
+
+    @classmethod
+    def aead_nonce_size(self):
+        return 12
+
+    @classmethod
+    def aead_tag_size(self):
+        return 16
+
+    @classmethod
+    def file_encryptor(self, plaintext_filename, key, chunk_size=None, compression='raw'):
+        '''
+        Prepares encryption of plaintext_filename with AES-256-GCM, choosing
+        the file key and nonce prefix once.
+
+        Returns a callable that, each time it is called, reads the plaintext
+        file again and returns an iterator over the same encrypted bytes.
+        Files are always written in the version 4 format, of independently
+        encrypted chunks of chunk_size plaintext bytes
+        (e3db.chunked_file.DEFAULT_CHUNK_SIZE if not given), each with its
+        own nonce, and with the last chunk marked so truncated files are
+        rejected. The plaintext is compressed first with compression.
+        '''
+
+        # check that plaintext_file is valid and we can read it
+        if not os.path.isfile(plaintext_filename):
+            raise IOError("File not found: {0}".format(plaintext_filename))
+        return self.stream_encryptor(lambda: open(plaintext_filename, 'rb'), key, chunk_size, compression)
+
+    @classmethod
+    def stream_encryptor(self, open_plaintext, key, chunk_size=None, compression='raw'):
+        '''
+        Prepares encryption of a plaintext stream, as file_encryptor does for
+        a file.
+
+        open_plaintext is called for each pass, and returns a context manager
+        giving a binary readable positioned at the start of the plaintext.
+        '''
+        return chunked_file.encryptor(self, compressing(open_plaintext, compression), key,
+                                      chunk_size or chunked_file.DEFAULT_CHUNK_SIZE)
+
+    @classmethod
+    def file_decryptor(self, key, compression='raw'):
+        '''
+        Returns a decryptor for an encrypted file, which is fed the file in
+        chunks of any size as they arrive, such as from a download. Only the
+        version 4 format is supported, files of the Sodium suite's version 3
+        stream format are rejected.
+        '''
+        return decompressing(chunked_file.ChunkedDecryptor(self, key), compression)
+
     @classmethod
     def generate_keypair(self):
         private_key = ec.generate_private_key(
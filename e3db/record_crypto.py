@@ -0,0 +1,273 @@
+import base64
+import os
+if 'CRYPTO_SUITE' in os.environ and os.environ['CRYPTO_SUITE'] == 'NIST':
+    from .nist_crypto import NistCrypto as Crypto
+else:
+    from .sodium_crypto import SodiumCrypto as Crypto
+from .exceptions import CryptoError
+
+# Crypto helpers shared by e3db.Client and e3db.AsyncClient. These perform no
+# I/O, so they can be called from any thread or event loop. Decrypted access
+# keys are cached by the clients, in their ak_cache.
+
+
+def encrypt_record_data(ak, data):
+    """
+    Encrypt each field of a record's data with an access key.
+
+    Parameters
+    ----------
+    ak : bytes
+        Access Key
+
+    data : dict
+        Plaintext data fields
+
+    Returns
+    -------
+    dict
+        Data fields in the dotted quad encrypted format
+    """
+
+    return encrypt_records_data(ak, [data])[0]
+
+
+def encrypt_records_data(ak, records_data):
+    """
+    Encrypt the fields of many records with one access key.
+
+    Data keys and nonces for every field are drawn from a single random
+    read, and the access key cipher is set up once for the whole batch. The
+    output is the same dotted quad format as encrypting each field alone.
+
+    Parameters
+    ----------
+    ak : bytes
+        Access Key
+
+    records_data : list<dict>
+        Plaintext data fields of each record
+
+    Returns
+    -------
+    list<dict>
+        Data fields in the dotted quad encrypted format, one dict per record
+    """
+
+    key_size = Crypto.secret_key_size()
+    nonce_size = Crypto.secret_nonce_size()
+    # per field: data key, then the nonces for the data key and the field
+    stride = key_size + 2 * nonce_size
+    field_count = sum(len(data) for data in records_data)
+    randomness = Crypto.random_bytes(field_count * stride)
+    seal_with_ak = Crypto.secret_sealer(ak)
+    to_bytes = Crypto.to_bytes
+
+    encrypted_records = []
+    offset = 0
+    for data in records_data:
+        encrypted = {}
+        for key, value in data.items():
+            dk = randomness[offset:offset + key_size]
+            edkN = randomness[offset + key_size:offset + key_size + nonce_size]
+            efN = randomness[offset + key_size + nonce_size:offset + stride]
+            offset += stride
+            ef = Crypto.secret_sealer(dk)(to_bytes(value), efN)
+            edk = seal_with_ak(dk, edkN)
+            encrypted[key] = ".".join([_encode(edk), _encode(edkN), _encode(ef), _encode(efN)])
+        encrypted_records.append(encrypted)
+    return encrypted_records
+
+
+def _encode(b):
+    """
+    Base64URL encode bytes without padding, as a str.
+
+    Parameters
+    ----------
+    b : bytes
+        Bytes to encode
+
+    Returns
+    -------
+    str
+        Encoded value
+    """
+
+    return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
+
+
+def decrypt_record_data(ak, data):
+    """
+    Decrypt each dotted quad encrypted field of a record's data.
+
+    Parameters
+    ----------
+    ak : bytes
+        Access Key
+
+    data : dict
+        Encrypted data fields
+
+    Returns
+    -------
+    dict
+        Plaintext data fields
+    """
+
+    return {key: decrypt_field(ak, value) for key, value in data.items()}
+
+
+def decrypt_field(ak, value):
+    """
+    Decrypt one dotted quad encrypted field.
+
+    Parameters
+    ----------
+    ak : bytes
+        Access Key
+
+    value : str
+        Encrypted field, as edk.edkN.ef.efN
+
+    Returns
+    -------
+    str
+        Plaintext field
+    """
+
+    fields = value.split(".")
+
+    if len(fields) != 4:
+        raise CryptoError("Invalid Encrypted record fields: {0}".format(value))
+
+    edk = Crypto.base64decode(fields[0])
+    edkN = Crypto.base64decode(fields[1])
+    ef = Crypto.base64decode(fields[2])
+    efN = Crypto.base64decode(fields[3])
+
+    dk = Crypto.decrypt_secret(ak, edk, edkN)
+    pv = Crypto.decrypt_secret(dk, ef, efN)
+
+    return pv.decode("utf-8")
+
+
+def decrypt_records_data(records):
+    """
+    Decrypt the fields of many records.
+
+    Parameters
+    ----------
+    records : list<tuple(bytes, dict)>
+        Access Key and encrypted data fields of each record
+
+    Returns
+    -------
+    list<dict>
+        Plaintext data fields, one dict per record
+    """
+
+    return [decrypt_record_data(ak, data) for ak, data in records]
+
+
+def decrypt_eak(private_key, eak_json):
+    """
+    Decrypt an encrypted access key returned from the API.
+
+    Parameters
+    ----------
+    private_key : str
+        Base64URL encoded private key of the reader
+
+    eak_json : dict
+        json-style body returned from the API
+
+    Returns
+    -------
+    bytes
+        ak
+    """
+
+    if Crypto.get_mode() == 'nist':
+        k = eak_json['authorizer_public_key']['p384']
+    else:
+        k = eak_json['authorizer_public_key']['curve25519']
+    return _decrypt_eak(private_key, k, eak_json['eak'])
+
+
+def _decrypt_eak(private_key, authorizer_key, eak):
+    """
+    Decrypt an encoded eak.
+
+    Parameters
+    ----------
+    private_key : str
+        Base64URL encoded private key of the reader
+
+    authorizer_key : str
+        Base64URL encoded public key of the authorizer
+
+    eak : str
+        Encoded eak, "{ciphertext}.{nonce}"
+
+    Returns
+    -------
+    bytes
+        ak
+    """
+
+    fields = eak.split('.')
+    if len(fields) != 2:
+        raise CryptoError("Invalid access key format: {0}".format(eak))
+    ciphertext = Crypto.base64decode(fields[0])
+    nonce = Crypto.base64decode(fields[1])
+    return Crypto.decrypt_eak(Crypto.decode_private_key(private_key), Crypto.decode_public_key(authorizer_key), ciphertext, nonce)
+
+
+def encrypt_ak(private_key, reader_key, ak):
+    """
+    Encrypt an access key for a reader, in the format expected by the API.
+
+    Parameters
+    ----------
+    private_key : str
+        Base64URL encoded private key of the writer
+
+    reader_key : object
+        Decoded public key of the reader
+
+    ak : bytes
+        Access Key
+
+    Returns
+    -------
+    str
+        Encoded eak, "{ciphertext}.{nonce}"
+    """
+
+    nonce = Crypto.random_nonce()
+    eak = Crypto.encrypt_ak(Crypto.decode_private_key(private_key), reader_key, ak, nonce)
+    # Need to strip the nonce off the front of the eak
+    eak = eak[len(nonce):]
+    return "{0}.{1}".format(Crypto.base64encode(eak).decode("utf-8"), Crypto.base64encode(nonce).decode("utf-8"))
+
+
+def client_public_key(client_info_json):
+    """
+    Decode the public key for the current cipher suite from client info.
+
+    Parameters
+    ----------
+    client_info_json : dict
+        json-style client info, as returned by e3db.ClientInfo.to_json
+
+    Returns
+    -------
+    object
+        Decoded public key
+    """
+
+    if Crypto.get_mode() == 'nist':
+        return Crypto.decode_public_key(client_info_json['public_key']['p384'])
+    else:
+        return Crypto.decode_public_key(client_info_json['public_key']['curve25519'])
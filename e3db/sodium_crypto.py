@@ -1,15 +1,24 @@
 from e3db.types.signing_key_pair import SigningKeyPair
 from e3db.types.encyption_key_pair import EncryptionKeyPair
-from .base_crypto import BaseCrypto
+from .base_crypto import BaseCrypto, KeyCache
+from .exceptions import CryptoError
+from . import chunked_file
+from .compression import compressing, decompressing
 import nacl.utils
 import nacl.secret
 import nacl.public
 import nacl.bindings
 import nacl.signing
+import nacl.exceptions
+try:
+    # PyNaCl's bindings only take bytes and copy their output, libsodium is
+    # called directly through PyNaCl's private CFFI module when it is there,
+    # to encrypt and decrypt file blocks in reusable and mapped buffers
+    from nacl._sodium import ffi as _ffi, lib as _lib
+except ImportError:
+    _ffi = _lib = None
 import os.path
 import hashlib
-import base64
-import tempfile
 
 BLOCK_SIZE = 65536
 SECRET_STREAM_TAG_MESSAGE = 0x0
@@ -17,9 +26,35 @@ TAG_FINAL = nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_FINAL
 TAG_MESSAGE = nacl.bindings.crypto_secretstream_xchacha20poly1305_TAG_MESSAGE
 ABYTES = nacl.bindings.crypto_secretstream_xchacha20poly1305_ABYTES
 FILE_VERSION = 3
+HEADER_BYTES = nacl.bindings.crypto_secretstream_xchacha20poly1305_HEADERBYTES
+# The E3DB header is three short fields, a longer prefix without them is not a file
+MAX_E3DB_HEADER_LENGTH = 4096
 DEFAULT_KDF_ITERATIONS = 10000
 PKCE_VERIFIER_LENGTH = 32
 
+# decoded keys by encoded value, and Boxes holding the precomputed shared key
+# by (private key, public key) bytes
+_DECODED_KEYS = KeyCache()
+_BOXES = KeyCache()
+
+
+def _direct_secretstream():
+    """
+    Whether this PyNaCl exposes the private module and state layout the direct
+    path relies on. Releases that do not fall back to the public bindings.
+    """
+    if _lib is None:
+        return False
+    if not all(hasattr(_lib, name) for name in ("crypto_secretstream_xchacha20poly1305_push",
+                                                "crypto_secretstream_xchacha20poly1305_pull")):
+        return False
+    statebuf = getattr(nacl.bindings.crypto_secretstream_xchacha20poly1305_state(), 'statebuf', None)
+    return isinstance(statebuf, _ffi.CData)
+
+
+# Whether file blocks go to libsodium directly, rather than through the bindings
+DIRECT_SECRETSTREAM = _direct_secretstream()
+
 
 class SodiumCrypto(BaseCrypto):
 
@@ -45,7 +80,9 @@ class SodiumCrypto(BaseCrypto):
 
     @classmethod
     def box(self, private_key, public_key):
-        return nacl.public.Box(private_key, public_key)
+        # Box does the key agreement once when created, so reuse it per key pair
+        return _BOXES.get_or_create((bytes(private_key), bytes(public_key)),
+                                    lambda: nacl.public.Box(private_key, public_key))
 
     @classmethod
     def secret_box(self, key):
@@ -53,7 +90,7 @@ class SodiumCrypto(BaseCrypto):
 
     @classmethod
     def decode_public_key(self, key):
-        return nacl.public.PublicKey(BaseCrypto.base64decode(key))
+        return _DECODED_KEYS.get_or_create(('public', key), lambda: nacl.public.PublicKey(BaseCrypto.base64decode(key)))
 
     @classmethod
     def encode_public_key(self, key):
@@ -61,7 +98,7 @@ class SodiumCrypto(BaseCrypto):
 
     @classmethod
     def decode_private_key(self, key):
-        return nacl.public.PrivateKey(BaseCrypto.base64decode(key))
+        return _DECODED_KEYS.get_or_create(('private', key), lambda: nacl.public.PrivateKey(BaseCrypto.base64decode(key)))
 
     @classmethod
     def encode_private_key(self, key):
@@ -79,6 +116,41 @@ class SodiumCrypto(BaseCrypto):
     def random_verifier(self) -> bytes:
         return nacl.utils.random(PKCE_VERIFIER_LENGTH)
 
+    @classmethod
+    def random_bytes(self, size):
+        return nacl.utils.random(size)
+
+    @classmethod
+    def secret_key_size(self):
+        return nacl.secret.SecretBox.KEY_SIZE
+
+    @classmethod
+    def secret_nonce_size(self):
+        return nacl.secret.SecretBox.NONCE_SIZE
+
+    @classmethod
+    def secret_sealer(self, key):
+        # skip building a SecretBox, and the nonce concatenation it does
+        def seal(plain, nonce):
+            return nacl.bindings.crypto_secretbox(plain, nonce, key)
+        return seal
+
+    @classmethod
+    def aead_encrypt(self, key, nonce, plain, aad):
+        return nacl.bindings.crypto_aead_xchacha20poly1305_ietf_encrypt(plain, aad, nonce, key)
+
+    @classmethod
+    def aead_decrypt(self, key, nonce, ciphertext, aad):
+        return nacl.bindings.crypto_aead_xchacha20poly1305_ietf_decrypt(ciphertext, aad, nonce, key)
+
+    @classmethod
+    def aead_nonce_size(self):
+        return nacl.bindings.crypto_aead_xchacha20poly1305_ietf_NPUBBYTES
+
+    @classmethod
+    def aead_tag_size(self):
+        return nacl.bindings.crypto_aead_xchacha20poly1305_ietf_ABYTES
+
     @classmethod
     def generate_keypair(self):
         # return public, private
@@ -162,164 +234,89 @@ class SodiumCrypto(BaseCrypto):
         return signing_key.sign(string_to_sign).signature
 
     @classmethod
-    def encrypt_file(self, plaintext_filename, key):
+    def file_encryptor(self, plaintext_filename, key, chunk_size=None, compression='raw'):
         '''
-        Encrypts plaintext_filename to a temporary encrypted file, with the
-        filename returned as encrypted_filename.
+        Prepares encryption of plaintext_filename, choosing the file key and
+        stream header once.
 
-        Assumes files are already on filesystem (retrieved previously from server)
+        Returns a callable that, each time it is called, reads the plaintext
+        file again and returns an iterator over the same encrypted bytes, so
+        the ciphertext can be produced more than once without storing it.
+        At most two blocks of the file are held in memory.
 
-        Returns tuple of (encrypted_filename, checksum, encrypted_length).
+        By default the file is written in the version 3 format, a single
+        stream. Given a chunk_size, it is written in the version 4 format of
+        independently encrypted chunks of that many plaintext bytes, which
+        can be decrypted out of order, see e3db.chunked_file.
+
+        The plaintext is compressed before it is encrypted with compression,
+        one of the codecs of e3db.compression.
         '''
 
         # check that plaintext_file is valid and we can read it
         if not os.path.isfile(plaintext_filename):
             raise IOError("File not found: {0}".format(plaintext_filename))
-            # following will throw exception should permission be denied
-        try:
-            plaintext_file_handle = open(plaintext_filename, 'rb')
-        except IOError:
-            plaintext_file_handle.close()
-            # create temporary file for encrypted data
-        try:
-            encrypted_file_handle = tempfile.NamedTemporaryFile(prefix="e2e", suffix=".bin",delete=False)
-            encrypted_filename = encrypted_file_handle.name
-        except IOError:
-            encrypted_file_handle.close()
+        return self.stream_encryptor(lambda: open(plaintext_filename, 'rb'), key, chunk_size, compression)
+
+    @classmethod
+    def stream_encryptor(self, open_plaintext, key, chunk_size=None, compression='raw'):
+        '''
+        Prepares encryption of a plaintext stream, as file_encryptor does for
+        a file.
+
+        open_plaintext is called for each pass, and returns a context manager
+        giving a binary readable positioned at the start of the plaintext.
+        '''
+        open_plaintext = compressing(open_plaintext, compression)
+        if chunk_size is not None:
+            return chunked_file.encryptor(self, open_plaintext, key, chunk_size)
 
         # Create file header information and generate keys
         dk = nacl.bindings.crypto_secretstream_xchacha20poly1305_keygen()
-        m = hashlib.md5()
         edkN = self.random_nonce()
         edk = self.encrypt_secret(key, dk, edkN)
         edk = edk[len(edkN):]
-        encrypted_length = 0
         header = "{0}.{1}.{2}.".format(FILE_VERSION, BaseCrypto.base64encode(edk).decode("utf-8"), BaseCrypto.base64encode(edkN).decode("utf-8"))
         # last field is encrypted data
-
         header_bytes = BaseCrypto.to_bytes(header)
-        m.update(header_bytes)
-        encrypted_file_handle.write(header_bytes)
-        encrypted_length += len(header_bytes)
 
         state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
         stream_header = nacl.bindings.crypto_secretstream_xchacha20poly1305_init_push(state, dk)
 
-        encrypted_file_handle.write(stream_header)
-        m.update(stream_header)
-        encrypted_length += len(stream_header)
-
-        done = False
-        # simulate two element queue to detect EOF for TAG_FINAL
-        next_block = None
-        head_block = plaintext_file_handle.read(BLOCK_SIZE)
-        while not done:
-            next_block = plaintext_file_handle.read(BLOCK_SIZE)
-            if next_block == b'':
-                tag = TAG_FINAL
-                # Next block is empty, so we know we hit EOF
-                # block is full and we haven't hit EOF
-                done = True
-            else:
-                tag = TAG_MESSAGE
-
-            stream_bytes = nacl.bindings.crypto_secretstream_xchacha20poly1305_push(state, head_block, tag=tag)
-            encrypted_file_handle.write(stream_bytes)
-            m.update(stream_bytes)
-            encrypted_length += len(stream_bytes)
-            head_block = next_block
-
-        # cleanup
-        encrypted_file_handle.close()
-        plaintext_file_handle.close()
-        # Cannot import EncryptedFileInfo class here, so return an tuple that can
-        # be used in the client.py file to construct the EncryptedFileInfo object
-        # Returns encrypted_filename, md5 checksum, length in bytes of encrypted file
-        return (encrypted_filename, base64.b64encode(m.digest()), encrypted_length)
-
-    @classmethod
-    def decrypt_file(self, encrypted_filename, destination_filename, key):
+        def produce():
+            # init_pull derives the same state from the stream header as
+            # init_push did, so every pass encrypts to the same bytes
+            state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+            nacl.bindings.crypto_secretstream_xchacha20poly1305_init_pull(state, stream_header, dk)
+            yield header_bytes
+            yield stream_header
+
+            with open_plaintext() as plaintext_file_handle:
+                # simulate two element queue to detect EOF for TAG_FINAL,
+                # reading into two buffers in turn
+                head_block, next_block = bytearray(BLOCK_SIZE), bytearray(BLOCK_SIZE)
+                head_length = _read_block(plaintext_file_handle, head_block)
+                while True:
+                    next_length = _read_block(plaintext_file_handle, next_block)
+                    # Next block is empty, so we know we hit EOF
+                    tag = TAG_FINAL if next_length == 0 else TAG_MESSAGE
+                    yield _push(state, memoryview(head_block)[:head_length], tag)
+                    if tag == TAG_FINAL:
+                        return
+                    head_block, next_block, head_length = next_block, head_block, next_length
+
+        return produce
+
+    @classmethod
+    def file_decryptor(self, key, compression='raw'):
         '''
-        Decrypts encrypted_filename, and outputs plaintext file in destination_filename.
-        Assumes files are already on filesystem (retrieved previously from server).
+        Returns a FileDecryptor for an encrypted file, which is fed the file
+        in chunks of any size as they arrive, such as from a download. The
+        plaintext is decompressed with compression, the codec recorded for
+        the file, and then returned in bounded pieces: see
+        e3db.compression.drain.
         '''
-        # Check if the file exists, and we can read it with proper permissions
-        if not os.path.isfile(encrypted_filename):
-            raise IOError("File not found: {0}".format(encrypted_filename))
-
-        # We are going to use two file handles for the Encrypted File
-        # Handle #1 is going to be used to read the header information
-        # Handle #2 is going to skip the header information, and be used to
-        # extract the ciphertext for decryption
-        # This is necessary so we can efficiently extract the header without
-        # reading too much of the file information to optimized disk IO
-
-        # open file handle to encrypted_file
-        try:
-            encrypted_file_handle = open(encrypted_filename, 'rb')
-        except IOError:
-            encrypted_file_handle.close()
-
-        # open file handle to encrypted_file header
-        try:
-            encrypted_file_header_handle = open(encrypted_filename, 'rb')
-        except IOError:
-            encrypted_file_header_handle.close()
-
-        # Try to create destination plaintext_file
-        try:
-            destination_file_handle = open(destination_filename, 'wb+')
-        except IOError:
-            destination_file_handle.close()
-
-        # Most modern Filesystems use a 4KB, or 4096 byte block size
-        # When you read any information, the OS has to read the entire 4KB block
-        # whether or not it is used. Since 4KB is already going to be read,
-        # and we know the E3DB file header information is much less than 4KB,
-        # this size of read makes sense to extract the header from the file
-        h1 = encrypted_file_header_handle.read(4096)
-        e3db_header_block = h1.split(b'.')
-
-        # grab the version, edk, and edkN
-        file_version = int(e3db_header_block[0])
-        if file_version != FILE_VERSION:
-            raise RuntimeError("File version: {0} does not match supported version: {1}".format(file_version, FILE_VERSION))
-        edk = BaseCrypto.base64decode(e3db_header_block[1])
-        edkN = BaseCrypto.base64decode(e3db_header_block[2])
-        dk = self.decrypt_secret(key, edk, edkN)
-
-        # Calculate length of the header so we know where to start reading
-        # the ciphertext of the encrypted_file_handle. +3 accounts for the
-        # 3 bytes used by the "." delimiters between fields
-        e3db_header_length = len(e3db_header_block[0] + e3db_header_block[1] + e3db_header_block[2]) + 3
-        encrypted_file_header_handle.close()
-
-        # Open the encrypted_file_handle, starting at the first byte of the ciphertext
-        # discard the first bytes of the header, since we already parsed them
-        encrypted_file_handle.read(e3db_header_length)
-
-        libsodium_header = encrypted_file_handle.read(nacl.bindings.crypto_secretstream_xchacha20poly1305_HEADERBYTES)
-
-        # Setup libsodium stream cipher decryption
-        state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
-        nacl.bindings.crypto_secretstream_xchacha20poly1305_init_pull(state, libsodium_header, dk)
-
-        while True:
-            read_block = encrypted_file_handle.read(BLOCK_SIZE + ABYTES)
-            message, tag = nacl.bindings.crypto_secretstream_xchacha20poly1305_pull(state, read_block)
-
-            if tag == TAG_MESSAGE:
-                # write decrypted block to file
-                destination_file_handle.write(message)
-            elif tag == TAG_FINAL:
-                # write the final block
-                destination_file_handle.write(message)
-                break
-            else:
-                raise RuntimeError("Decryption failed, TAG_MESSAGE or TAG_FINAL not present for ciphertext block: {0} \n message: {1} \n tag: {2}".format(read_block, message, tag))
-
-        encrypted_file_handle.close()
-        destination_file_handle.close()
+        return decompressing(FileDecryptor(self, key), compression)
 
     @classmethod
     def verify(self, signature, message, public_key):
@@ -450,3 +447,266 @@ class SodiumCrypto(BaseCrypto):
         key_pair_bytes = nacl.bindings.crypto_sign_seed_keypair(stretch_seed)
         public_key, private_key = map(lambda x: self.base64encode(x).decode('utf-8'), key_pair_bytes)
         return SigningKeyPair(public_key, private_key)
+
+
+def _read_block(handle, block):
+    """
+    Fill a block buffer, as readers rely on every block before the final one
+    being full. Pipes and sockets may return less per read. Returns the
+    number of bytes read, which is less than the block only at EOF.
+    """
+    view = memoryview(block)
+    readinto = getattr(handle, 'readinto', None)
+    length = 0
+    while length < len(view):
+        if readinto is not None:
+            read = readinto(view[length:])
+        else:
+            data = handle.read(len(view) - length)
+            read = len(data)
+            view[length:length + read] = data
+        if not read:
+            break
+        length += read
+    return length
+
+
+def _push(state, block, tag):
+    """
+    Encrypt the next block of a secretstream, from any buffer.
+    """
+    if not DIRECT_SECRETSTREAM:
+        return nacl.bindings.crypto_secretstream_xchacha20poly1305_push(state, bytes(block), None, tag)
+    ciphertext = bytearray(len(block) + ABYTES)
+    rc = _lib.crypto_secretstream_xchacha20poly1305_push(
+        state.statebuf, _ffi.from_buffer("unsigned char[]", ciphertext, require_writable=True), _ffi.NULL,
+        _ffi.from_buffer("unsigned char[]", block), len(block), _ffi.NULL, 0, tag)
+    if rc != 0:
+        raise RuntimeError("Encryption of a file block failed")
+    return ciphertext
+
+
+def _pull(state, ciphertext):
+    """
+    Decrypt the next block of a secretstream, from any buffer. Returns the
+    plaintext and the tag of the block.
+    """
+    if len(ciphertext) < ABYTES:
+        raise CryptoError("Encrypted file block is truncated")
+    if not DIRECT_SECRETSTREAM:
+        try:
+            return nacl.bindings.crypto_secretstream_xchacha20poly1305_pull(state, bytes(ciphertext), None)
+        except nacl.exceptions.CryptoError:
+            raise CryptoError("Encrypted file block failed verification")
+    message = bytearray(len(ciphertext) - ABYTES)
+    tag = _ffi.new("unsigned char *")
+    rc = _lib.crypto_secretstream_xchacha20poly1305_pull(
+        state.statebuf, _ffi.from_buffer("unsigned char[]", message, require_writable=True), _ffi.NULL, tag,
+        _ffi.from_buffer("unsigned char[]", ciphertext), len(ciphertext), _ffi.NULL, 0)
+    if rc != 0:
+        raise CryptoError("Encrypted file block failed verification")
+    return message, tag[0]
+
+
+class FileDecryptor(object):
+    """
+    Incremental decryption of the v3 file format, handing v4 files to
+    e3db.chunked_file.ChunkedDecryptor.
+
+    Ciphertext is passed to `update` in chunks of any size, and plaintext is
+    returned as soon as whole blocks are available, so at most one block of
+    ciphertext is buffered. `finish` must be called once all ciphertext was
+    passed, and raises e3db.CryptoError if the file was truncated.
+    """
+
+    def __init__(self, crypto, key):
+        """
+        Initialize the FileDecryptor class.
+
+        Parameters
+        ----------
+        crypto : SodiumCrypto
+            Crypto class used to decrypt the file key
+
+        key : bytes
+            Access Key the file was encrypted with
+
+        Returns
+        -------
+        None
+        """
+        self.__crypto = crypto
+        self.__key = key
+        self.__buffer = bytearray()
+        self.__dk = None
+        self.__state = None
+        self.__done = False
+        self.__chunked = None
+
+    @property
+    def done(self):
+        """
+        Get whether the final block was decrypted.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True once the final block was decrypted.
+        """
+        if self.__chunked is not None:
+            return self.__chunked.done
+        return self.__done
+
+    def update(self, data):
+        """
+        Decrypt the next chunk of the file.
+
+        Parameters
+        ----------
+        data : bytes-like
+            Next ciphertext bytes of the file. Only a partial block at its
+            end is copied, so data may be a view of a larger buffer.
+
+        Returns
+        -------
+        bytes
+            Plaintext of every block completed by this chunk, possibly empty.
+        """
+        if self.__chunked is not None:
+            return self.__chunked.update(data)
+        if self.__state is None:
+            self.__buffer += data
+            if self.__dk is None and not self.__read_header():
+                return b''
+            if self.__chunked is not None:
+                buffered, self.__buffer = bytes(self.__buffer), bytearray()
+                return self.__chunked.update(buffered)
+            if not self.__read_stream_header():
+                return b''
+            data, self.__buffer = bytes(self.__buffer), bytearray()
+
+        block_size = BLOCK_SIZE + ABYTES
+        data = memoryview(data)
+        plaintext = []
+        if self.__buffer:
+            # complete the block left partial by the last chunk
+            fill = block_size - len(self.__buffer)
+            self.__buffer += data[:fill]
+            data = data[fill:]
+            if len(self.__buffer) < block_size:
+                return b''
+            plaintext.append(self.__pull(self.__buffer))
+            self.__buffer = bytearray()
+        # whole blocks are decrypted from data where they are
+        while len(data) >= block_size:
+            plaintext.append(self.__pull(data[:block_size]))
+            data = data[block_size:]
+        self.__buffer += data
+        return b''.join(plaintext)
+
+    def finish(self):
+        """
+        Decrypt the rest of the file, after every chunk was passed to update.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bytes
+            Plaintext of the final block.
+        """
+        if self.__chunked is not None:
+            return self.__chunked.finish()
+        if self.__dk is None or self.__state is None:
+            raise CryptoError("Encrypted file ended within its header")
+        plaintext = b''
+        if self.__buffer:
+            plaintext, self.__buffer = bytes(self.__pull(self.__buffer)), bytearray()
+        if not self.__done:
+            raise CryptoError("Encrypted file ended before its final block")
+        return plaintext
+
+    def __read_header(self):
+        """
+        Private method to parse the E3DB header and decrypt the file key, once
+        it is buffered.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            Whether the header was read.
+        """
+        fields = self.__buffer[:MAX_E3DB_HEADER_LENGTH].split(b'.', 3)
+        if len(fields) < 4:
+            if len(self.__buffer) >= MAX_E3DB_HEADER_LENGTH:
+                raise CryptoError("Encrypted file header not found")
+            return False
+
+        # grab the version, edk, and edkN
+        file_version = int(fields[0])
+        if file_version == chunked_file.CHUNKED_FILE_VERSION:
+            # the chunked decryptor parses its own header
+            self.__chunked = chunked_file.ChunkedDecryptor(self.__crypto, self.__key)
+            return True
+        if file_version != FILE_VERSION:
+            raise RuntimeError("File version: {0} does not match supported version: {1}".format(file_version, FILE_VERSION))
+        edk = BaseCrypto.base64decode(bytes(fields[1]))
+        edkN = BaseCrypto.base64decode(bytes(fields[2]))
+        self.__dk = self.__crypto.decrypt_secret(self.__key, edk, edkN)
+        # +3 accounts for the 3 bytes used by the "." delimiters between fields
+        del self.__buffer[:len(fields[0]) + len(fields[1]) + len(fields[2]) + 3]
+        return True
+
+    def __read_stream_header(self):
+        """
+        Private method to set up the libsodium stream once its header is
+        buffered.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            Whether the stream header was read.
+        """
+        if len(self.__buffer) < HEADER_BYTES:
+            return False
+        self.__state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+        nacl.bindings.crypto_secretstream_xchacha20poly1305_init_pull(self.__state, bytes(self.__buffer[:HEADER_BYTES]), self.__dk)
+        del self.__buffer[:HEADER_BYTES]
+        return True
+
+    def __pull(self, read_block):
+        """
+        Private method to decrypt the next block of the stream.
+
+        Parameters
+        ----------
+        read_block : bytes-like
+            Block, including its authentication tag
+
+        Returns
+        -------
+        bytes-like
+            Plaintext of the block
+        """
+        if self.__done:
+            raise CryptoError("Encrypted file continues after its final block")
+        message, tag = _pull(self.__state, read_block)
+        if tag == TAG_FINAL:
+            self.__done = True
+        elif tag != TAG_MESSAGE:
+            raise RuntimeError("Decryption failed, TAG_MESSAGE or TAG_FINAL not present for ciphertext block: {0} \n message: {1} \n tag: {2}".format(bytes(read_block), message, tag))
+        return message
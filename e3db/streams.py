@@ -0,0 +1,292 @@
+import base64
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from .exceptions import CryptoError
+
+# Largest part of a file mapped at once by file_views, so mapped pages do not
+# add up to the whole file in the resident set
+MAP_WINDOW_SIZE = 1024 * mmap.ALLOCATIONGRANULARITY
+
+
+class ReplayStream(object):
+    """
+    Request body that regenerates encrypted file content on every pass
+    instead of holding it in memory or on disk.
+
+    Uploads need the checksum and length of the ciphertext before the body is
+    sent, so `measure` makes one pass over the content, keeping only the MD5
+    state, and iterating the stream makes another. Each pass must produce the
+    same bytes. Iteration checks this, and raises e3db.CryptoError if the
+    content changed, such as when the plaintext file was modified in between:
+    as soon as it runs past the measured length, and otherwise at the end.
+    """
+
+    def __init__(self, produce):
+        """
+        Initialize the ReplayStream class.
+
+        Parameters
+        ----------
+        produce : callable
+            Called without arguments for each pass, returning an iterator of
+            bytes chunks.
+
+        Returns
+        -------
+        None
+        """
+        self.__produce = produce
+        self.__checksum = None
+        self.__size = None
+
+    def measure(self):
+        """
+        Compute the checksum and length of the content, once.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple(str, int)
+            Base64 encoded MD5 checksum and length in bytes.
+        """
+        if self.__checksum is None:
+            m = hashlib.md5()
+            size = 0
+            for chunk in self.__produce():
+                m.update(chunk)
+                size += len(chunk)
+            self.__checksum = base64.b64encode(m.digest()).decode("utf-8")
+            self.__size = size
+        return self.__checksum, self.__size
+
+    def __len__(self):
+        return self.measure()[1]
+
+    def __iter__(self):
+        checksum, size = self.measure()
+        m = hashlib.md5()
+        sent = 0
+        for chunk in self.__produce():
+            sent += len(chunk)
+            # stop before sending more than the length the upload declared
+            if sent > size:
+                raise CryptoError("File content grew between passes, expected {0} bytes".format(size))
+            m.update(chunk)
+            yield chunk
+        if sent != size or base64.b64encode(m.digest()).decode("utf-8") != checksum:
+            raise CryptoError("File content changed between passes, expected checksum {0}".format(checksum))
+
+
+def spool(chunks, max_size):
+    """
+    Write chunks to a file kept in memory until it grows past max_size, when
+    it moves to a temporary file on disk.
+
+    Parameters
+    ----------
+    chunks : iterable<bytes>
+        Content to write
+
+    max_size : int
+        Largest size, in bytes, held in memory
+
+    Returns
+    -------
+    tuple(tempfile.SpooledTemporaryFile, str, int)
+        File positioned at the start of the content, base64 encoded MD5
+        checksum, and length in bytes.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_size, prefix="e2e", suffix=".bin")
+    m = hashlib.md5()
+    size = 0
+    try:
+        for chunk in chunks:
+            spooled.write(chunk)
+            m.update(chunk)
+            size += len(chunk)
+    except Exception:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled, base64.b64encode(m.digest()).decode("utf-8"), size
+
+
+def file_views(handle, size):
+    """
+    Read an open file in views of up to size bytes, memory mapped a window
+    at a time where possible so the content is not copied.
+
+    Parameters
+    ----------
+    handle : file
+        Binary file to read, from its start
+
+    size : int
+        Largest view, in bytes
+
+    Returns
+    -------
+    iterator<bytes-like>
+        Content of the file. Each view is only valid until the next one is
+        requested.
+    """
+    try:
+        file_size = os.fstat(handle.fileno()).st_size
+        mapped = mmap.mmap(handle.fileno(), min(file_size, MAP_WINDOW_SIZE), access=mmap.ACCESS_READ)
+    except (ValueError, OSError, io.UnsupportedOperation):
+        # empty files and streams cannot be mapped
+        for data in iter(lambda: handle.read(size), b''):
+            yield data
+        return
+    window = 0
+    while True:
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, len(view), size):
+                yield view[offset:offset + size]
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # views are still referenced, such as by a traceback, so the
+                # mapping is closed once they are collected
+                pass
+        window += MAP_WINDOW_SIZE
+        if window >= file_size:
+            return
+        mapped = mmap.mmap(handle.fileno(), min(file_size - window, MAP_WINDOW_SIZE), access=mmap.ACCESS_READ, offset=window)
+
+
+class DecryptingReader(io.BufferedIOBase):
+    """
+    Readable binary stream of the plaintext of an encrypted file, decrypted
+    as ciphertext chunks are consumed.
+
+    Only the plaintext of the current ciphertext chunk is held in memory, and
+    of compressed files, only the part the decryptor returns at once. The MD5
+    checksum of the ciphertext is checked once the end of the file is
+    reached, and the read reaching it raises e3db.CryptoError if the file
+    does not match.
+    """
+
+    def __init__(self, chunks, decryptor, checksum=None, on_close=None, file_info=None):
+        """
+        Initialize the DecryptingReader class.
+
+        Parameters
+        ----------
+        chunks : iterator<bytes>
+            Ciphertext of the file, in chunks of any size
+
+        decryptor : object
+            File decryptor from the crypto suite, with update and finish
+
+        checksum : str
+            Expected base64 encoded MD5 checksum of the ciphertext. Optional.
+
+        on_close : callable
+            Called once when the stream is closed, such as to release the
+            download. Optional.
+
+        file_info : e3db.File
+            File metadata, available as the file_info attribute. Optional.
+
+        Returns
+        -------
+        None
+        """
+        io.BufferedIOBase.__init__(self)
+        self.__chunks = iter(chunks)
+        self.__decryptor = decryptor
+        self.__checksum = checksum
+        self.__md5 = hashlib.md5()
+        self.__on_close = on_close
+        self.__more = getattr(decryptor, 'more', None)
+        self.__pending = bytearray()
+        self.__finished = False
+        self.__eof = False
+        self.file_info = file_info
+
+    def readable(self):
+        return True
+
+    def __fill(self):
+        """
+        Private method to add the plaintext the decryptor held back, or else
+        to decrypt the next chunk of ciphertext, to the pending plaintext.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.__more is not None:
+            plaintext = self.__more()
+            if plaintext:
+                self.__pending += plaintext
+                return
+        if self.__finished:
+            self.__eof = True
+            return
+        try:
+            chunk = next(self.__chunks)
+        except StopIteration:
+            self.__finished = True
+            self.__pending += self.__decryptor.finish()
+            checksum = base64.b64encode(self.__md5.digest()).decode("utf-8")
+            if self.__checksum is not None and checksum != self.__checksum:
+                raise CryptoError("Encrypted file checksum {0} does not match {1}".format(checksum, self.__checksum))
+            return
+        self.__md5.update(chunk)
+        self.__pending += self.__decryptor.update(chunk)
+
+    def __take(self, size):
+        if size < 0 or size >= len(self.__pending):
+            taken = bytes(self.__pending)
+            self.__pending.clear()
+            return taken
+        taken = bytes(self.__pending[:size])
+        del self.__pending[:size]
+        return taken
+
+    def read(self, size=-1):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if size is None:
+            size = -1
+        while not self.__eof and (size < 0 or len(self.__pending) < size):
+            self.__fill()
+        return self.__take(size)
+
+    def read1(self, size=-1):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if size is None:
+            size = -1
+        while not self.__eof and not self.__pending:
+            self.__fill()
+        return self.__take(size)
+
+    def peek(self, size=0):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        while not self.__eof and not self.__pending:
+            self.__fill()
+        return bytes(self.__pending)
+
+    def close(self):
+        if not self.closed:
+            self.__pending = bytearray()
+            if self.__on_close is not None:
+                self.__on_close()
+        io.BufferedIOBase.close(self)
@@ -0,0 +1,67 @@
+import asyncio
+import e3db
+import os
+import binascii
+import pytest
+
+pytest.importorskip("aiohttp")
+
+token = os.environ["REGISTRATION_TOKEN"]
+api_url = os.environ["DEFAULT_API_URL"]
+
+
+class TestAsyncIntegrationClient():
+    @classmethod
+    def setup_class(self):
+        """
+        Setup where we register a client that the async tests share.
+        """
+        public_key, private_key = e3db.Client.generate_keypair()
+        public_signing_key, private_signing_key = e3db.Client.generate_signing_keypair()
+        name = "client_{0}".format(binascii.hexlify(os.urandom(16)))
+        test_client = e3db.Client.register(token, name, public_key, backup=False, api_url=api_url,
+                                           public_signing_key=public_signing_key,
+                                           private_signing_key=private_signing_key)
+        self.config = e3db.Config(
+            test_client.client_id,
+            test_client.api_key_id,
+            test_client.api_secret,
+            public_key,
+            private_key,
+            api_url=api_url,
+            public_signing_key=public_signing_key,
+            private_signing_key=private_signing_key
+        )()
+        self.client = e3db.Client(self.config)
+
+    def test_write_then_read_record(self):
+        """
+        Write a record with the async client and read it back with both
+        clients.
+        """
+        record_type = "test_async_{0}".format(binascii.hexlify(os.urandom(8)).decode("utf-8"))
+        data = {'time': 'now'}
+
+        async def run():
+            async with e3db.AsyncClient(self.config) as client:
+                record = await client.write(record_type, data)
+                return record, await client.read(record.meta.record_id)
+
+        record, read_record = asyncio.run(run())
+        assert(read_record.data == data)
+        assert(self.client.read(record.meta.record_id).data == data)
+
+    def test_concurrent_writes_share_access_key(self):
+        """
+        Concurrent writes to a new record type all use a single access key, so
+        every record can be read back.
+        """
+        record_type = "test_async_{0}".format(binascii.hexlify(os.urandom(8)).decode("utf-8"))
+
+        async def run():
+            async with e3db.AsyncClient(self.config) as client:
+                records = await asyncio.gather(*[client.write(record_type, {'i': str(i)}) for i in range(20)])
+                return await asyncio.gather(*[client.read(r.meta.record_id) for r in records])
+
+        read_records = asyncio.run(run())
+        assert([r.data['i'] for r in read_records] == [str(i) for i in range(20)])
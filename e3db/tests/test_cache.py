@@ -0,0 +1,320 @@
+import json
+import re
+import threading
+import pytest
+import responses
+from uuid import uuid4
+import e3db
+import e3db.record_crypto
+from e3db.cache import AccessKeyCache, PublicKeyDirectory
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss_counted():
+    cache = AccessKeyCache()
+    key = ('writer', 'user', 'type')
+    assert(cache.get(key) is None)
+    cache[key] = b'ak'
+    assert(cache.get(key) == b'ak')
+    assert(key in cache)
+    stats = cache.stats()
+    assert(stats['hits'] == 1)
+    assert(stats['misses'] == 1)
+    assert(stats['size'] == 1)
+
+
+def test_least_recently_used_evicted():
+    cache = AccessKeyCache(max_entries=2)
+    cache[('w', 'u', 'a')] = b'a'
+    cache[('w', 'u', 'b')] = b'b'
+    # touch a so b is the least recently used
+    cache.get(('w', 'u', 'a'))
+    cache[('w', 'u', 'c')] = b'c'
+    assert(len(cache) == 2)
+    assert(('w', 'u', 'b') not in cache)
+    assert(cache.get(('w', 'u', 'a')) == b'a')
+    assert(cache.stats()['evictions'] == 1)
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    cache = AccessKeyCache(ttl=10, clock=clock)
+    cache[('w', 'u', 't')] = b'ak'
+    clock.now = 9
+    assert(cache.get(('w', 'u', 't')) == b'ak')
+    clock.now = 10
+    assert(cache.get(('w', 'u', 't')) is None)
+    assert(cache.stats()['expirations'] == 1)
+    assert(len(cache) == 0)
+
+
+def test_invalidate_by_field():
+    cache = AccessKeyCache()
+    cache[('w1', 'w1', 'a')] = b'1'
+    cache[('w1', 'w1', 'b')] = b'2'
+    cache[('w2', 'w2', 'a')] = b'3'
+    assert(cache.invalidate(record_type='a') == 2)
+    assert(('w1', 'w1', 'b') in cache)
+    assert(cache.pop(('w1', 'w1', 'b')) == b'2')
+    assert(cache.pop(('w1', 'w1', 'b')) is None)
+    assert(cache.stats()['invalidations'] == 3)
+
+
+def test_concurrent_writes_stay_bounded():
+    cache = AccessKeyCache(max_entries=50)
+
+    def fill(n):
+        for i in range(500):
+            cache[('w', str(n), str(i))] = b'ak'
+            cache.get(('w', str(n), str(i // 2)))
+
+    threads = [threading.Thread(target=fill, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert(len(cache) == 50)
+    assert(cache.stats()['evictions'] == 8 * 500 - 50)
+
+
+def test_client_cache_is_pluggable():
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config("client-id", "key-id", "secret", public_key, private_key, api_url="http://127.0.0.1:1")
+    cache = AccessKeyCache(max_entries=10, ttl=60)
+    client = e3db.Client(config(), ak_cache=cache)
+    assert(client.ak_cache is cache)
+    assert(client.ak_cache_stats()['max_entries'] == 10)
+    client.ak_cache = {}
+    assert('hits' not in client.ak_cache_stats())
+    assert(client.ak_cache_stats()['missing']['size'] == 0)
+
+
+
+def test_async_client_cache_is_pluggable():
+    pytest.importorskip("aiohttp")
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config("client-id", "key-id", "secret", public_key, private_key, api_url="http://127.0.0.1:1")
+    cache = AccessKeyCache(max_entries=10, ttl=60)
+    missing = AccessKeyCache(ttl=5)
+    directory = PublicKeyDirectory()
+    client = e3db.AsyncClient(config(), ak_cache=cache, missing_ak_cache=missing, key_directory=directory)
+    assert(client.ak_cache is cache)
+    assert(client.missing_ak_cache is missing)
+    assert(client.key_directory is directory)
+
+@responses.activate
+def test_missing_access_key_not_requested_again():
+    api_url = "http://e3db.test"
+    client_id = str(uuid4())
+    writer_id = str(uuid4())
+    record_id = str(uuid4())
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config(client_id, "key-id", "secret", public_key, private_key, api_url=api_url)
+    client = e3db.Client(config())
+    record = {
+        'meta': {'record_id': record_id, 'writer_id': writer_id, 'user_id': writer_id, 'type': 'unshared',
+                 'plain': {}, 'created': '2021-01-01T00:00:00.000001Z', 'last_modified': '2021-01-01T00:00:00.000001Z',
+                 'version': str(uuid4()), 'file_meta': None},
+        'data': {'field': 'a.b.c.d'}
+    }
+    ak_url = "{0}/v1/storage/access_keys/{1}/{1}/{2}/unshared".format(api_url, writer_id, client_id)
+    responses.add(responses.POST, "{0}/v1/auth/token".format(api_url),
+                  json={'access_token': 'token', 'expires_at': '2999-01-01T00:00:00.000000Z'})
+    responses.add(responses.GET, "{0}/v1/storage/records/{1}".format(api_url, record_id), json=record)
+    responses.add(responses.GET, ak_url, status=404)
+
+    for _ in range(3):
+        with pytest.raises(e3db.LookupError):
+            client.read(record_id)
+
+    assert(len([c for c in responses.calls if c.request.url == ak_url]) == 1)
+    assert(client.ak_cache_stats()['missing']['hits'] == 2)
+
+
+
+@responses.activate
+def test_missing_access_key_requested_again_before_create():
+    api_url = "http://e3db.test"
+    client_id = str(uuid4())
+    record_id = str(uuid4())
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config(client_id, "key-id", "secret", public_key, private_key, api_url=api_url)
+    client = e3db.Client(config())
+    record = {
+        'meta': {'record_id': record_id, 'writer_id': client_id, 'user_id': client_id, 'type': 'contact',
+                 'plain': {}, 'created': '2021-01-01T00:00:00.000001Z', 'last_modified': '2021-01-01T00:00:00.000001Z',
+                 'version': str(uuid4()), 'file_meta': None},
+        'data': {'field': 'a.b.c.d'}
+    }
+    ak_url = "{0}/v1/storage/access_keys/{1}/{1}/{1}/contact".format(api_url, client_id)
+    # another client of this identity creates the key after it was found missing
+    eak = e3db.record_crypto.encrypt_ak(private_key, e3db.Crypto.decode_public_key(public_key), e3db.Crypto.random_key())
+    responses.add(responses.POST, "{0}/v1/auth/token".format(api_url),
+                  json={'access_token': 'token', 'expires_at': '2999-01-01T00:00:00.000000Z'})
+    responses.add(responses.GET, "{0}/v1/storage/records/{1}".format(api_url, record_id), json=record)
+    responses.add(responses.GET, ak_url, status=404)
+    key_name = 'p384' if e3db.Crypto.get_mode() == 'nist' else 'curve25519'
+    responses.add(responses.GET, ak_url, json={'eak': eak, 'authorizer_public_key': {key_name: public_key}})
+    responses.add(responses.POST, "{0}/v1/storage/records".format(api_url), json=dict(record, data={}))
+
+    with pytest.raises(e3db.LookupError):
+        client.read(record_id)
+    client.write('contact', {'name': 'Jon Snow'})
+
+    assert(len([c for c in responses.calls if c.request.url == ak_url and c.request.method == 'GET']) == 2)
+    assert(not any(c.request.method == 'PUT' for c in responses.calls))
+
+
+@responses.activate
+def test_missing_access_key_created_once():
+    api_url = "http://e3db.test"
+    client_id = str(uuid4())
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config(client_id, "key-id", "secret", public_key, private_key, api_url=api_url)
+    client = e3db.Client(config())
+    key_name = 'p384' if e3db.Crypto.get_mode() == 'nist' else 'curve25519'
+    ak_url = "{0}/v1/storage/access_keys/{1}/{1}/{1}/contact".format(api_url, client_id)
+    stored = []
+    started = threading.Barrier(4)
+
+    def get_access_key(request):
+        if not stored:
+            return (404, {}, '')
+        return (200, {}, json.dumps({'eak': stored[0], 'authorizer_public_key': {key_name: public_key}}))
+
+    def put_access_key(request):
+        stored.append(json.loads(request.body)['eak'])
+        return (201, {}, '')
+
+    def write_record(request):
+        record = json.loads(request.body)
+        record['meta'].update({'record_id': str(uuid4()), 'created': '2021-01-01T00:00:00.000001Z',
+                               'last_modified': '2021-01-01T00:00:00.000001Z', 'version': str(uuid4())})
+        return (201, {}, json.dumps(record))
+
+    responses.add(responses.POST, "{0}/v1/auth/token".format(api_url),
+                  json={'access_token': 'token', 'expires_at': '2999-01-01T00:00:00.000000Z'})
+    responses.add_callback(responses.GET, ak_url, callback=get_access_key)
+    responses.add_callback(responses.PUT, ak_url, callback=put_access_key)
+    responses.add_callback(responses.POST, "{0}/v1/storage/records".format(api_url), callback=write_record)
+
+    def write():
+        started.wait()
+        return client.write('contact', {'name': 'Jon Snow'})
+
+    threads = [threading.Thread(target=write) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    results = list(client.write_many('contact', [{'name': 'Arya Stark'}]))
+    for thread in threads:
+        thread.join()
+
+    # the writes raced for the missing key, and only one was stored
+    assert(len(stored) == 1)
+    assert(results[0].record.data['name'] == 'Arya Stark')
+
+
+@responses.activate
+def test_included_access_keys_cached_on_client(monkeypatch):
+    api_url = "http://e3db.test"
+    client_id = str(uuid4())
+    writer_id = str(uuid4())
+    public_key, private_key = e3db.Client.generate_keypair()
+    writer_public_key, writer_private_key = e3db.Client.generate_keypair()
+    config = e3db.Config(client_id, "key-id", "secret", public_key, private_key, api_url=api_url)
+    client = e3db.Client(config())
+    ak = e3db.Crypto.random_key()
+    key_name = 'p384' if e3db.Crypto.get_mode() == 'nist' else 'curve25519'
+    access_key = {'eak': e3db.record_crypto.encrypt_ak(writer_private_key, e3db.Crypto.decode_public_key(public_key), ak),
+                  'authorizer_public_key': {key_name: writer_public_key}}
+    results = [{
+        'meta': {'record_id': str(uuid4()), 'writer_id': writer_id, 'user_id': writer_id, 'type': 'contact',
+                 'plain': {}, 'created': '2021-01-01T00:00:00.000001Z', 'last_modified': '2021-01-01T00:00:00.000001Z',
+                 'version': str(uuid4()), 'file_meta': None},
+        'record_data': e3db.record_crypto.encrypt_record_data(ak, {'name': 'Jon Snow {0}'.format(i)}),
+        'access_key': access_key
+    } for i in range(3)]
+    responses.add(responses.POST, "{0}/v1/auth/token".format(api_url),
+                  json={'access_token': 'token', 'expires_at': '2999-01-01T00:00:00.000000Z'})
+    responses.add(responses.POST, "{0}/v2/search".format(api_url),
+                  json={'results': results, 'last_index': 0, 'total_results': 3, 'search_id': str(uuid4())})
+    decrypt_eak = e3db.record_crypto.decrypt_eak
+    decrypted = []
+    monkeypatch.setattr(e3db.record_crypto, 'decrypt_eak', lambda *args: decrypted.append(args) or decrypt_eak(*args))
+
+    records = client.search(e3db.types.Search(include_data=True))
+
+    assert([r.data['name'] for r in records] == ['Jon Snow 0', 'Jon Snow 1', 'Jon Snow 2'])
+    assert(len(decrypted) == 1)
+    assert(client.ak_cache.get((writer_id, writer_id, 'contact')) == ak)
+    # the decrypted key goes with the client's cache when sharing changes
+    client.ak_cache.invalidate(writer_id=writer_id)
+    assert(client.ak_cache.get((writer_id, writer_id, 'contact')) is None)
+
+
+@responses.activate
+def test_sharing_invalidates_only_stale_keys():
+    api_url = "http://e3db.test"
+    client_id = str(uuid4())
+    writer_id = str(uuid4())
+    reader_id = str(uuid4())
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config(client_id, "key-id", "secret", public_key, private_key, api_url=api_url)
+    client = e3db.Client(config())
+    client.ak_cache[(client_id, client_id, 'contact')] = e3db.Crypto.random_key()
+    client.ak_cache[(writer_id, writer_id, 'contact')] = e3db.Crypto.random_key()
+    responses.add(responses.POST, "{0}/v1/auth/token".format(api_url),
+                  json={'access_token': 'token', 'expires_at': '2999-01-01T00:00:00.000000Z'})
+    responses.add(responses.PUT, re.compile("{0}/v1/storage/policy/.*".format(api_url)), status=201)
+    responses.add(responses.DELETE, re.compile("{0}/v1/storage/access_keys/.*".format(api_url)), status=204)
+
+    # the reader loses its copy, the key this client reads is still valid
+    client.revoke('contact', reader_id)
+    assert(client.ak_cache.get((client_id, client_id, 'contact')) is not None)
+
+    # an authorizer revoking this client's own copy makes the cached key stale
+    client.revoke_on_behalf_of(writer_id, client_id, 'contact')
+    assert(client.ak_cache.get((writer_id, writer_id, 'contact')) is None)
+    assert(client.ak_cache.get((client_id, client_id, 'contact')) is not None)
+
+
+def test_key_directory_decodes_and_caches():
+    public_key, _ = e3db.Client.generate_keypair()
+    directory = PublicKeyDirectory(max_entries=2)
+    client_id = str(uuid4())
+    decoded = directory.add(client_id, public_key)
+    assert(directory.get(client_id) is decoded)
+    directory.add(str(uuid4()), public_key)
+    directory.add(str(uuid4()), public_key)
+    assert(client_id not in directory)
+
+
+@responses.activate
+def test_preload_public_keys_fetches_each_client_once():
+    api_url = "http://e3db.test"
+    public_key, private_key = e3db.Client.generate_keypair()
+    reader_public_key, _ = e3db.Client.generate_keypair()
+    config = e3db.Config(str(uuid4()), "key-id", "secret", public_key, private_key, api_url=api_url)
+    client = e3db.Client(config())
+    reader_id = str(uuid4())
+    unknown_id = str(uuid4())
+    key_name = 'p384' if e3db.Crypto.get_mode() == 'nist' else 'curve25519'
+    responses.add(responses.POST, "{0}/v1/auth/token".format(api_url),
+                  json={'access_token': 'token', 'expires_at': '2999-01-01T00:00:00.000000Z'})
+    responses.add(responses.GET, "{0}/v1/storage/clients/{1}".format(api_url, reader_id),
+                  json={'client_id': reader_id, 'public_key': {key_name: reader_public_key}, 'validated': True})
+    responses.add(responses.GET, "{0}/v1/storage/clients/{1}".format(api_url, unknown_id), status=404)
+
+    errors = client.preload_public_keys([reader_id, reader_id, unknown_id])
+    assert(list(errors.keys()) == [unknown_id])
+    assert(isinstance(errors[unknown_id], e3db.LookupError))
+    assert(client.preload_public_keys([reader_id]) == {})
+    assert(len([c for c in responses.calls if reader_id in c.request.url]) == 1)
@@ -6,6 +6,9 @@ import nacl.utils
 import nacl.secret
 import nacl.public
 import hashlib
+import base64
+import io
+import zlib
 
 
 def crypto_mode():
@@ -176,3 +179,434 @@ def test_generate_pkce_challenge():
     assert(len(verifier) == 11 + 32)
     _, challenge_2 = e3db.Crypto.generate_pkce_challenge()
     assert(challenge != challenge_2)
+
+
+def test_decoded_keys_are_cached():
+    from e3db.base_crypto import KeyCache
+    public_key, private_key = e3db.Client.generate_keypair()
+    assert(e3db.Crypto.decode_public_key(public_key) is e3db.Crypto.decode_public_key(public_key))
+    assert(e3db.Crypto.decode_private_key(private_key) is e3db.Crypto.decode_private_key(private_key))
+    # keys are looked up by digest
+    cache = KeyCache(max_entries=2)
+    cache.get_or_create(('private', private_key), lambda: 'decoded')
+    assert(cache.get_or_create(('private', private_key), lambda: 'again') == 'decoded')
+    assert(len(cache) == 1)
+    e3db.Crypto.clear_key_caches()
+    assert(e3db.Crypto.decode_public_key(public_key) is not None)
+
+
+def test_eak_round_trip():
+    from e3db import record_crypto
+    writer_public_key, writer_private_key = e3db.Client.generate_keypair()
+    reader_public_key, reader_private_key = e3db.Client.generate_keypair()
+    ak = e3db.Crypto.random_key()
+    eak = record_crypto.encrypt_ak(writer_private_key, e3db.Crypto.decode_public_key(reader_public_key), ak)
+    key_name = 'p384' if crypto_mode() == 'nist' else 'curve25519'
+    eak_json = {'eak': eak, 'authorizer_public_key': {key_name: writer_public_key}}
+    assert(record_crypto.decrypt_eak(reader_private_key, eak_json) == ak)
+
+    # a different eak for the same key pair decrypts to the same ak
+    other_eak = record_crypto.encrypt_ak(writer_private_key, e3db.Crypto.decode_public_key(reader_public_key), ak)
+    assert(record_crypto.decrypt_eak(reader_private_key, {'eak': other_eak, 'authorizer_public_key': {key_name: writer_public_key}}) == ak)
+
+
+def test_batch_encryption_matches_per_field_format(monkeypatch):
+    from e3db import record_crypto
+    ak = e3db.Crypto.random_key()
+    records_data = [{'a': 'first', 'b': 'second'}, {'c': 'third'}]
+    key_size = e3db.Crypto.secret_key_size()
+    nonce_size = e3db.Crypto.secret_nonce_size()
+    randomness = os.urandom(3 * (key_size + 2 * nonce_size))
+    monkeypatch.setattr(e3db.Crypto, 'random_bytes', classmethod(lambda cls, size: randomness[:size]))
+
+    encrypted = record_crypto.encrypt_records_data(ak, records_data)
+
+    # encrypt the same fields one at a time, with the same keys and nonces
+    offset = 0
+    for data, encrypted_data in zip(records_data, encrypted):
+        assert(list(encrypted_data.keys()) == list(data.keys()))
+        for key, value in data.items():
+            dk = randomness[offset:offset + key_size]
+            edkN = randomness[offset + key_size:offset + key_size + nonce_size]
+            efN = randomness[offset + key_size + nonce_size:offset + key_size + 2 * nonce_size]
+            offset += key_size + 2 * nonce_size
+            edk = e3db.Crypto.encrypt_secret(ak, dk, edkN)[len(edkN):]
+            ef = e3db.Crypto.encrypt_secret(dk, e3db.Crypto.to_bytes(value), efN)[len(efN):]
+            expected = ".".join([e3db.Crypto.base64encode(c).decode("utf-8") for c in [edk, edkN, ef, efN]])
+            assert(encrypted_data[key] == expected)
+        assert(record_crypto.decrypt_record_data(ak, encrypted_data) == data)
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_crypto_executor_round_trip(use_processes):
+    from e3db import record_crypto
+    ak = e3db.Crypto.random_key()
+    # one large record and several small ones, so single records are split
+    records_data = [{'field{0}'.format(i): 'value{0}'.format(i) for i in range(40)}] + [{'a': 'b', 'c': 'd'}] * 5
+    executor = e3db.CryptoExecutor(max_workers=4, use_processes=use_processes, threshold=8)
+    try:
+        encrypted = executor.encrypt(ak, records_data)
+        assert([list(data.keys()) for data in encrypted] == [list(data.keys()) for data in records_data])
+        assert([record_crypto.decrypt_record_data(ak, data) for data in encrypted] == records_data)
+        assert(executor.decrypt([(ak, data) for data in encrypted]) == records_data)
+    finally:
+        executor.shutdown()
+
+
+def test_crypto_executor_inline_below_threshold():
+    ak = e3db.Crypto.random_key()
+    executor = e3db.CryptoExecutor(max_workers=2, threshold=10)
+    executor.shutdown()
+    # a shut down pool rejects work, so this only succeeds inline
+    encrypted = executor.encrypt(ak, [{'a': 'b'}])
+    assert(executor.decrypt([(ak, encrypted[0])]) == [{'a': 'b'}])
+
+
+def test_lazy_record_decrypts_fields_on_read():
+    from e3db import record_crypto
+    ak = e3db.Crypto.random_key()
+    data = {'a': 'first', 'b': 'second', 'c': 'third'}
+    decrypted = []
+
+    def decrypt_field(value):
+        decrypted.append(value)
+        return record_crypto.decrypt_field(ak, value)
+
+    record = e3db.types.LazyRecord(None, record_crypto.encrypt_record_data(ak, data), decrypt_field)
+    assert(isinstance(record, e3db.types.Record))
+    assert(sorted(record.data.keys()) == ['a', 'b', 'c'])
+    assert(len(decrypted) == 0)
+    assert(record.data['b'] == 'second')
+    assert(record.data['b'] == 'second')
+    assert(len(decrypted) == 1)
+    assert(record.data.encrypted_count == 2)
+    assert(record.materialize().data == data)
+    assert(len(decrypted) == 3)
+
+
+def test_file_encryptor_repeats_ciphertext(tmp_path):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    from e3db import streams
+    plaintext_filename = str(tmp_path / "plain.bin")
+    with open(plaintext_filename, "wb") as f:
+        f.write(os.urandom(200 * 1024))
+    ak = e3db.Crypto.random_key()
+
+    produce = e3db.Crypto.file_encryptor(plaintext_filename, ak)
+    ciphertext = b''.join(produce())
+    assert(b''.join(produce()) == ciphertext)
+
+    stream = streams.ReplayStream(produce)
+    checksum, size = stream.measure()
+    assert(size == len(ciphertext) == len(stream))
+    assert(checksum == base64.b64encode(hashlib.md5(ciphertext).digest()).decode("utf-8"))
+    assert(b''.join(stream) == ciphertext)
+
+    encrypted_filename = str(tmp_path / "encrypted.bin")
+    with open(encrypted_filename, "wb") as f:
+        f.write(ciphertext)
+    destination_filename = str(tmp_path / "decrypted.bin")
+    e3db.Crypto.decrypt_file(encrypted_filename, destination_filename, ak)
+    with open(destination_filename, "rb") as f, open(plaintext_filename, "rb") as g:
+        assert(f.read() == g.read())
+
+    # the stream fails if the file changes between passes
+    with open(plaintext_filename, "ab") as f:
+        f.write(b"x")
+    stream = streams.ReplayStream(e3db.Crypto.file_encryptor(plaintext_filename, ak))
+    stream.measure()
+    with open(plaintext_filename, "ab") as f:
+        f.write(b"x")
+    with pytest.raises(e3db.CryptoError):
+        b''.join(stream)
+
+
+def test_replay_stream_stops_at_measured_length():
+    from e3db import streams
+    passes = []
+
+    def produce():
+        passes.append(True)
+        for _ in range(len(passes) + 1):
+            yield b"chunk"
+
+    stream = streams.ReplayStream(produce)
+    sent = []
+    with pytest.raises(e3db.CryptoError):
+        for chunk in stream:
+            sent.append(chunk)
+    # nothing past the measured length is sent
+    assert(b''.join(sent) == b"chunk" * 2)
+
+
+def test_file_decryptor_accepts_any_chunking(tmp_path):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    ak = e3db.Crypto.random_key()
+    plaintext_filename = str(tmp_path / "plain.bin")
+    for size in [0, 65536, 200 * 1024]:
+        plaintext = os.urandom(size)
+        with open(plaintext_filename, "wb") as f:
+            f.write(plaintext)
+        ciphertext = b''.join(e3db.Crypto.file_encryptor(plaintext_filename, ak)())
+
+        for chunk_size in [1, 4096, 100000]:
+            decryptor = e3db.Crypto.file_decryptor(ak)
+            chunks = [decryptor.update(ciphertext[i:i + chunk_size]) for i in range(0, len(ciphertext), chunk_size)]
+            chunks.append(decryptor.finish())
+            assert(b''.join(chunks) == plaintext)
+            assert(decryptor.done)
+
+        # a truncated file is rejected
+        decryptor = e3db.Crypto.file_decryptor(ak)
+        decryptor.update(ciphertext[:-1])
+        with pytest.raises(Exception):
+            decryptor.finish()
+
+
+def test_decrypting_reader_verifies_checksum(tmp_path):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    from e3db import streams
+    ak = e3db.Crypto.random_key()
+    plaintext = b"line\n" * 30000
+    plaintext_filename = str(tmp_path / "plain.bin")
+    with open(plaintext_filename, "wb") as f:
+        f.write(plaintext)
+    ciphertext = b''.join(e3db.Crypto.file_encryptor(plaintext_filename, ak)())
+    checksum = base64.b64encode(hashlib.md5(ciphertext).digest()).decode("utf-8")
+    chunks = [ciphertext[i:i + 5000] for i in range(0, len(ciphertext), 5000)]
+
+    closed = []
+    with streams.DecryptingReader(chunks, e3db.Crypto.file_decryptor(ak), checksum, on_close=lambda: closed.append(True)) as reader:
+        assert(reader.readline() == b"line\n")
+        assert(reader.read(5) == b"line\n")
+        assert(reader.read() == plaintext[10:])
+    assert(closed == [True])
+
+    reader = streams.DecryptingReader(chunks, e3db.Crypto.file_decryptor(ak), "AAAA")
+    with pytest.raises(e3db.CryptoError):
+        reader.read()
+
+
+def test_chunked_file_decrypts_chunks_independently(tmp_path):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    from e3db import chunked_file
+    ak = e3db.Crypto.random_key()
+    plaintext_filename = str(tmp_path / "plain.bin")
+    for size in [0, 4096, 10000]:
+        plaintext = os.urandom(size)
+        with open(plaintext_filename, "wb") as f:
+            f.write(plaintext)
+        ciphertext = b''.join(e3db.Crypto.file_encryptor(plaintext_filename, ak, chunk_size=4096)())
+
+        for chunk_size in [1, 5000]:
+            decryptor = e3db.Crypto.file_decryptor(ak)
+            chunks = [decryptor.update(ciphertext[i:i + chunk_size]) for i in range(0, len(ciphertext), chunk_size)]
+            chunks.append(decryptor.finish())
+            assert(b''.join(chunks) == plaintext)
+
+        header = chunked_file.ChunkedHeader.parse(e3db.Crypto, ak, ciphertext)
+        assert(header.plaintext_size(e3db.Crypto, len(ciphertext)) == size)
+        final = header.chunk_count(e3db.Crypto, len(ciphertext)) - 1
+        start = header.chunk_offset(e3db.Crypto, final)
+        assert(header.decrypt_chunk(e3db.Crypto, final, ciphertext[start:], True) == plaintext[final * 4096:])
+
+    # chunks cannot be moved, truncated at a chunk boundary, or altered
+    first = ciphertext[header.chunk_offset(e3db.Crypto, 0):header.chunk_offset(e3db.Crypto, 1)]
+    with pytest.raises(e3db.CryptoError):
+        header.decrypt_chunk(e3db.Crypto, 1, first, False)
+    with pytest.raises(e3db.CryptoError):
+        header.decrypt_chunk(e3db.Crypto, 0, first, True)
+    decryptor = e3db.Crypto.file_decryptor(ak)
+    decryptor.update(ciphertext[:header.chunk_offset(e3db.Crypto, 2)])
+    with pytest.raises(e3db.CryptoError):
+        decryptor.finish()
+    altered = bytearray(ciphertext)
+    altered[-1] ^= 1
+    decryptor = e3db.Crypto.file_decryptor(ak)
+    decryptor.update(bytes(altered))
+    with pytest.raises(e3db.CryptoError):
+        decryptor.finish()
+
+
+def test_chunked_header_rejects_corrupt_fields():
+    from e3db import chunked_file
+    ak = e3db.Crypto.random_key()
+    header = chunked_file.ChunkedHeader.create(e3db.Crypto, ak, 4096)
+    version, edk, edkN, chunk_size, nonce_prefix, _ = header.raw.split(b'.')
+    for fields in [[b'x', edk, edkN, chunk_size, nonce_prefix],
+                   [version, edk, edkN, b'4k', nonce_prefix],
+                   [version, edk, edkN, chunk_size, b'!'],
+                   [version, edkN, edk, chunk_size, nonce_prefix]]:
+        with pytest.raises(e3db.CryptoError):
+            chunked_file.ChunkedHeader.parse(e3db.Crypto, ak, b'.'.join(fields) + b'.')
+    decryptor = e3db.Crypto.file_decryptor(ak)
+    with pytest.raises(e3db.CryptoError):
+        decryptor.update(b'.'.join([version, edk, edkN, b'4k', nonce_prefix]) + b'.')
+
+
+def test_file_compression_round_trip(tmp_path):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    from e3db import compression
+    ak = e3db.Crypto.random_key()
+    plaintext = b'{"level": "info", "msg": "request handled"}\n' * 20000
+    plaintext_filename = str(tmp_path / "plain.log")
+    with open(plaintext_filename, "wb") as f:
+        f.write(plaintext)
+
+    for chunk_size in [None, 4096]:
+        produce = e3db.Crypto.file_encryptor(plaintext_filename, ak, chunk_size, compression.ZLIB)
+        ciphertext = b''.join(produce())
+        assert(b''.join(produce()) == ciphertext)
+        assert(len(ciphertext) < len(plaintext) // 10)
+        decryptor = e3db.Crypto.file_decryptor(ak, compression.ZLIB)
+        chunks = [decryptor.update(ciphertext[i:i + 1000]) for i in range(0, len(ciphertext), 1000)]
+        chunks.append(decryptor.finish())
+        assert(b''.join(chunks) == plaintext)
+
+    assert(compression.choose(io.BytesIO(plaintext))[0] in (compression.ZLIB, compression.ZSTD))
+    random_bytes = os.urandom(10000)
+    assert(compression.choose(io.BytesIO(random_bytes)) == (compression.RAW, random_bytes))
+    with pytest.raises(ValueError):
+        compression.check('lz4')
+
+
+@pytest.mark.parametrize("codec", ['zlib', 'zstd'])
+def test_decompressed_output_is_bounded(tmp_path, codec):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    from e3db import compression, streams
+    if codec == compression.ZSTD and compression.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    ak = e3db.Crypto.random_key()
+    plaintext_filename = str(tmp_path / "zeros.bin")
+    with open(plaintext_filename, "wb") as f:
+        f.write(bytes(16 * compression.MAX_OUTPUT_SIZE))
+    ciphertext = b''.join(e3db.Crypto.file_encryptor(plaintext_filename, ak, None, codec)())
+
+    # the whole file decrypts from one chunk, but is returned in pieces
+    decryptor = e3db.Crypto.file_decryptor(ak, codec)
+    pieces = list(compression.drain(decryptor, decryptor.update(ciphertext)))
+    pieces += list(compression.drain(decryptor, decryptor.finish()))
+    assert(max(len(piece) for piece in pieces) <= compression.MAX_OUTPUT_SIZE)
+    assert(sum(len(piece) for piece in pieces) == 16 * compression.MAX_OUTPUT_SIZE)
+
+    reader = streams.DecryptingReader(iter([ciphertext]), e3db.Crypto.file_decryptor(ak, codec))
+    assert(len(reader.read1()) <= compression.MAX_OUTPUT_SIZE)
+    assert(len(reader.read1()) <= compression.MAX_OUTPUT_SIZE)
+
+
+@pytest.mark.parametrize("codec", ['zlib', 'zstd'])
+def test_decompressed_content_cut_short(codec):
+    from e3db import compression
+    if codec == compression.ZSTD and compression.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    plaintext = bytes(4 * compression.MAX_OUTPUT_SIZE)
+    if codec == compression.ZLIB:
+        compressed = zlib.compress(plaintext)
+    else:
+        compressed = compression.zstandard.ZstdCompressor().compress(plaintext)
+
+    class PassThrough(object):
+        done = False
+
+        def update(self, data):
+            return data
+
+        def finish(self):
+            return b''
+
+    decryptor = compression.DecompressingDecryptor(PassThrough(), codec)
+    list(compression.drain(decryptor, decryptor.update(compressed[:-4])))
+    with pytest.raises(e3db.CryptoError):
+        list(compression.drain(decryptor, decryptor.finish()))
+
+
+@pytest.mark.parametrize("direct", [True, False])
+def test_secretstream_bindings_fallback(tmp_path, monkeypatch, direct):
+    from e3db import sodium_crypto
+    from e3db.sodium_crypto import SodiumCrypto
+    if direct and not sodium_crypto.DIRECT_SECRETSTREAM:
+        pytest.skip("PyNaCl's CFFI module is not available")
+    ak = SodiumCrypto.random_key()
+    plaintext = os.urandom(200 * 1024)
+    plaintext_filename = str(tmp_path / "plain.bin")
+    with open(plaintext_filename, "wb") as f:
+        f.write(plaintext)
+    # files written through one path read back through the other
+    monkeypatch.setattr(sodium_crypto, "DIRECT_SECRETSTREAM", direct)
+    ciphertext = b''.join(SodiumCrypto.file_encryptor(plaintext_filename, ak)())
+    monkeypatch.setattr(sodium_crypto, "DIRECT_SECRETSTREAM", not direct and sodium_crypto._direct_secretstream())
+    decryptor = SodiumCrypto.file_decryptor(ak)
+    assert(decryptor.update(ciphertext) + decryptor.finish() == plaintext)
+
+    monkeypatch.setattr(sodium_crypto, "DIRECT_SECRETSTREAM", direct)
+    tampered = bytearray(ciphertext)
+    tampered[-1] ^= 1
+    decryptor = SodiumCrypto.file_decryptor(ak)
+    with pytest.raises(e3db.CryptoError):
+        decryptor.update(bytes(tampered))
+        decryptor.finish()
+
+
+def test_decrypt_file_maps_windows(tmp_path, monkeypatch):
+    if crypto_mode() != 'sodium':
+        pytest.skip("Skipping Libsodium-reliant test")
+    import mmap
+    from e3db import streams, base_crypto
+    monkeypatch.setattr(streams, "MAP_WINDOW_SIZE", mmap.ALLOCATIONGRANULARITY * 4)
+    ak = e3db.Crypto.random_key()
+    plaintext_filename = str(tmp_path / "plain.bin")
+    destination_filename = str(tmp_path / "decrypted.bin")
+    for size in [0, 65536, 300 * 1024 + 7]:
+        plaintext = os.urandom(size)
+        with open(plaintext_filename, "wb") as f:
+            f.write(plaintext)
+        for chunk_size in [None, 4096]:
+            encrypted_filename, _, _ = e3db.Crypto.encrypt_file(plaintext_filename, ak, chunk_size)
+            try:
+                for read_size in [1000, base_crypto.FILE_READ_SIZE]:
+                    e3db.Crypto.decrypt_file(encrypted_filename, destination_filename, ak, read_size=read_size)
+                    with open(destination_filename, "rb") as f:
+                        assert(f.read() == plaintext)
+            finally:
+                os.remove(encrypted_filename)
+
+
+def test_nist_file_round_trip(tmp_path):
+    from e3db.nist_crypto import NistCrypto
+    from e3db.sodium_crypto import SodiumCrypto
+    ak = NistCrypto.random_key()
+    plaintext_filename = str(tmp_path / "plain.bin")
+    destination_filename = str(tmp_path / "decrypted.bin")
+    for size in [0, 4096, 10000]:
+        plaintext = os.urandom(size)
+        with open(plaintext_filename, "wb") as f:
+            f.write(plaintext)
+        encrypted_filename, checksum, length = NistCrypto.encrypt_file(plaintext_filename, ak, chunk_size=4096)
+        try:
+            with open(encrypted_filename, "rb") as f:
+                ciphertext = f.read()
+            assert(ciphertext.startswith(b"4."))
+            assert(length == len(ciphertext))
+            NistCrypto.decrypt_file(encrypted_filename, destination_filename, ak)
+            with open(destination_filename, "rb") as f:
+                assert(f.read() == plaintext)
+        finally:
+            os.remove(encrypted_filename)
+
+    # a truncated file is rejected
+    decryptor = NistCrypto.file_decryptor(ak)
+    decryptor.update(ciphertext[:-16 - 10000 % 4096])
+    with pytest.raises(e3db.CryptoError):
+        decryptor.finish()
+
+    # the stream format of the Sodium suite is not read
+    sodium_ak = SodiumCrypto.random_key()
+    ciphertext = b''.join(SodiumCrypto.file_encryptor(plaintext_filename, sodium_ak)())
+    with pytest.raises(e3db.CryptoError):
+        NistCrypto.file_decryptor(ak).update(ciphertext)
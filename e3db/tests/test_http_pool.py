@@ -0,0 +1,69 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import e3db
+from e3db.http_pool import HTTPPool
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connection_headers = []
+
+    def do_GET(self):
+        self.connection_headers.append(self.headers.get("Connection"))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{0}".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused(server_url):
+    pool = HTTPPool(pool_maxsize=2)
+    for _ in range(5):
+        response = pool.api.get(server_url + "/v1/ping")
+        assert(response.json() == {'ok': True})
+    stats = pool.stats()
+    assert(stats['api']['requests'] == 5)
+    assert(stats['api']['connections_opened'] == 1)
+    assert(stats['storage']['requests'] == 0)
+    pool.close()
+
+
+def test_keep_alive_disabled(server_url):
+    pool = HTTPPool(keep_alive=False)
+    for _ in range(3):
+        pool.storage.get(server_url + "/file")
+    stats = pool.stats()
+    assert(stats['storage']['requests'] == 3)
+    assert(KeepAliveHandler.connection_headers[-3:] == ['close'] * 3)
+    pool.close()
+
+
+def test_default_pool_is_shared():
+    assert(HTTPPool.default() is HTTPPool.default())
+
+
+def test_client_owns_pool():
+    public_key, private_key = e3db.Client.generate_keypair()
+    config = e3db.Config("client-id", "key-id", "secret", public_key, private_key, api_url="http://127.0.0.1:1")
+    pool = HTTPPool()
+    client = e3db.Client(config(), http_pool=pool)
+    assert(client.http_pool is pool)
+    assert(client.e3db_auth.session is pool.api)
+    assert(client.pool_stats()['api']['requests'] == 0)
+    assert(e3db.Client(config()).http_pool is not pool)
@@ -7,7 +7,9 @@ import time
 import e3db.types
 import hashlib
 import json
+import requests
 import sys
+import io
 
 token = os.environ["REGISTRATION_TOKEN"]
 api_url = os.environ["DEFAULT_API_URL"]
@@ -286,6 +288,42 @@ class TestIntegrationClient():
         assert(record2.to_json()['data']['time'] == test_time)
         assert(record2.to_json()['data'] == data)
 
+    def test_write_many_then_read(self):
+        """
+        Test client1 can write many records in one call, getting results back
+        in input order, with a per item error for invalid input.
+        """
+        record_type = "test_write_many_{0}".format(binascii.hexlify(os.urandom(8)).decode("utf-8"))
+        items = [({'n': str(i)}, {'index': str(i)}) for i in range(25)]
+        items[3] = "not a record"
+
+        results = list(self.client1.write_many(record_type, items, concurrency=4))
+
+        assert([r.index for r in results] == list(range(25)))
+        assert(not results[3].ok)
+        assert(results[3].record is None)
+        for result in results[:3] + results[4:]:
+            assert(result.ok)
+            assert(result.record.meta.plain == {'index': str(result.index)})
+            assert(self.client1.read(result.record.meta.record_id).data == {'n': str(result.index)})
+
+    def test_read_many(self):
+        """
+        Test client1 can read many records in one call, in input order, with
+        missing records reported instead of raised.
+        """
+        records = [self.client1.write('test_result', {'n': str(i)}) for i in range(5)]
+        record_ids = [r.meta.record_id for r in records]
+        missing_id = str(uuid4())
+
+        results = self.client1.read_many(record_ids[:2] + [missing_id] + record_ids[2:])
+
+        assert(len(results) == 6)
+        assert(not results[2].ok)
+        assert(isinstance(results[2].error, e3db.APIError))
+        data = [r.record.data['n'] for r in results if r.ok]
+        assert(data == [str(i) for i in range(5)])
+
     def test_write_update_read_record(self):
         """
         Test client1 can write a record, update it, then read it back.
@@ -665,6 +703,69 @@ class TestIntegrationClient():
         for record in records:
             self.client1.delete(record.meta.record_id, record.meta.version)
 
+    def test_query_iter(self):
+        """
+        Test that query_iter follows last_index across every page
+        """
+        record_type = "test_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = {
+            'time': str(time.time())
+        }
+        records = [self.client1.write(record_type, data) for _ in range(6)]
+
+        query_iter = self.client1.query_iter(record_type=[record_type], page_size=5)
+        results = list(query_iter)
+
+        assert(sorted(r.meta.record_id for r in results) == sorted(r.meta.record_id for r in records))
+        assert(all(r.data == data for r in results))
+        assert(query_iter.records_returned == 6)
+        assert(query_iter.last_index != 0)
+
+        # Clean up by deleting these records
+        for record in records:
+            self.client1.delete(record.meta.record_id, record.meta.version)
+
+    def test_query_lazy(self):
+        """
+        Test that lazy query results decrypt fields as they are read
+        """
+        record_type = "test_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = {
+            'time': str(time.time()),
+            'name': 'lazy'
+        }
+        record = self.client1.write(record_type, data)
+
+        results = list(self.client1.query(record_type=[record_type], lazy=True))
+        assert(len(results) == 1)
+        assert(results[0].data.encrypted_count == 2)
+        assert(results[0].data['name'] == 'lazy')
+        assert(results[0].data.encrypted_count == 1)
+        assert(results[0].materialize().data == data)
+
+        # Clean up by deleting this record
+        self.client1.delete(record.meta.record_id, record.meta.version)
+
+    def test_read_fields(self):
+        """
+        Test that read and query only return the requested fields
+        """
+        record_type = "test_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = {
+            'time': str(time.time()),
+            'name': 'projected',
+            'other': 'dropped'
+        }
+        record = self.client1.write(record_type, data)
+
+        read = self.client1.read(record.meta.record_id, fields=['name', 'missing'])
+        assert(read.data == {'name': 'projected'})
+        results = list(self.client1.query(record_type=[record_type], fields=['time', 'name']))
+        assert(results[0].data == {'time': data['time'], 'name': 'projected'})
+
+        # Clean up by deleting this record
+        self.client1.delete(record.meta.record_id, record.meta.version)
+
     def test_authorizer(self):
         """
         Test that Client 1 can authorize Client 2 and Client 2 can share with
@@ -860,6 +961,123 @@ class TestIntegrationClient():
 
         assert(pre_encrypt_md5 == post_decrypt_md5)
 
+    def test_large_file_write_low_io(self):
+        """
+        Test that files uploaded with low_io, both spooled in memory and
+        streamed in two passes, download and decrypt to the same contents
+        """
+        record_type = "record_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        plaintext_filename = "{0}.txt".format(record_type)
+        decrypted_plaintext_filename = "decrypted-{0}.txt".format(record_type)
+        with open(plaintext_filename, "wb+") as f:
+            f.write(os.urandom(1024 * 1024))
+
+        with open(plaintext_filename, 'rb') as f:
+            pre_encrypt_md5 = hashlib.md5(f.read()).hexdigest()
+
+        for spool_size in [e3db.Client.DEFAULT_FILE_SPOOL_SIZE, 1024]:
+            encrypted_file_meta = self.client1.write_file(record_type, plaintext_filename, low_io=True, spool_size=spool_size)
+            self.client1.read_file(encrypted_file_meta.record_id, decrypted_plaintext_filename)
+            with open(decrypted_plaintext_filename, 'rb') as f:
+                assert(hashlib.md5(f.read()).hexdigest() == pre_encrypt_md5)
+
+        # clean up local files
+        os.remove(plaintext_filename)
+        os.remove(decrypted_plaintext_filename)
+
+    def test_write_bytes_open_file(self):
+        """
+        Test that bytes and file-like objects can be uploaded, and read back
+        as a decrypting stream without local files
+        """
+        record_type = "record_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = os.urandom(512 * 1024)
+
+        encrypted_file_meta = self.client1.write_bytes(record_type, data, {'kind': 'bytes'})
+        with self.client1.open_file(encrypted_file_meta.record_id) as f:
+            assert(f.file_info.plain == {'kind': 'bytes'})
+            assert(f.read() == data)
+
+        encrypted_file_meta = self.client1.write_file_obj(record_type, io.BytesIO(data))
+        with self.client1.open_file(encrypted_file_meta.record_id) as f:
+            assert(b''.join(iter(lambda: f.read(1000), b'')) == data)
+
+    def test_read_file_range(self):
+        """
+        Test that ranges of chunked and stream encrypted files read back
+        """
+        record_type = "record_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = os.urandom(300 * 1024)
+
+        chunked = self.client1.write_bytes(record_type, data, chunk_size=64 * 1024)
+        stream = self.client1.write_bytes(record_type, data)
+        for record_id in [chunked.record_id, stream.record_id]:
+            assert(self.client1.read_file_range(record_id, 0, 10) == data[:10])
+            assert(self.client1.read_file_range(record_id, 65530, 100000) == data[65530:165530])
+            assert(self.client1.read_file_range(record_id, len(data) - 10, 100) == data[-10:])
+        with self.client1.open_file(chunked.record_id) as f:
+            assert(f.read() == data)
+
+    def test_read_file_resume(self):
+        """
+        Test that a resumable download continues from its checkpoint, and
+        removes it once the file is decrypted
+        """
+        record_type = "record_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = os.urandom(300 * 1024)
+        encrypted_file_meta = self.client1.write_bytes(record_type, data)
+        destination = "resume_{0}.bin".format(binascii.hexlify(os.urandom(8)))
+        try:
+            file_info = self.client1.read_file(encrypted_file_meta.record_id, destination)
+            ciphertext = requests.get(file_info.file_url).content
+            # leave half of the file checkpointed, as a broken download would
+            half = len(ciphertext) // 2
+            with open(destination + ".part", "wb") as f:
+                f.write(ciphertext[:half] + b'unsynced'.ljust(len(ciphertext) - half, b'\0'))
+            with open(destination + ".part.json", "w") as f:
+                json.dump({'record_id': str(file_info.record_id), 'checksum': file_info.checksum,
+                           'size': file_info.size, 'segments': [[half, len(ciphertext)]]}, f)
+            self.client1.read_file(encrypted_file_meta.record_id, destination, resume=True)
+            with open(destination, "rb") as f:
+                assert(f.read() == data)
+            assert(not os.path.exists(destination + ".part"))
+            assert(not os.path.exists(destination + ".part.json"))
+        finally:
+            os.remove(destination)
+
+    def test_read_file_parallel(self):
+        """
+        Test that a file downloaded as concurrent ranges decrypts
+        """
+        record_type = "record_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = os.urandom(300 * 1024)
+        encrypted_file_meta = self.client1.write_bytes(record_type, data)
+        destination = "parallel_{0}.bin".format(binascii.hexlify(os.urandom(8)))
+        self.client1.MIN_DOWNLOAD_SEGMENT = 64 * 1024
+        try:
+            self.client1.read_file(encrypted_file_meta.record_id, destination, max_connections=4)
+            with open(destination, "rb") as f:
+                assert(f.read() == data)
+            assert(not os.path.exists(destination + ".part"))
+        finally:
+            del self.client1.MIN_DOWNLOAD_SEGMENT
+            os.remove(destination)
+
+    def test_write_file_compressed(self):
+        """
+        Test that compressed files record their codec, and read back
+        decompressed
+        """
+        record_type = "record_type_{0}".format(binascii.hexlify(os.urandom(16)))
+        data = b'{"level": "info", "msg": "request handled"}\n' * 20000
+
+        encrypted_file_meta = self.client1.write_bytes(record_type, data, compression='zlib')
+        assert(encrypted_file_meta.compression == 'zlib')
+        assert(encrypted_file_meta.size < len(data) // 10)
+        with self.client1.open_file(encrypted_file_meta.record_id) as f:
+            assert(f.read() == data)
+        assert(self.client1.read_file_range(encrypted_file_meta.record_id, 1000, 10) == data[1000:1010])
+
     def test_large_file_share(self):
         """
         Test that Client 1 can upload a large file
@@ -0,0 +1,34 @@
+import gc
+import threading
+import time
+import e3db
+from e3db.iterators import SearchIterator
+
+
+def endless_search_page(query):
+    next_token = (query.next_token or 0) + 1
+    return {'results': [next_token], 'last_index': next_token, 'total_results': None, 'search_id': None}
+
+
+def prefetch_threads():
+    return [t for t in threading.enumerate() if t.name == SearchIterator.THREAD_NAME]
+
+
+def test_abandoned_iterator_stops_fetching():
+    search_iter = SearchIterator(endless_search_page, lambda result: result, e3db.types.Search())
+    for result in search_iter:
+        break
+    assert(len(prefetch_threads()) == 1)
+
+    del search_iter
+    gc.collect()
+    deadline = time.monotonic() + 5
+    while prefetch_threads() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert(prefetch_threads() == [])
+
+
+def test_closed_iterator_stops_fetching():
+    with SearchIterator(endless_search_page, lambda result: result, e3db.types.Search(), prefetch=2) as search_iter:
+        assert([next(search_iter) for _ in range(3)] == [1, 2, 3])
+    assert(prefetch_threads() == [])
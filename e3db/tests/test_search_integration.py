@@ -1,6 +1,8 @@
 import e3db
 import os
 import binascii
+import gc
+import threading
 import pytest
 import time
 import e3db.types as types
@@ -370,6 +372,41 @@ class TestSearchIntegration():
         assert(results.next_token == 0)
         assert(results.total_results == 5)
 
+    def test_v2_search_iter(self):
+        q = e3db.types.Search(count=2).match(condition="AND", record_types=[self.pag_record_type], writers=[self.client2.client_id])
+        search_iter = self.client2.search_iter(q)
+        records = list(search_iter)
+        assert(len(records) == 5)
+        assert(len(set(r.meta.record_id for r in records)) == 5)
+        assert(search_iter.pages_fetched == 3)
+        assert(search_iter.total_results == 5)
+        assert(search_iter.next_token == 0)
+        # the query passed in is not advanced
+        assert(q.next_token == 0)
+
+    def test_v2_search_iter_abandoned(self):
+        q = e3db.types.Search(count=1).match(condition="AND", record_types=[self.pag_record_type], writers=[self.client2.client_id])
+        search_iter = self.client2.search_iter(q)
+        for record in search_iter:
+            break
+        del search_iter
+        gc.collect()
+        deadline = time.time() + 5
+        while any(t.name == e3db.iterators.PrefetchIterator.THREAD_NAME for t in threading.enumerate()) and time.time() < deadline:
+            time.sleep(0.01)
+        assert(not any(t.name == e3db.iterators.PrefetchIterator.THREAD_NAME for t in threading.enumerate()))
+
+    def test_v2_search_all(self):
+        q = e3db.types.Search(count=2).match(condition="AND", record_types=[self.pag_record_type], writers=[self.client2.client_id])
+        end = datetime.now(timezone.utc) + timedelta(minutes=5)
+        start = end - timedelta(days=1)
+        records = list(self.client2.search_all(q, start, end, max_workers=2, ordered=True))
+        assert(len(records) == 5)
+        assert(len(set(r.meta.record_id for r in records)) == 5)
+        assert([r.meta.created for r in records] == sorted(r.meta.created for r in records))
+        # the query passed in is not given a range
+        assert(q.range_filter is None)
+
     def test_v2_meta_query(self):
         q = e3db.types.Search().match(plain={'hello':'toznians',
                                             'regexp':'toznywebsite',
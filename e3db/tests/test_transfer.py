@@ -0,0 +1,67 @@
+import threading
+import time
+from uuid import uuid4
+import pytest
+import e3db
+from e3db.types import File
+
+
+class StubClient(object):
+    """
+    Client whose file transfers only sleep, recording how many overlap.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def __transfer(self, name, size):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.01)
+            if name == "missing":
+                raise IOError("File not found: missing")
+            return File("checksum", "raw", size, str(uuid4()), str(uuid4()), "type", record_id=str(uuid4()))
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def write_file(self, record_type, plaintext_filename, plain={}, low_io=False, compression='raw'):
+        return self.__transfer(plaintext_filename, 100)
+
+    def read_file(self, record_id, destination_filename):
+        return self.__transfer(destination_filename, 200)
+
+
+def test_uploads_bounded_and_reported_in_order():
+    client = StubClient()
+    completed = []
+    manager = e3db.TransferManager(client, max_workers=3, on_complete=completed.append)
+    items = [("type", "file{0}".format(i)) for i in range(10)] + [("type", "missing", {"a": "b"})]
+
+    report = manager.upload(iter(items))
+
+    assert(client.max_active <= 3)
+    assert([r.index for r in report.results] == list(range(11)))
+    assert(len(completed) == 11)
+    assert([r.index for r in report.failures] == [10])
+    assert(isinstance(report.failures[0].error, IOError))
+    assert(report.bytes == 1000)
+    assert(len(report.latencies) == 10)
+    assert(all(latency > 0 for latency in report.latencies))
+    assert(report.bytes_per_second > 0)
+
+
+def test_downloads_reported():
+    manager = e3db.TransferManager(StubClient(), max_workers=2)
+    report = manager.download([(str(uuid4()), "dest{0}".format(i)) for i in range(4)])
+    assert(report.failures == [])
+    assert(report.bytes == 800)
+
+
+def test_max_workers_validated():
+    with pytest.raises(ValueError):
+        e3db.TransferManager(StubClient(), max_workers=0)
@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
+from .types import TransferResult, TransferReport
+
+
+class TransferManager(object):
+    """
+    Uploads or downloads many files with a bounded number of transfers in
+    flight.
+
+    Each worker thread runs the whole pipeline of one file, so while one file
+    is being encrypted or decrypted others are waiting on the network, and
+    the crypto libraries release the GIL while they work. Files are read from
+    their sources lazily, so very long batches do not queue every file at
+    once.
+
+    The HTTP connection pools of the client should hold at least
+    `max_workers` connections, see e3db.HTTPPool.
+    """
+    DEFAULT_MAX_WORKERS = 8
+
+    def __init__(self, client, max_workers=DEFAULT_MAX_WORKERS, low_io=False, on_complete=None, clock=time.monotonic, compression='raw'):
+        """
+        Initialize the TransferManager class.
+
+        Parameters
+        ----------
+        client : e3db.Client
+            Client used for every transfer
+
+        max_workers : int
+            Number of files transferred at the same time. Optional.
+
+        low_io : bool
+            Whether uploads avoid writing the ciphertext to disk, as for
+            e3db.Client.write_file. Optional.
+
+        on_complete : callable
+            Called with each e3db.types.TransferResult as soon as its file is
+            done, on the thread that started the batch. Optional.
+
+        clock : callable
+            Returns the current time in seconds. Optional.
+
+        compression : str
+            Compression of uploads, 'raw', 'zlib', 'zstd' or 'auto', as for
+            e3db.Client.write_file. Optional.
+
+        Returns
+        -------
+        None
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1. Given: {0}".format(max_workers))
+        self.client = client
+        self.max_workers = max_workers
+        self.low_io = low_io
+        self.compression = compression
+        self.on_complete = on_complete
+        self.__clock = clock
+
+    def upload(self, items):
+        """
+        Encrypt and upload many files.
+
+        Parameters
+        ----------
+        items : iterable<tuple>
+            (record_type, plaintext_filename) or
+            (record_type, plaintext_filename, plain) for each file
+
+        Returns
+        -------
+        e3db.types.TransferReport
+            Result of each file, in input order, with aggregate throughput.
+            Files that failed have the error set rather than raising.
+        """
+        return self.__run(items, self.__upload_one)
+
+    def download(self, items):
+        """
+        Download and decrypt many files.
+
+        Parameters
+        ----------
+        items : iterable<tuple>
+            (record_id, destination_filename) for each file
+
+        Returns
+        -------
+        e3db.types.TransferReport
+            Result of each file, in input order, with aggregate throughput.
+            Files that failed have the error set rather than raising.
+        """
+        return self.__run(items, self.__download_one)
+
+    def __upload_one(self, item):
+        if len(item) == 3:
+            record_type, plaintext_filename, plain = item
+        else:
+            (record_type, plaintext_filename), plain = item, {}
+        return self.client.write_file(record_type, plaintext_filename, plain, low_io=self.low_io, compression=self.compression)
+
+    def __download_one(self, item):
+        record_id, destination_filename = item
+        return self.client.read_file(record_id, destination_filename)
+
+    def __timed(self, index, work, item):
+        """
+        Private method run on a worker, transferring one file.
+
+        Parameters
+        ----------
+        index : int
+            Position of the file in the input
+
+        work : callable
+            Called with the item, returning the e3db.File transferred
+
+        item : tuple
+            Input describing the file
+
+        Returns
+        -------
+        e3db.types.TransferResult
+            Outcome of the transfer
+        """
+        start = self.__clock()
+        try:
+            file = work(item)
+        except Exception as e:
+            return TransferResult(index, error=e, seconds=self.__clock() - start)
+        return TransferResult(index, file=file, seconds=self.__clock() - start)
+
+    def __run(self, items, work):
+        """
+        Private method transferring every item with at most max_workers in
+        flight.
+
+        Parameters
+        ----------
+        items : iterable<tuple>
+            Input describing each file
+
+        work : callable
+            Called on a worker with each item, returning the e3db.File
+            transferred
+
+        Returns
+        -------
+        e3db.types.TransferReport
+            Results and aggregate throughput
+        """
+        start = self.__clock()
+        results = []
+        pending = set()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for index, item in enumerate(items):
+                if len(pending) >= self.max_workers:
+                    pending = self.__collect(pending, results)
+                pending.add(executor.submit(self.__timed, index, work, item))
+            while pending:
+                pending = self.__collect(pending, results)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+        results.sort(key=lambda r: r.index)
+        return TransferReport(results, self.__clock() - start)
+
+    def __collect(self, pending, results):
+        """
+        Private method waiting for at least one transfer to finish.
+
+        Parameters
+        ----------
+        pending : set<concurrent.futures.Future>
+            Transfers in flight
+
+        results : list<e3db.types.TransferResult>
+            Finished results, appended to
+
+        Returns
+        -------
+        set<concurrent.futures.Future>
+            Transfers still in flight
+        """
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            results.append(result)
+            if self.on_complete is not None:
+                self.on_complete(result)
+        return pending
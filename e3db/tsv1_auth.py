@@ -41,12 +41,32 @@ class E3DBTSV1Auth(AuthBase):
         requests.Request
             Request with authentication headers set with signature. 
         """
+        r.headers[self.AUTHORIZATION_HEADER] = self.authorization_header(r.method, r.url)
+        return r
+
+    def authorization_header(self, method: str, url: str) -> str:
+        """
+        Generate a fresh TSV1 authorization header value for a request. Used by
+        HTTP clients that do not accept a requests auth object.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request
+
+        url : str
+            Full url of the request, including any query parameters
+
+        Returns
+        -------
+        str
+            Authorization header value
+        """
         if self.public_signing_key == "":
             raise RuntimeError("Cannot make a tsv1 request without a signing key.")
         timestamp = int(time.time())
         nonce = str(uuid.uuid4())
-        self.create_tsv1_signature(r, self.public_b64, self.private_b64_decoded, self.client_id, nonce, timestamp)
-        return r
+        return self.tsv1_header(method, url, self.public_b64, self.private_b64_decoded, self.client_id, nonce, timestamp)
 
     @classmethod
     def create_tsv1_signature(self, r: requests.models.PreparedRequest, public_b64: str, private_b64_decoded: bytes, client_id: str, nonce: str, timestamp: int):
@@ -66,18 +86,40 @@ class E3DBTSV1Auth(AuthBase):
         None
         """
 
+        r.headers[self.AUTHORIZATION_HEADER] = self.tsv1_header(r.method, r.url, public_b64, private_b64_decoded, client_id, nonce, timestamp)
+
+    @classmethod
+    def tsv1_header(self, method: str, url: str, public_b64: str, private_b64_decoded: bytes, client_id: str, nonce: str, timestamp: int) -> str:
+        """
+        Creates a TSV1 Signature and returns it as an authorization header value.
+
+        Parameters
+        ----------
+        method : str
+
+        url : str
+
+        nonce : UUID
+
+        timestamp : int
+
+        Returns
+        -------
+        str
+        """
+
         # Generate header values
         header_string = f"{self.AUTHENTICATION_METHOD}; {public_b64}; {timestamp}; {nonce}; uid:{client_id}"
         
         # Parse and sort query parameters
-        url_components = urlparse(r.url)
+        url_components = urlparse(url)
         query_components = parse_qsl(url_components.query, keep_blank_values=True)
         query_components.sort()
         query_string = urlencode(query_components)
 
         call_path = url_components.path
 
-        call_method = r.method
+        call_method = method
 
         # Hash header values
         string_to_hash = f"{call_path}; {query_string}; {call_method}; {header_string}"
@@ -88,5 +130,4 @@ class E3DBTSV1Auth(AuthBase):
         signature_b64 = BaseCrypto.base64encode(full_signature).decode("utf-8")
 
         # Add authorization headers to request
-        auth_header = f"{header_string}; {signature_b64}"
-        r.headers[self.AUTHORIZATION_HEADER] = auth_header
+        return f"{header_string}; {signature_b64}"
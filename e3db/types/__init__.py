@@ -4,8 +4,11 @@ from .incoming_sharing import IncomingSharingPolicy
 from .meta import Meta
 from .outgoing_sharing import OutgoingSharingPolicy
 from .query_result import QueryResult
+from .batch_result import BatchResult
+from .transfer_result import TransferResult, TransferReport
 from .query import Query
 from .record import Record
+from .lazy_record import LazyRecord, LazyData
 from .authorizer_policy import AuthorizerPolicy
 from .file import File
 from .search_result import SearchResult
@@ -0,0 +1,102 @@
+from .record import Record
+
+
+class BatchResult(object):
+
+    def __init__(self, index, record=None, error=None):
+        """
+        Initialize the BatchResult class.
+
+        This object type holds the outcome of one item of a bulk operation,
+        such as e3db.Client.write_many. Exactly one of record or error is set.
+
+        Parameters
+        ----------
+        index : int
+            Position of the item in the input of the bulk operation.
+
+        record : e3db.Record
+            Decrypted record produced for the item, if it succeeded.
+
+        error : Exception
+            Error raised while processing the item, if it failed.
+
+        Returns
+        -------
+        None
+        """
+
+        if record is not None and (not isinstance(record, Record)):
+            raise TypeError("Record is not e3db.Record type. Given type: {0}".format(type(record)))
+        self.__index = int(index)
+        self.__record = record
+        self.__error = error
+
+    @property
+    def index(self):
+        """
+        Get position of the item in the input of the bulk operation.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Input position of the item.
+        """
+        return self.__index
+
+    @property
+    def record(self):
+        """
+        Get record produced for the item.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        e3db.Record
+            Decrypted record, or None if the item failed.
+        """
+        return self.__record
+
+    @property
+    def error(self):
+        """
+        Get error raised while processing the item.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Exception
+            Error, or None if the item succeeded.
+        """
+        return self.__error
+
+    @property
+    def ok(self):
+        """
+        Get whether the item succeeded.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True if the item succeeded.
+        """
+        return self.__error is None
+
+    def __repr__(self):
+        if self.ok:
+            return "BatchResult(index={0}, record_id={1})".format(self.__index, self.__record.meta.record_id if self.__record is not None else None)
+        return "BatchResult(index={0}, error={1!r})".format(self.__index, self.__error)
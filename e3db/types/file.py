@@ -16,7 +16,7 @@ class File():
             Base64 encoded MD5 Checksum of the Encrypted File, including E3DB Header information
 
         compression: str
-            The type of compression the file is using, before encryption. Reserved for future use.
+            The type of compression the file is using, before encryption: 'raw', 'zlib' or 'zstd'.
 
         size: int
             Size of the encrypted file, in bytes, including E3DB Header information
@@ -336,7 +336,7 @@ class File():
         Returns
         -------
         str
-            The type of compression the file is using, before encryption. Reserved for future use.
+            The type of compression the file is using, before encryption: 'raw', 'zlib' or 'zstd'.
         """
         return self.__compression
 
@@ -355,7 +355,7 @@ class File():
         int
             Size of the encrypted file, in bytes, including E3DB Header information
         """
-        return self.__compression
+        return self.__size
 
     # file_url getters and setters
     @property
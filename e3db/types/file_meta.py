@@ -16,7 +16,7 @@ class FileMeta(object):
             Size of the encrypted file, in bytes, including E3DB Header information
 
         compression: str
-            The type of compression the file is using, before encryption. Reserved for future use.
+            The type of compression the file is using, before encryption: 'raw', 'zlib' or 'zstd'.
 
         checksum: str
             Base64 encoded MD5 Checksum of the Encrypted File, including E3DB Header information
@@ -0,0 +1,152 @@
+from collections.abc import MutableMapping
+from .record import Record
+
+
+class LazyData(MutableMapping):
+    """
+    Data fields of a record, each decrypted the first time it is read.
+
+    Keys are available without decrypting anything. Reading a value decrypts
+    that field only, keeps the plaintext, and drops the ciphertext. Errors
+    raised while decrypting a field, such as e3db.CryptoError, are raised
+    when it is read.
+    """
+
+    def __init__(self, data, decrypt_field):
+        """
+        Initialize the LazyData class.
+
+        Parameters
+        ----------
+        data : dict
+            Encrypted data fields
+
+        decrypt_field : callable
+            Called with an encrypted field, returning its plaintext.
+
+        Returns
+        -------
+        None
+        """
+        self.__fields = dict(data)
+        self.__encrypted = set(self.__fields)
+        self.__decrypt_field = decrypt_field
+
+    def __getitem__(self, key):
+        value = self.__fields[key]
+        if key in self.__encrypted:
+            value = self.__decrypt_field(value)
+            self.__fields[key] = value
+            self.__encrypted.discard(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.__fields[key] = value
+        self.__encrypted.discard(key)
+
+    def __delitem__(self, key):
+        del self.__fields[key]
+        self.__encrypted.discard(key)
+
+    def __iter__(self):
+        return iter(self.__fields)
+
+    def __len__(self):
+        return len(self.__fields)
+
+    def __repr__(self):
+        return "LazyData({0} fields, {1} encrypted)".format(len(self.__fields), len(self.__encrypted))
+
+    @property
+    def encrypted_count(self):
+        """
+        Get number of fields not decrypted yet.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Number of fields still encrypted
+        """
+        return len(self.__encrypted)
+
+    def materialize(self):
+        """
+        Decrypt every remaining field.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            Plaintext data fields
+        """
+        return {key: self[key] for key in list(self.__fields)}
+
+
+class LazyRecord(Record):
+
+    def __init__(self, meta, data, decrypt_field):
+        """
+        Initialize the LazyRecord class.
+
+        This object type is an e3db.Record whose data fields are decrypted
+        when they are first read, so records and fields that are never
+        touched cost no decryption. The access key is resolved when the
+        record is created and captured by decrypt_field.
+
+        Parameters
+        ----------
+        meta : e3db.Meta
+            Meta data object of the record.
+
+        data : dict
+            Encrypted data fields of the record.
+
+        decrypt_field : callable
+            Called with an encrypted field, returning its plaintext.
+
+        Returns
+        -------
+        None
+        """
+        Record.__init__(self, meta, None)
+        self.data = LazyData(data or {}, decrypt_field)
+
+    def materialize(self):
+        """
+        Decrypt every remaining field, replacing data with a plain dict.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        e3db.types.LazyRecord
+            This record, fully decrypted.
+        """
+        if isinstance(self.data, LazyData):
+            self.data = self.data.materialize()
+        return self
+
+    def to_json(self):
+        """
+        Serialize the record as JSON-style object, decrypting every field.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            JSON-style document containing the Record elements.
+        """
+        self.materialize()
+        return Record.to_json(self)
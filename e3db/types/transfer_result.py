@@ -0,0 +1,265 @@
+from .file import File
+
+
+class TransferResult(object):
+
+    def __init__(self, index, file=None, error=None, seconds=0.0):
+        """
+        Initialize the TransferResult class.
+
+        This object type holds the outcome of one file of a
+        e3db.TransferManager batch. Exactly one of file or error is set.
+
+        Parameters
+        ----------
+        index : int
+            Position of the file in the input of the batch.
+
+        file : e3db.File
+            Metadata of the file transferred, if it succeeded.
+
+        error : Exception
+            Error raised while transferring the file, if it failed.
+
+        seconds : float
+            Time taken to transfer the file, including encryption or
+            decryption, but not time spent waiting for a worker.
+
+        Returns
+        -------
+        None
+        """
+
+        if file is not None and (not isinstance(file, File)):
+            raise TypeError("File is not e3db.File type. Given type: {0}".format(type(file)))
+        self.__index = int(index)
+        self.__file = file
+        self.__error = error
+        self.__seconds = float(seconds)
+
+    @property
+    def index(self):
+        """
+        Get position of the file in the input of the batch.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Input position of the file.
+        """
+        return self.__index
+
+    @property
+    def file(self):
+        """
+        Get metadata of the file transferred.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        e3db.File
+            File metadata, or None if the transfer failed.
+        """
+        return self.__file
+
+    @property
+    def error(self):
+        """
+        Get error raised while transferring the file.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Exception
+            Error, or None if the transfer succeeded.
+        """
+        return self.__error
+
+    @property
+    def ok(self):
+        """
+        Get whether the transfer succeeded.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True if the transfer succeeded.
+        """
+        return self.__error is None
+
+    @property
+    def seconds(self):
+        """
+        Get time taken to transfer the file.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        float
+            Seconds from the start to the end of the transfer.
+        """
+        return self.__seconds
+
+    @property
+    def size(self):
+        """
+        Get number of encrypted bytes transferred.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Size of the encrypted file, or 0 if the transfer failed.
+        """
+        return self.__file.size if self.__file is not None else 0
+
+    def __repr__(self):
+        if self.ok:
+            return "TransferResult(index={0}, record_id={1}, size={2}, seconds={3:.3f})".format(
+                self.__index, self.__file.record_id, self.size, self.__seconds)
+        return "TransferResult(index={0}, error={1!r})".format(self.__index, self.__error)
+
+
+class TransferReport(object):
+
+    def __init__(self, results, elapsed):
+        """
+        Initialize the TransferReport class.
+
+        This object type summarizes a e3db.TransferManager batch.
+
+        Parameters
+        ----------
+        results : list<e3db.TransferResult>
+            Result of each file, in input order.
+
+        elapsed : float
+            Seconds from the start to the end of the batch.
+
+        Returns
+        -------
+        None
+        """
+
+        self.__results = list(results)
+        self.__elapsed = float(elapsed)
+
+    @property
+    def results(self):
+        """
+        Get result of each file.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list<e3db.TransferResult>
+            Results, in input order.
+        """
+        return self.__results
+
+    @property
+    def elapsed(self):
+        """
+        Get duration of the batch.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        float
+            Seconds from the start to the end of the batch.
+        """
+        return self.__elapsed
+
+    @property
+    def failures(self):
+        """
+        Get results of the files that failed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list<e3db.TransferResult>
+            Failed results, in input order.
+        """
+        return [r for r in self.__results if not r.ok]
+
+    @property
+    def bytes(self):
+        """
+        Get number of encrypted bytes transferred by the batch.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Total size of the files transferred.
+        """
+        return sum(r.size for r in self.__results)
+
+    @property
+    def bytes_per_second(self):
+        """
+        Get aggregate throughput of the batch.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        float
+            Encrypted bytes transferred per second of the batch.
+        """
+        return self.bytes / self.__elapsed if self.__elapsed > 0 else 0.0
+
+    @property
+    def latencies(self):
+        """
+        Get time taken by each file that was transferred.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list<float>
+            Seconds per successful file, in input order.
+        """
+        return [r.seconds for r in self.__results if r.ok]
+
+    def __repr__(self):
+        return "TransferReport(files={0}, failures={1}, bytes={2}, elapsed={3:.3f}, bytes_per_second={4:.0f})".format(
+            len(self.__results), len(self.failures), self.bytes, self.__elapsed, self.bytes_per_second)
@@ -12,6 +12,10 @@ setup(
     'requests >= 2.4.2, < 3',
     'Cryptography >= 2.2',
   ],
+  extras_require={
+    'async': ['aiohttp >= 3.7, < 4'],
+    'zstd': ['zstandard >= 0.15'],
+  },
   url = "https://github.com/tozny/e3db-python",
   download_url = 'https://github.com/tozny/e3db-python/archive/{0}.tar.gz'.format(version),
   author = "Tozny, LLC",